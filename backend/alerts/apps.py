@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AlertsConfig(AppConfig):
     name = "alerts"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,254 @@
+"""
+报警规则引擎
+
+按设备在内存中缓存已编译的报警规则，对一批传感器数据按 传感器字段/条件 做向量化（NumPy）判断，
+触发结果通过抑制索引（冷却时间/重复报警）去重，索引未命中时整批只回退查询一次数据库。
+"""
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.utils import timezone
+
+from .models import AlertRule, AlertRecord
+from .stats import invalidate_alert_stats
+from .suppression import suppression_index
+
+# 规则缓存有效期（秒）；本进程内的规则变更通过信号立即失效，其他进程依赖该有效期
+RULE_CACHE_TTL = 60
+
+
+class CompiledRule:
+    """编译后的报警规则：条件被转换为可直接作用于数组的判断函数"""
+
+    __slots__ = ('rule', 'sensor_type', 'predicate')
+
+    def __init__(self, rule, predicate):
+        self.rule = rule
+        self.sensor_type = rule.sensor_type
+        self.predicate = predicate
+
+    @classmethod
+    def compile(cls, rule):
+        """编译规则，阈值配置不完整的规则返回 None"""
+        condition = rule.condition
+        threshold = rule.threshold
+
+        if condition in ('greater_than', 'less_than', 'equal', 'not_equal'):
+            if threshold is None:
+                return None
+            if condition == 'greater_than':
+                return cls(rule, lambda values: values > threshold)
+            if condition == 'less_than':
+                return cls(rule, lambda values: values < threshold)
+            if condition == 'equal':
+                return cls(rule, lambda values: values == threshold)
+            return cls(rule, lambda values: values != threshold)
+
+        if condition in ('between', 'outside'):
+            if rule.threshold_min is None and rule.threshold_max is None:
+                return None
+            low = -np.inf if rule.threshold_min is None else rule.threshold_min
+            high = np.inf if rule.threshold_max is None else rule.threshold_max
+            if condition == 'between':
+                return cls(rule, lambda values: (values >= low) & (values <= high))
+            return cls(rule, lambda values: (values < low) | (values > high))
+
+        return None
+
+
+def describe_threshold(rule):
+    """报警消息中的阈值描述"""
+    if rule.condition in ('between', 'outside'):
+        return f"[{rule.threshold_min}, {rule.threshold_max}]"
+    return f"{rule.threshold}"
+
+
+class RuleEngine:
+    """报警规则引擎"""
+
+    def __init__(self, ttl=RULE_CACHE_TTL):
+        self.ttl = ttl
+        self._rules = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, device_id=None):
+        """使设备（或全部设备）的规则缓存失效"""
+        with self._lock:
+            if device_id is None:
+                self._rules.clear()
+            else:
+                self._rules.pop(device_id, None)
+
+    def get_rules(self, device_ids):
+        """获取设备的已编译规则，缺失或过期的设备合并为一次查询加载"""
+        now = time.monotonic()
+        result = {}
+        missing = set()
+        with self._lock:
+            for device_id in device_ids:
+                entry = self._rules.get(device_id)
+                if entry is not None and now - entry[0] < self.ttl:
+                    result[device_id] = entry[1]
+                else:
+                    missing.add(device_id)
+
+        if missing:
+            loaded = {device_id: [] for device_id in missing}
+            for rule in AlertRule.objects.filter(device_id__in=missing, enabled=True).select_related('device'):
+                compiled = CompiledRule.compile(rule)
+                if compiled is not None:
+                    loaded[rule.device_id].append(compiled)
+            with self._lock:
+                for device_id, rules in loaded.items():
+                    self._rules[device_id] = (now, rules)
+            result.update(loaded)
+
+        return result
+
+    def evaluate(self, readings):
+        """
+        向量化判断一批数据
+
+        readings 为 SensorData 实例（可未保存）。返回 {(规则id, 设备id): (规则, 触发值)}，
+        同一规则在一批数据中多次触发时只保留第一次的值。
+        """
+        by_device = {}
+        for reading in readings:
+            by_device.setdefault(reading.device_id, []).append(reading)
+
+        rules_by_device = self.get_rules(by_device.keys())
+        triggered = {}
+
+        for device_id, device_readings in by_device.items():
+            rules = rules_by_device.get(device_id)
+            if not rules:
+                continue
+
+            columns = {}
+            for compiled in rules:
+                values = columns.get(compiled.sensor_type)
+                if values is None:
+                    values = np.array(
+                        [getattr(reading, compiled.sensor_type, None) for reading in device_readings],
+                        dtype=float,
+                    )
+                    columns[compiled.sensor_type] = values
+
+                # 缺失值（NaN）不参与判断
+                mask = compiled.predicate(values) & ~np.isnan(values)
+                hits = np.flatnonzero(mask)
+                if hits.size:
+                    triggered[(compiled.rule.id, device_id)] = (compiled.rule, float(values[hits[0]]))
+
+        return triggered
+
+    def process(self, readings):
+        """
+        判断一批数据并创建报警记录
+
+        触发结果先经过抑制索引过滤：已有未处理报警的规则只在开启重复报警且超过重复间隔时再次通知，
+        冷却时间内的重复触发直接丢弃。
+        """
+        triggered = self.evaluate(readings)
+        if not triggered:
+            return []
+
+        now = timezone.now()
+        now_ts = now.timestamp()
+        entries = suppression_index.get_many(triggered.keys())
+
+        # 索引中没有的 (规则, 设备) 整批只回退查询一次数据库
+        missing = {key: triggered[key][0] for key in triggered if key not in entries}
+        if missing:
+            loaded = self._load_entries(missing, now)
+            suppression_index.set_many(loaded)
+            entries.update(loaded)
+
+        records = []
+        repeats = []
+        updated = {}
+        for key, (rule, value) in triggered.items():
+            entry = entries.get(key)
+            if entry is not None:
+                if entry['alert_id'] is not None:
+                    if rule.repeat_alert and now_ts - entry['notified_at'] >= rule.repeat_interval_minutes * 60:
+                        repeats.append((rule, value, entry['alert_id']))
+                        updated[key] = {**entry, 'notified_at': now_ts}
+                    continue
+                if now_ts - entry['fired_at'] < rule.cooldown_minutes * 60:
+                    continue
+
+            records.append(AlertRecord(
+                rule=rule,
+                device=rule.device,
+                status='pending',
+                message=f"{rule.get_sensor_type_display()} {rule.get_condition_display()} {describe_threshold(rule)}，当前值：{value}",
+                current_value=value,
+                severity=rule.severity
+            ))
+
+        from .tasks import send_alert_notifications
+
+        if repeats:
+            # 只累加仍未处理的报警；通过 queryset.update() 关闭的报警不会触发释放信号
+            AlertRecord.objects.filter(id__in=[alert_id for _, _, alert_id in repeats], status='pending').update(
+                notification_count=F('notification_count') + 1
+            )
+            for rule, value, _ in repeats:
+                send_alert_notifications.delay(rule.id, value)
+
+        if records:
+            AlertRecord.objects.bulk_create(records)
+            owner_ids = {record.device.owner_id for record in records}
+            transaction.on_commit(lambda: invalidate_alert_stats(owner_ids))
+
+            # MySQL 的 bulk_create 不返回主键，需要补查新报警的 id；按 id 升序，同一键有多条时取最新的一条
+            if any(record.pk is None for record in records):
+                ids = {
+                    (rule_id, device_id): alert_id
+                    for rule_id, device_id, alert_id in AlertRecord.objects.filter(
+                        rule_id__in=[record.rule_id for record in records],
+                        status='pending'
+                    ).order_by('id').values_list('rule_id', 'device_id', 'id')
+                }
+                for record in records:
+                    record.pk = ids.get((record.rule_id, record.device_id))
+
+            for record in records:
+                updated[(record.rule_id, record.device_id)] = {
+                    'fired_at': now_ts,
+                    'notified_at': now_ts,
+                    'alert_id': record.pk,
+                }
+                send_alert_notifications.delay(record.rule_id, record.current_value)
+
+        suppression_index.set_many(updated)
+        return records
+
+    def _load_entries(self, rules, now):
+        """从数据库重建抑制索引条目：未处理报警 id 与冷却窗口内的最近触发时间，整批一次查询"""
+        since = now - timedelta(minutes=max(rule.cooldown_minutes for rule in rules.values()))
+        rows = AlertRecord.objects.filter(
+            rule_id__in={rule_id for rule_id, _ in rules}
+        ).filter(
+            Q(status='pending') | Q(triggered_at__gte=since)
+        ).values('rule_id', 'device_id').annotate(
+            fired_at=Max('triggered_at'),
+            alert_id=Max('id', filter=Q(status='pending')),
+        ).order_by()
+
+        entries = {}
+        for row in rows:
+            key = (row['rule_id'], row['device_id'])
+            if key not in rules:
+                continue
+            fired_at = row['fired_at'].timestamp()
+            entries[key] = {'fired_at': fired_at, 'notified_at': fired_at, 'alert_id': row['alert_id']}
+        return entries
+
+
+rule_engine = RuleEngine()
@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .engine import rule_engine
+from .models import AlertRecord, AlertRule
+from .stats import invalidate_alert_stats
+from .suppression import suppression_index
+
+
+@receiver([post_save, post_delete], sender=AlertRule)
+def invalidate_rule_cache(sender, instance, **kwargs):
+    """报警规则变更后使规则引擎中该设备的缓存失效"""
+    rule_engine.invalidate(instance.device_id)
+
+
+@receiver(post_save, sender=AlertRecord)
+def invalidate_record_stats(sender, instance, **kwargs):
+    """报警记录新增或状态变化后使所属用户的统计缓存失效"""
+    owner_id = instance.device.owner_id
+    transaction.on_commit(lambda: invalidate_alert_stats([owner_id]))
+
+
+@receiver(post_save, sender=AlertRecord)
+def release_closed_record(sender, instance, **kwargs):
+    """
+    报警离开未处理状态后从抑制索引中释放
+
+    无论通过接口、管理后台还是其他代码保存都会执行；queryset.update() 不触发信号，
+    批量修改状态时需要自行调用 suppression_index.release。
+    """
+    if instance.status == 'pending':
+        return
+    rule_id, device_id, alert_id = instance.rule_id, instance.device_id, instance.pk
+    transaction.on_commit(lambda: suppression_index.release(rule_id, device_id, alert_id))
+
+
+@receiver(post_delete, sender=AlertRecord)
+def release_deleted_record(sender, instance, **kwargs):
+    """删除未处理报警时从抑制索引中释放（已关闭的报警在状态变化时已释放）"""
+    if instance.status != 'pending':
+        return
+    rule_id, device_id, alert_id = instance.rule_id, instance.device_id, instance.pk
+    transaction.on_commit(lambda: suppression_index.release(rule_id, device_id, alert_id))
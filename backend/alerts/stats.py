@@ -0,0 +1,105 @@
+"""
+报警统计
+
+统计结果按用户缓存（带版本号），报警状态变化时递增该用户的版本号使缓存失效；
+同一命名空间也用于报警接口的响应缓存。
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from iot_monitor.cache import ALERTS_NAMESPACE, bump_version, get_or_compute
+from iot_monitor.stats import by_severity, by_status, grouped_counts, matrix_from_rows, severity_status_matrix
+
+from .models import AlertRecord
+
+STATUSES = [status for status, _ in AlertRecord.STATUS_CHOICES]
+
+TIME_RANGES = {
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+}
+
+# 统计缓存时间（秒）；按时间范围统计的窗口随时间滑动，过期后重新计算
+STATS_CACHE_TIMEOUT = 60
+
+
+def stats_namespace(owner_id):
+    return ALERTS_NAMESPACE.format(user=owner_id)
+
+
+def invalidate_alert_stats(owner_ids):
+    for owner_id in set(owner_ids):
+        bump_version(stats_namespace(owner_id))
+
+
+def record_stats(user):
+    """报警记录汇总：总数、各状态数、各严重程度数及完整矩阵"""
+
+    def compute():
+        matrix = severity_status_matrix(AlertRecord.objects.filter(device__owner=user), STATUSES)
+        statuses = by_status(matrix)
+        return {
+            'summary': {
+                'total': sum(statuses.values()),
+                'pending': statuses['pending'],
+                'acknowledged': statuses['acknowledged'],
+                'resolved': statuses['resolved'],
+            },
+            'by_severity': by_severity(matrix),
+            'matrix': matrix,
+        }
+
+    return get_or_compute(stats_namespace(user.id), ['records'], compute, timeout=STATS_CACHE_TIMEOUT)
+
+
+def range_stats(user, time_range):
+    """时间范围内的报警统计：设备、严重程度、状态在同一条分组查询中统计，最近报警一次查询"""
+    if time_range not in TIME_RANGES:
+        time_range = '7d'
+
+    def compute():
+        queryset = AlertRecord.objects.filter(
+            device__owner=user,
+            triggered_at__gte=timezone.now() - TIME_RANGES[time_range]
+        )
+        rows = grouped_counts(queryset, 'device__name')
+        matrix = matrix_from_rows(rows, STATUSES)
+        statuses = by_status(matrix)
+
+        devices = {}
+        for row in rows:
+            devices[row['device__name']] = devices.get(row['device__name'], 0) + row['count']
+        device_stats = [
+            {'device__name': name, 'count': count}
+            for name, count in sorted(devices.items(), key=lambda item: -item[1])[:10]
+        ]
+
+        recent_alerts = [
+            {
+                'id': alert.id,
+                'message': alert.message,
+                'severity': alert.severity,
+                'device_name': alert.device.name,
+                'current_value': alert.current_value,
+                'status': alert.status,
+                'triggered_at': alert.triggered_at.isoformat()
+            }
+            for alert in queryset.select_related('device').order_by('-triggered_at')[:10]
+        ]
+
+        return {
+            'time_range': time_range,
+            'total_stats': {
+                'total': sum(statuses.values()),
+                'pending': statuses['pending'],
+                'resolved': statuses['resolved'],
+            },
+            'device_stats': device_stats,
+            'severity_stats': by_severity(matrix),
+            'matrix': matrix,
+            'recent_alerts': recent_alerts
+        }
+
+    return get_or_compute(stats_namespace(user.id), ['range', time_range], compute, timeout=STATS_CACHE_TIMEOUT)
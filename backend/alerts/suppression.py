@@ -0,0 +1,58 @@
+"""
+报警抑制索引
+
+按 (规则, 设备) 在缓存（django-redis）中记录最近一次触发时间、最近一次通知时间和未处理报警的 id，
+使冷却时间内的重复触发无需访问数据库即可丢弃。
+"""
+from django.core.cache import cache
+
+KEY_PREFIX = 'alerts:suppress'
+
+# 索引条目的过期时间（秒）；过期后回退到数据库查询并重新写入
+ENTRY_TIMEOUT = 24 * 60 * 60
+
+
+def _key(rule_id, device_id):
+    return f"{KEY_PREFIX}:{rule_id}:{device_id}"
+
+
+class SuppressionIndex:
+    """报警抑制索引，条目格式为 {'fired_at': 时间戳, 'notified_at': 时间戳, 'alert_id': 报警id或None}"""
+
+    def __init__(self, backend=cache):
+        self.backend = backend
+
+    def get_many(self, keys):
+        """批量读取条目，keys 为 (规则id, 设备id) 列表"""
+        cache_keys = {_key(rule_id, device_id): (rule_id, device_id) for rule_id, device_id in keys}
+        found = self.backend.get_many(list(cache_keys))
+        return {cache_keys[cache_key]: entry for cache_key, entry in found.items()}
+
+    def set_many(self, entries):
+        """批量写入条目，entries 为 {(规则id, 设备id): 条目}"""
+        if entries:
+            self.backend.set_many(
+                {_key(rule_id, device_id): entry for (rule_id, device_id), entry in entries.items()},
+                timeout=ENTRY_TIMEOUT,
+            )
+
+    def release(self, rule_id, device_id, alert_id):
+        """
+        报警离开未处理状态或被删除后使索引失效（由 alerts.signals 调用）
+
+        清除未处理报警 id，保留最近触发时间，使冷却时间在报警关闭后仍然生效。
+        """
+        key = _key(rule_id, device_id)
+        entry = self.backend.get(key)
+        if entry is None:
+            return
+        if entry.get('alert_id') not in (None, alert_id):
+            return
+        entry['alert_id'] = None
+        self.backend.set(key, entry, timeout=ENTRY_TIMEOUT)
+
+    def delete(self, rule_id, device_id):
+        self.backend.delete(_key(rule_id, device_id))
+
+
+suppression_index = SuppressionIndex()
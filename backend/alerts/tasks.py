@@ -1,6 +1,8 @@
 from celery import shared_task
 from django.utils import timezone
 from .models import AlertRule, AlertRecord
+from .stats import invalidate_alert_stats
+from .engine import rule_engine
 from monitoring.models import SensorData
 
 
@@ -12,63 +14,7 @@ def check_alert_rules(sensor_data_id):
     except SensorData.DoesNotExist:
         return
 
-    device = sensor_data.device
-
-    # 获取该设备所有启用的报警规则
-    alert_rules = AlertRule.objects.filter(
-        device=device,
-        enabled=True
-    )
-
-    for rule in alert_rules:
-        # 获取传感器对应的值
-        sensor_value = None
-        if rule.sensor_type == 'temperature':
-            sensor_value = sensor_data.temperature
-        elif rule.sensor_type == 'humidity':
-            sensor_value = sensor_data.humidity
-        elif rule.sensor_type == 'light_intensity':
-            sensor_value = sensor_data.light_intensity
-        elif rule.sensor_type == 'pm25':
-            sensor_value = sensor_data.pm25
-        elif rule.sensor_type == 'co2':
-            sensor_value = sensor_data.co2
-
-        if sensor_value is None:
-            continue
-
-        # 检查是否触发报警
-        triggered = False
-        if rule.condition == 'greater_than' and sensor_value > rule.threshold:
-            triggered = True
-        elif rule.condition == 'less_than' and sensor_value < rule.threshold:
-            triggered = True
-        elif rule.condition == 'equal' and sensor_value == rule.threshold:
-            triggered = True
-        elif rule.condition == 'not_equal' and sensor_value != rule.threshold:
-            triggered = True
-
-        if triggered:
-            # 检查是否已有未解决的相同报警
-            existing_alert = AlertRecord.objects.filter(
-                rule=rule,
-                device=device,
-                status='pending'
-            ).first()
-
-            if not existing_alert:
-                # 创建报警记录
-                AlertRecord.objects.create(
-                    rule=rule,
-                    device=device,
-                    status='pending',
-                    message=f"{rule.get_sensor_type_display()} {rule.get_condition_display()} {rule.threshold}，当前值：{sensor_value}",
-                    current_value=sensor_value,
-                    severity=rule.severity
-                )
-
-                # 发送通知
-                send_alert_notifications.delay(rule.id, sensor_value)
+    rule_engine.process([sensor_data])
 
 
 @shared_task
@@ -121,7 +67,10 @@ def cleanup_old_alerts():
     from datetime import timedelta
     threshold = timezone.now() - timedelta(days=90)
 
-    AlertRecord.objects.filter(
+    expired = AlertRecord.objects.filter(
         status__in=['resolved', 'false_alarm'],
         resolved_at__lt=threshold
-    ).delete()
+    )
+    owner_ids = list(expired.values_list('device__owner_id', flat=True).distinct())
+    expired.delete()
+    invalidate_alert_stats(owner_ids)
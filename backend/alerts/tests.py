@@ -1,3 +1,251 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from devices.models import Device
+from monitoring.models import SensorData
+from .engine import CompiledRule, RuleEngine, rule_engine
+from .models import AlertRecord, AlertRule
+from .stats import invalidate_alert_stats
+from .suppression import suppression_index
+
+# 统计接口的查询次数上限（与报警数、设备数无关）
+STATS_QUERY_LIMIT = 2
+
+
+class AlertStatsQueryCountTest(TestCase):
+    """报警统计由一次分组查询得到完整的严重程度 × 状态矩阵"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='alert-stats', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        records = []
+        for i in range(3):
+            device = Device.objects.create(
+                name=f'统计设备{i}', device_id=f'STATS-000{i}', device_type='composite',
+                location='lab', status='online', owner=user
+            )
+            rule = AlertRule.objects.create(
+                name=f'规则{i}', device=device, sensor_type='temperature',
+                condition='greater_than', threshold=30, created_by=user
+            )
+            for severity, status in [('high', 'pending'), ('critical', 'resolved'), ('high', 'acknowledged')]:
+                records.append(AlertRecord(
+                    rule=rule, device=device, status=status, message='m', current_value=35, severity=severity
+                ))
+        AlertRecord.objects.bulk_create(records)
+        invalidate_alert_stats([user.id])
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), STATS_QUERY_LIMIT)
+        return response.json()
+
+    def test_record_stats(self):
+        data = self.get('/api/alerts/records/stats/')
+        self.assertEqual(data['summary'], {'total': 9, 'pending': 3, 'acknowledged': 3, 'resolved': 3})
+        self.assertEqual(data['by_severity'], {'low': 0, 'medium': 0, 'high': 6, 'critical': 3})
+        self.assertEqual(data['matrix']['high']['acknowledged'], 3)
+
+    def test_range_statistics(self):
+        data = self.get('/api/alerts/statistics/?range=24h')
+        self.assertEqual(data['total_stats'], {'total': 9, 'pending': 3, 'resolved': 3})
+        self.assertEqual(len(data['device_stats']), 3)
+        self.assertEqual(data['device_stats'][0]['count'], 3)
+        self.assertEqual(len(data['recent_alerts']), 9)
+
+
+def scalar_triggered(rule, value):
+    """逐条判断的参考实现：与向量化之前按规则逐个比较的语义一致，between / outside 包含端点，缺少的边界不限制"""
+    if value is None or value != value:
+        return False
+    if rule.condition in ('greater_than', 'less_than', 'equal', 'not_equal'):
+        if rule.threshold is None:
+            return False
+        return {
+            'greater_than': value > rule.threshold,
+            'less_than': value < rule.threshold,
+            'equal': value == rule.threshold,
+            'not_equal': value != rule.threshold,
+        }[rule.condition]
+    if rule.threshold_min is None and rule.threshold_max is None:
+        return False
+    above_min = rule.threshold_min is None or value >= rule.threshold_min
+    below_max = rule.threshold_max is None or value <= rule.threshold_max
+    if rule.condition == 'between':
+        return above_min and below_max
+    return not (above_min and below_max)
+
+
+class RuleEngineEvaluateTest(TestCase):
+    """向量化判断与逐条判断的结果一致"""
+
+    RULES = [
+        ('greater_than', {'threshold': 30}),
+        ('less_than', {'threshold': 20}),
+        ('equal', {'threshold': 25}),
+        ('not_equal', {'threshold': 25}),
+        ('between', {'threshold_min': 20, 'threshold_max': 30}),
+        ('outside', {'threshold_min': 20, 'threshold_max': 30}),
+        ('between', {'threshold_min': 25}),
+        ('outside', {'threshold_max': 25}),
+        # 阈值不完整的规则不会触发
+        ('greater_than', {}),
+        ('between', {}),
+    ]
+    VALUES = [None, float('nan'), 10, 19.9, 20, 25, 30, 30.1, 40]
+
+    def setUp(self):
+        user = User.objects.create_user(username='alert-evaluate', password='pass')
+        self.device = Device.objects.create(
+            name='判断设备', device_id='EVAL-0001', device_type='composite',
+            location='lab', status='online', owner=user
+        )
+        self.rules = [
+            AlertRule.objects.create(
+                name=f'{condition}{index}', device=self.device, sensor_type='temperature',
+                condition=condition, created_by=user, **thresholds
+            )
+            for index, (condition, thresholds) in enumerate(self.RULES)
+        ]
+        # 数据中没有该字段的规则
+        self.rules.append(AlertRule.objects.create(
+            name='气压', device=self.device, sensor_type='pressure', condition='less_than',
+            threshold=2000, created_by=user
+        ))
+        self.engine = RuleEngine()
+
+    def test_incomplete_thresholds_not_compiled(self):
+        compiled = [CompiledRule.compile(rule) for rule in self.rules]
+        skipped = [rule.name for rule, item in zip(self.rules, compiled) if item is None]
+        self.assertEqual(skipped, ['greater_than8', 'between9'])
+
+    def test_matches_scalar_semantics(self):
+        for value in self.VALUES:
+            with self.subTest(value=value):
+                reading = SensorData(device=self.device, temperature=value)
+                triggered = self.engine.evaluate([reading])
+                expected = {rule.id for rule in self.rules if scalar_triggered(rule, getattr(reading, rule.sensor_type))}
+                self.assertEqual({rule_id for rule_id, _ in triggered}, expected)
+                for rule, triggered_value in triggered.values():
+                    self.assertEqual(triggered_value, value)
+
+    def test_batch_reports_first_hit(self):
+        readings = [SensorData(device=self.device, temperature=value) for value in self.VALUES]
+        triggered = self.engine.evaluate(readings)
+        for rule in self.rules:
+            hits = [
+                reading.temperature for reading in readings
+                if scalar_triggered(rule, getattr(reading, rule.sensor_type))
+            ]
+            key = (rule.id, self.device.id)
+            if hits:
+                self.assertEqual(triggered[key][1], hits[0])
+            else:
+                self.assertNotIn(key, triggered)
+
+
+class RuleEngineProcessTest(TestCase):
+    """抑制索引：冷却时间、重复报警、报警关闭后释放，以及缓存丢失时回退数据库"""
+
+    def setUp(self):
+        cache.clear()
+        rule_engine.invalidate()
+        user = User.objects.create_user(username='alert-engine', password='pass')
+        self.device = Device.objects.create(
+            name='引擎设备', device_id='ENGINE-0001', device_type='composite',
+            location='lab', status='online', owner=user
+        )
+        self.rule = AlertRule.objects.create(
+            name='高温', device=self.device, sensor_type='temperature', condition='greater_than',
+            threshold=30, cooldown_minutes=5, created_by=user
+        )
+        self.key = (self.rule.id, self.device.id)
+        patcher = mock.patch('alerts.tasks.send_alert_notifications.delay')
+        self.notify = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def process(self, temperature=35):
+        with self.captureOnCommitCallbacks(execute=True):
+            return rule_engine.process([SensorData(device=self.device, temperature=temperature)])
+
+    def shift_entry(self, **seconds):
+        """把索引条目中的时间往前移，模拟时间流逝"""
+        entry = suppression_index.get_many([self.key])[self.key]
+        shifted = {name: entry[name] - value for name, value in seconds.items()}
+        suppression_index.set_many({self.key: {**entry, **shifted}})
+
+    def test_pending_alert_suppresses_triggers(self):
+        self.assertEqual(len(self.process()), 1)
+        self.assertEqual(self.process(), [])
+        self.assertEqual(AlertRecord.objects.count(), 1)
+        self.assertEqual(self.notify.call_count, 1)
+
+    def test_repeat_alert_after_interval(self):
+        self.rule.repeat_alert = True
+        self.rule.repeat_interval_minutes = 30
+        self.rule.save()
+        [record] = self.process()
+
+        self.assertEqual(self.process(), [])
+        self.shift_entry(notified_at=31 * 60)
+        self.assertEqual(self.process(), [])
+        record.refresh_from_db()
+        self.assertEqual(record.notification_count, 1)
+        self.assertEqual(self.notify.call_count, 2)
+
+    def test_cooldown_after_release(self):
+        [record] = self.process()
+        record.status = 'resolved'
+        with self.captureOnCommitCallbacks(execute=True):
+            record.save()
+        self.assertIsNone(suppression_index.get_many([self.key])[self.key]['alert_id'])
+
+        # 冷却时间内不生成新报警，之后生成
+        self.assertEqual(self.process(), [])
+        self.shift_entry(fired_at=6 * 60)
+        self.assertEqual(len(self.process()), 1)
+
+    def test_closed_by_update_does_not_count_repeats(self):
+        self.rule.repeat_alert = True
+        self.rule.repeat_interval_minutes = 1
+        self.rule.save()
+        [record] = self.process()
+        AlertRecord.objects.filter(pk=record.pk).update(status='resolved')
+
+        self.shift_entry(notified_at=2 * 60)
+        self.process()
+        record.refresh_from_db()
+        self.assertEqual(record.notification_count, 0)
+
+    def test_delete_releases_pending_alert(self):
+        [record] = self.process()
+        with self.captureOnCommitCallbacks(execute=True):
+            record.delete()
+        self.assertIsNone(suppression_index.get_many([self.key])[self.key]['alert_id'])
+
+    def test_cold_cache_falls_back_to_database(self):
+        [record] = self.process()
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.process(), [])
+        # 规则在进程内缓存，只回退查询一次报警记录
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(suppression_index.get_many([self.key])[self.key]['alert_id'], record.pk)
 
-# Create your tests here.
+        # 报警已关闭但仍在冷却时间内
+        AlertRecord.objects.filter(pk=record.pk).update(status='resolved')
+        cache.clear()
+        self.assertEqual(self.process(), [])
+        entry = suppression_index.get_many([self.key])[self.key]
+        self.assertIsNone(entry['alert_id'])
+        self.assertLess(time.time() - entry['fired_at'], 60)
@@ -4,8 +4,9 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
-from django.db.models import Count, Q
+from iot_monitor.cache import ALERTS_NAMESPACE, DEFAULT_TIMEOUT, DEVICES_NAMESPACE, cache_response
 from .models import AlertRule, AlertRecord, NotificationConfig
+from .stats import range_stats, record_stats
 from .serializers import (
     AlertRuleSerializer, AlertRecordSerializer,
     AlertRecordUpdateSerializer, NotificationConfigSerializer
@@ -57,6 +58,7 @@ class AlertRecordViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset.order_by('-triggered_at')
 
     @action(detail=False, methods=['get'])
+    @cache_response(ALERTS_NAMESPACE, DEVICES_NAMESPACE)
     def pending(self, request):
         """获取待处理的报警"""
         pending_alerts = self.get_queryset().filter(status='pending')
@@ -66,24 +68,7 @@ class AlertRecordViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """获取报警统计"""
-        queryset = AlertRecord.objects.filter(device__owner=self.request.user)
-
-        stats = queryset.aggregate(
-            total=Count('id'),
-            pending=Count('id', filter=Q(status='pending')),
-            acknowledged=Count('id', filter=Q(status='acknowledged')),
-            resolved=Count('id', filter=Q(status='resolved')),
-        )
-
-        # 按严重程度统计
-        severity_stats = {}
-        for severity in ['low', 'medium', 'high', 'critical']:
-            severity_stats[severity] = queryset.filter(severity=severity).count()
-
-        return Response({
-            'summary': stats,
-            'by_severity': severity_stats
-        })
+        return Response(record_stats(request.user))
 
 
 class AlertAcknowledgeView(APIView):
@@ -93,7 +78,7 @@ class AlertAcknowledgeView(APIView):
     def post(self, request, pk):
         """确认报警"""
         try:
-            alert = AlertRecord.objects.get(
+            alert = AlertRecord.objects.select_related('device').get(
                 pk=pk,
                 device__owner=request.user,
                 status='pending'
@@ -117,7 +102,7 @@ class AlertResolveView(APIView):
     def post(self, request, pk):
         """解决报警"""
         try:
-            alert = AlertRecord.objects.get(
+            alert = AlertRecord.objects.select_related('device').get(
                 pk=pk,
                 device__owner=request.user
             )
@@ -137,61 +122,7 @@ class AlertStatisticsView(APIView):
     """报警统计视图"""
     permission_classes = [IsAuthenticated]
 
+    @cache_response(ALERTS_NAMESPACE, DEVICES_NAMESPACE, window=DEFAULT_TIMEOUT)
     def get(self, request):
         """获取报警统计数据"""
-        user = request.user
-        time_range = request.query_params.get('range', '7d')
-
-        from datetime import timedelta
-        if time_range == '24h':
-            start_time = timezone.now() - timedelta(hours=24)
-        elif time_range == '7d':
-            start_time = timezone.now() - timedelta(days=7)
-        elif time_range == '30d':
-            start_time = timezone.now() - timedelta(days=30)
-        else:
-            start_time = timezone.now() - timedelta(days=7)
-
-        queryset = AlertRecord.objects.filter(
-            device__owner=user,
-            triggered_at__gte=start_time
-        )
-
-        # 总体统计
-        total_stats = queryset.aggregate(
-            total=Count('id'),
-            pending=Count('id', filter=Q(status='pending')),
-            resolved=Count('id', filter=Q(status='resolved')),
-        )
-
-        # 按设备统计
-        device_stats = queryset.values('device__name').annotate(
-            count=Count('id')
-        ).order_by('-count')[:10]
-
-        # 按严重程度统计
-        severity_stats = {}
-        for severity in ['low', 'medium', 'high', 'critical']:
-            severity_stats[severity] = queryset.filter(severity=severity).count()
-
-        # 获取最近的报警记录
-        recent_alerts = queryset.order_by('-triggered_at')[:10]
-        recent_alerts_data = []
-        for alert in recent_alerts:
-            recent_alerts_data.append({
-                'id': alert.id,
-                'message': alert.message,
-                'severity': alert.severity,
-                'device_name': alert.device.name,
-                'current_value': alert.current_value,
-                'status': alert.status,
-                'triggered_at': alert.triggered_at.isoformat()
-            })
-
-        return Response({
-            'time_range': time_range,
-            'total_stats': total_stats,
-            'device_stats': list(device_stats),
-            'severity_stats': severity_stats,
-            'recent_alerts': recent_alerts_data
-        })
+        return Response(range_stats(request.user, request.query_params.get('range', '7d')))
@@ -4,10 +4,11 @@ from .models import Device, DeviceConfig, DeviceMaintenance
 
 @admin.register(Device)
 class DeviceAdmin(admin.ModelAdmin):
-    list_display = ['name', 'device_id', 'device_type', 'location', 'status', 'ip_address', 'owner', 'last_active', 'created_at']
+    list_display = ['name', 'device_id', 'device_type', 'location', 'status', 'ip_address', 'owner', 'last_active', 'reading_count', 'created_at']
     list_filter = ['device_type', 'status', 'created_at']
     search_fields = ['name', 'device_id', 'location', 'manufacturer', 'model']
-    readonly_fields = ['created_at', 'updated_at', 'last_active']
+    # reading_count 由数据上报以 F() 累加，表单保存会用旧值覆盖并发的累加
+    readonly_fields = ['created_at', 'updated_at', 'last_active', 'reading_count']
     date_hierarchy = 'created_at'
     fieldsets = (
         ('基本信息', {
@@ -23,7 +24,7 @@ class DeviceAdmin(admin.ModelAdmin):
             'fields': ('install_date', 'warranty_date', 'owner', 'is_active')
         }),
         ('时间信息', {
-            'fields': ('created_at', 'updated_at', 'last_active')
+            'fields': ('created_at', 'updated_at', 'last_active', 'reading_count')
         }),
     )
 
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_reading_count(apps, schema_editor):
+    Device = apps.get_model("devices", "Device")
+    SensorData = apps.get_model("monitoring", "SensorData")
+
+    counts = (
+        SensorData.objects.filter(device=OuterRef("pk"))
+        .order_by()
+        .values("device")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    Device.objects.update(reading_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("devices", "0001_initial"),
+        ("monitoring", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="device",
+            name="reading_count",
+            field=models.PositiveBigIntegerField(default=0, verbose_name="数据条数"),
+        ),
+        migrations.RunPython(backfill_reading_count, migrations.RunPython.noop),
+    ]
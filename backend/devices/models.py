@@ -48,6 +48,7 @@ class Device(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
     last_active = models.DateTimeField(null=True, blank=True, verbose_name='最后活跃时间')
+    reading_count = models.PositiveBigIntegerField(default=0, verbose_name='数据条数')
     is_active = models.BooleanField(default=True, verbose_name='是否启用')
 
     class Meta:
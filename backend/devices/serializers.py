@@ -26,20 +26,24 @@ class DeviceSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("设备ID已存在")
         return value
 
+    def update(self, instance, validated_data):
+        """只写回请求中的字段，避免用读取时的值覆盖上报数据并发累加的 reading_count"""
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
 
 class DeviceListSerializer(serializers.ModelSerializer):
     """设备列表序列化器（轻量级）"""
     owner_name = serializers.CharField(source='owner.username', read_only=True)
-    sensor_count = serializers.SerializerMethodField()
+    sensor_count = serializers.IntegerField(source='reading_count', read_only=True)
 
     class Meta:
         model = Device
         fields = ['id', 'name', 'device_id', 'device_type', 'location', 'status',
                   'owner_name', 'last_active', 'sensor_count']
 
-    def get_sensor_count(self, obj):
-        return obj.sensor_data.count()
-
 
 class DeviceCreateSerializer(serializers.ModelSerializer):
     """设备创建序列化器"""
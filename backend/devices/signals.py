@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from iot_monitor.cache import DEVICES_NAMESPACE, bump_version
+from .models import Device
+
+
+@receiver([post_save, post_delete], sender=Device)
+def invalidate_device_cache(sender, instance, **kwargs):
+    """设备变更后使所属用户的设备相关缓存失效"""
+    namespace = DEVICES_NAMESPACE.format(user=instance.owner_id)
+    transaction.on_commit(lambda: bump_version(namespace))
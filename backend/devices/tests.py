@@ -1,3 +1,45 @@
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from iot_monitor.cache import DEVICES_NAMESPACE, bump_version
+from .models import Device
+
+LIST_URL = '/api/devices/devices/'
+
+
+class DeviceListCacheTest(TestCase):
+    """设备列表按用户缓存，未变化的轮询返回 304，设备写入后失效"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='cached', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        bump_version(DEVICES_NAMESPACE.format(user=self.user.id))
+
+    def create_device(self, index):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Device.objects.create(
+                name=f'缓存设备{index}', device_id=f'CACHE-000{index}', device_type='composite',
+                location='lab', status='online', owner=self.user
+            )
+
+    def test_conditional_get_and_invalidation(self):
+        self.create_device(0)
+        response = self.client.get(LIST_URL)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(LIST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+        self.create_device(1)
+        response = self.client.get(LIST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'CACHE-0001')
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
+from iot_monitor.cache import DEVICE_ACTIVITY_NAMESPACE, DEVICES_NAMESPACE, cache_response
 from .models import Device, DeviceConfig
 from .serializers import DeviceSerializer, DeviceListSerializer, DeviceCreateSerializer, DeviceConfigSerializer
 
@@ -13,7 +14,7 @@ class DeviceViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Device.objects.filter(owner=self.request.user)
+        return Device.objects.filter(owner=self.request.user).select_related('owner')
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -22,6 +23,10 @@ class DeviceViewSet(viewsets.ModelViewSet):
             return DeviceCreateSerializer
         return DeviceSerializer
 
+    @cache_response(DEVICES_NAMESPACE, DEVICE_ACTIVITY_NAMESPACE)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
@@ -42,9 +47,9 @@ class DeviceViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def latest_data(self, request, pk=None):
         """获取设备最新数据"""
-        from monitoring.models import SensorData
+        from monitoring.models import LatestSensorData
         device = self.get_object()
-        latest_data = device.sensor_data.first()
+        latest_data = LatestSensorData.objects.filter(device=device).first()
         if latest_data:
             return Response({
                 'device_id': device.device_id,
@@ -70,7 +75,7 @@ class DeviceToggleStatusView(APIView):
             if new_status in ['online', 'offline', 'maintenance']:
                 device.status = new_status
                 device.last_active = timezone.now()
-                device.save()
+                device.save(update_fields=['status', 'last_active', 'updated_at'])
                 return Response({'message': f'设备状态已更新为{new_status}'})
             return Response({'error': '无效的状态值'}, status=status.HTTP_400_BAD_REQUEST)
         except Device.DoesNotExist:
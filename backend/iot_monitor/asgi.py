@@ -7,6 +7,7 @@ from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 import monitoring.routing
+import robots.routing
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "iot_monitor.settings")
 
@@ -19,6 +20,7 @@ application = ProtocolTypeRouter({
     "websocket": AuthMiddlewareStack(
         URLRouter(
             monitoring.routing.websocket_urlpatterns
+            + robots.routing.websocket_urlpatterns
         )
     ),
 })
@@ -0,0 +1,146 @@
+"""
+带版本号的缓存
+
+每个命名空间在缓存中保存一个版本号，缓存键包含当前版本；数据变化时只需递增版本号，
+旧版本的条目不再被读取，随过期时间自然淘汰，不需要逐个删除。
+
+cache_response 在此基础上按用户和查询参数缓存只读接口的响应，并支持条件请求：
+ETag 由命名空间版本号计算，客户端轮询时数据未变化直接返回 304，不读取数据库。
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+DEFAULT_TIMEOUT = 60
+
+# 命名空间，{user} 为当前用户 id，其他占位符取自 URL 参数
+# 设备信息（只在设备保存或删除时变化）与上报活动（最后活跃时间、数据条数）分开，
+# 只有设备列表依赖上报活动，其他接口不会因设备持续上报而失效
+DEVICES_NAMESPACE = 'devices:{user}'
+DEVICE_ACTIVITY_NAMESPACE = 'devices:activity:{user}'
+READINGS_NAMESPACE = 'readings:{device_id}'
+ALERTS_NAMESPACE = 'alerts:{user}'
+ROBOTS_DASHBOARD_NAMESPACE = 'robots:dashboard'
+
+
+def _version_key(namespace):
+    return f"{namespace}:version"
+
+
+def get_version(namespace):
+    """命名空间当前版本号；版本号丢失时以毫秒时间戳重新初始化，避免与旧条目的版本重合"""
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(namespaces):
+    """一次读取多个命名空间的版本号"""
+    found = cache.get_many([_version_key(namespace) for namespace in namespaces])
+    return [found.get(_version_key(namespace)) or get_version(namespace) for namespace in namespaces]
+
+
+def bump_version(namespace):
+    """使命名空间下的全部缓存条目失效"""
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.add(_version_key(namespace), int(time.time() * 1000), timeout=None)
+
+
+def bump_versions(namespaces):
+    for namespace in namespaces:
+        bump_version(namespace)
+
+
+def versioned_key(namespace, *parts):
+    return ':'.join([namespace, f"v{get_version(namespace)}", *(str(part) for part in parts)])
+
+
+def get_or_compute(namespace, parts, compute, timeout=DEFAULT_TIMEOUT):
+    """按命名空间当前版本读取缓存，未命中时调用 compute() 计算并写入"""
+    key = versioned_key(namespace, *parts)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout=timeout)
+    return value
+
+
+def _fingerprint(request, namespaces, window):
+    parts = [
+        request.path,
+        sorted(request.query_params.lists()),
+        request.user.pk,
+        get_versions(namespaces),
+    ]
+    if window:
+        # 时间片使按时间窗口统计的接口每 window 秒重新计算，即使版本号未变化
+        parts.append(int(time.time() // window))
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return etag in [value.strip() for value in if_none_match.split(',')] or if_none_match.strip() == '*'
+    if last_modified is None:
+        return False
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since') or '')
+    return since is not None and int(last_modified) <= since
+
+
+def cache_response(*namespaces, timeout=DEFAULT_TIMEOUT, window=None):
+    """
+    缓存只读接口的响应
+
+    namespaces 为命名空间模板（见 DEVICES_NAMESPACE 等），任一命名空间版本号递增后缓存失效。
+    统计范围随当前时间滑动的接口传入 window（秒），ETag 每个时间片更换一次；
+    只由数据版本决定的接口不传，数据不变时 ETag 一直有效。
+    可用于视图方法和 api_view 函数；只缓存 200 响应。
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            request = args[0] if isinstance(args[0], Request) else args[1]
+            names = [namespace.format(user=request.user.pk, **kwargs) for namespace in namespaces]
+            fingerprint = _fingerprint(request, names, window)
+            etag = f'"{fingerprint}"'
+
+            if request.headers.get('If-None-Match') and _not_modified(request, etag, None):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                response['ETag'] = etag
+                return response
+
+            key = f"response:{fingerprint}"
+            entry = cache.get(key)
+            if entry is None:
+                response = view_func(*args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                entry = (response.data, time.time())
+                cache.set(key, entry, timeout=timeout)
+            data, last_modified = entry
+
+            if _not_modified(request, etag, last_modified):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = Response(data)
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            response['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return wrapper
+
+    return decorator
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from pathlib import Path
 import os
 import pymysql
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 # 加载环境变量
@@ -195,10 +196,16 @@ CHANNEL_LAYERS = {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
         "CONFIG": {
             "hosts": [(os.getenv('REDIS_HOST', '127.0.0.1'), int(os.getenv('REDIS_PORT', 6379)))],
+            # 每个连接的消息队列上限与过期时间，慢连接的积压消息直接丢弃
+            "capacity": 100,
+            "expiry": 10,
         },
     },
 }
 
+# 同一设备实时数据的最小推送间隔（秒），0 表示不限流
+REALTIME_PUBLISH_INTERVAL = float(os.getenv('REALTIME_PUBLISH_INTERVAL', 0.5))
+
 
 # Celery 配置
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://127.0.0.1:6379/0')
@@ -208,6 +215,45 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# 定时任务
+CELERY_BEAT_SCHEDULE = {
+    'rollup-hourly-summaries': {
+        'task': 'monitoring.tasks.rollup_hourly_summaries',
+        'schedule': crontab(minute=2),
+    },
+    'rollup-daily-summaries': {
+        'task': 'monitoring.tasks.rollup_daily_summaries',
+        'schedule': crontab(minute=10, hour=0),
+    },
+    'rollup-weekly-summaries': {
+        'task': 'monitoring.tasks.rollup_weekly_summaries',
+        'schedule': crontab(minute=20, hour=0, day_of_week='mon'),
+    },
+    'rollup-monthly-summaries': {
+        'task': 'monitoring.tasks.rollup_monthly_summaries',
+        'schedule': crontab(minute=30, hour=0, day_of_month=1),
+    },
+    'cleanup-old-exports': {
+        'task': 'monitoring.tasks.cleanup_old_exports',
+        'schedule': crontab(minute=0, hour=3),
+    },
+    'reconcile-device-reading-counts': {
+        'task': 'monitoring.tasks.reconcile_device_reading_counts',
+        'schedule': crontab(minute=30, hour=3),
+    },
+    'rescore-robot-components': {
+        'task': 'robots.tasks.rescore_robot_components',
+        'schedule': crontab(minute='*/15'),
+    },
+    'prune-risk-event-counts': {
+        'task': 'robots.tasks.prune_risk_event_counts',
+        'schedule': crontab(minute=5),
+    },
+}
+
+# 异步导出文件保留天数
+DATA_EXPORT_RETENTION_DAYS = int(os.getenv('DATA_EXPORT_RETENTION_DAYS', 7))
+
 
 # 缓存配置
 CACHES = {
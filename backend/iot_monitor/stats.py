@@ -0,0 +1,40 @@
+"""
+严重程度 × 状态统计矩阵
+
+报警记录和风险事件的统计都由一次分组查询得到完整矩阵，总数、按严重程度、按状态的统计
+都从矩阵汇总，不再逐个严重程度 count()。
+"""
+from django.db.models import Count
+
+SEVERITIES = ['low', 'medium', 'high', 'critical']
+
+
+def grouped_counts(queryset, *fields):
+    """按 severity、status 及附加字段分组计数，返回字典行"""
+    return list(queryset.values('severity', 'status', *fields).annotate(count=Count('id')).order_by())
+
+
+def matrix_from_rows(rows, statuses, severities=SEVERITIES):
+    """由分组行汇总矩阵 {severity: {status: count}}，缺失的组合补 0，附加分组字段的行合并累加"""
+    matrix = {severity: dict.fromkeys(statuses, 0) for severity in severities}
+    for row in rows:
+        counts = matrix.setdefault(row['severity'], dict.fromkeys(statuses, 0))
+        counts[row['status']] = counts.get(row['status'], 0) + row['count']
+    return matrix
+
+
+def severity_status_matrix(queryset, statuses, severities=SEVERITIES):
+    """一次分组查询得到严重程度 × 状态矩阵"""
+    return matrix_from_rows(grouped_counts(queryset), statuses, severities)
+
+
+def by_severity(matrix):
+    return {severity: sum(counts.values()) for severity, counts in matrix.items()}
+
+
+def by_status(matrix):
+    totals = {}
+    for counts in matrix.values():
+        for status, count in counts.items():
+            totals[status] = totals.get(status, 0) + count
+    return totals
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SensorData, DataSummary, DataExport
+from .models import SensorData, LatestSensorData, DataSummary, DataExport
 
 
 @admin.register(SensorData)
@@ -11,6 +11,13 @@ class SensorDataAdmin(admin.ModelAdmin):
     date_hierarchy = 'timestamp'
 
 
+@admin.register(LatestSensorData)
+class LatestSensorDataAdmin(admin.ModelAdmin):
+    list_display = ['device', 'temperature', 'humidity', 'pm25', 'co2', 'timestamp']
+    search_fields = ['device__name', 'device__device_id']
+    readonly_fields = ['timestamp']
+
+
 @admin.register(DataSummary)
 class DataSummaryAdmin(admin.ModelAdmin):
     list_display = ['device', 'summary_type', 'start_time', 'end_time', 'temp_avg', 'humidity_avg', 'data_count']
@@ -21,7 +28,7 @@ class DataSummaryAdmin(admin.ModelAdmin):
 
 @admin.register(DataExport)
 class DataExportAdmin(admin.ModelAdmin):
-    list_display = ['user', 'device', 'export_type', 'start_time', 'end_time', 'status', 'row_count', 'created_at']
+    list_display = ['user', 'device', 'export_type', 'start_time', 'end_time', 'status', 'progress', 'row_count', 'created_at']
     list_filter = ['export_type', 'status', 'created_at']
     search_fields = ['user__username', 'device__name']
     readonly_fields = ['created_at', 'completed_at']
@@ -0,0 +1,181 @@
+"""
+设备数据统计
+
+按 StatisticsPlan 将时间范围拆分为天汇总、小时汇总和原始数据三类来源：已结束并完成汇总的天/小时直接读取
+DataSummary，只有未汇总的边缘部分（起始处不完整的小时、水位线之后含当前小时的数据）才扫描原始数据。
+"""
+from datetime import timedelta
+
+from django.db.models import Q
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import DataSummary, SensorData
+from .rollups import SUMMARY_METRICS, SUMMARY_VALUE_FIELDS, get_watermark, raw_aggregates, truncate
+
+# 接口返回的统计字段：(返回字段, 汇总字段)
+SUMMARY_OUTPUT = [
+    ('avg_temp', 'temp_avg'),
+    ('max_temp', 'temp_max'),
+    ('min_temp', 'temp_min'),
+    ('avg_humidity', 'humidity_avg'),
+    ('max_humidity', 'humidity_max'),
+    ('min_humidity', 'humidity_min'),
+    ('avg_pm25', 'pm25_avg'),
+    ('max_pm25', 'pm25_max'),
+    ('avg_co2', 'co2_avg'),
+    ('max_co2', 'co2_max'),
+]
+
+# 按小时统计返回的字段：(返回字段, 汇总字段)
+HOURLY_OUTPUT = [
+    ('avg_temp', 'temp_avg'),
+    ('avg_humidity', 'humidity_avg'),
+    ('avg_pm25', 'pm25_avg'),
+]
+
+
+class StatsAccumulator:
+    """合并多段统计结果，平均值按各字段非空值数量（{prefix}_count）加权"""
+
+    def __init__(self):
+        self.data_count = 0
+        self.weighted = {}
+        self.weights = {}
+        self.values = {}
+
+    def add(self, row):
+        """合并一段统计，row 使用汇总字段命名（temp_avg/temp_count/temp_max/...）"""
+        self.data_count += row.get('data_count') or 0
+        for prefix, _, has_min in SUMMARY_METRICS:
+            avg = row.get(f'{prefix}_avg')
+            weight = row.get(f'{prefix}_count') or 0
+            if avg is not None and weight:
+                self.weighted[prefix] = self.weighted.get(prefix, 0) + avg * weight
+                self.weights[prefix] = self.weights.get(prefix, 0) + weight
+            self._merge(f'{prefix}_max', row.get(f'{prefix}_max'), max)
+            if has_min:
+                self._merge(f'{prefix}_min', row.get(f'{prefix}_min'), min)
+
+    def _merge(self, key, value, pick):
+        if value is None:
+            return
+        current = self.values.get(key)
+        self.values[key] = value if current is None else pick(current, value)
+
+    def result(self):
+        values = dict(self.values)
+        for prefix, _, _ in SUMMARY_METRICS:
+            weight = self.weights.get(prefix)
+            values[f'{prefix}_avg'] = self.weighted[prefix] / weight if weight else None
+        values['data_count'] = self.data_count
+        return values
+
+
+def _format_summary(values):
+    summary = {name: values.get(field) for name, field in SUMMARY_OUTPUT}
+    summary['data_count'] = values['data_count']
+    return summary
+
+
+def _format_hour(hour, values):
+    item = {'hour': timezone.localtime(hour)}
+    item.update({name: values.get(field) for name, field in HOURLY_OUTPUT})
+    return item
+
+
+class StatisticsPlan:
+    """
+    统计查询计划，将 [start_time, now] 拆分为互不重叠的数据来源：
+
+    - [start_time, hour_start)：起始处不完整的小时，读取原始数据
+    - [hour_start, hour_end)：已汇总的完整小时，读取小时汇总；
+      其中 [day_start, day_end) 内的完整天在总体统计中改用天汇总
+    - [hour_end, now]：尚未汇总的部分（含当前小时的实时桶），读取原始数据
+    """
+
+    def __init__(self, start_time, now, hour_watermark=None, day_watermark=None):
+        self.start_time = start_time
+        self.now = now
+
+        self.hour_start = truncate(start_time, 'hour')
+        if self.hour_start < start_time:
+            self.hour_start += timedelta(hours=1)
+        self.hour_end = max(self.hour_start, min(truncate(now, 'hour'), hour_watermark or self.hour_start))
+
+        self.day_start = truncate(self.hour_start, 'day')
+        if self.day_start < self.hour_start:
+            self.day_start += timedelta(days=1)
+        day_limit = min(self.hour_end, day_watermark or self.day_start)
+        self.day_end = max(self.day_start, truncate(day_limit, 'day'))
+
+    @classmethod
+    def build(cls, start_time, now):
+        return cls(start_time, now, get_watermark('hour'), get_watermark('day'))
+
+    @property
+    def has_hours(self):
+        return self.hour_end > self.hour_start
+
+    @property
+    def has_days(self):
+        return self.day_end > self.day_start
+
+    def in_days(self, start):
+        return self.day_start <= start < self.day_end
+
+
+def device_statistics(device, start_time, now=None, plan=None):
+    """
+    统计设备从 start_time 至今的数据，返回 {'summary': ..., 'hourly': [...]}
+
+    查询次数与时间范围和上报频率无关：小时汇总、天汇总、原始数据边缘各一次查询。
+    """
+    now = now or timezone.now()
+    plan = plan or StatisticsPlan.build(start_time, now)
+    fields = ['start_time', *SUMMARY_VALUE_FIELDS]
+
+    hourly_rows = []
+    if plan.has_hours:
+        hourly_rows = list(
+            DataSummary.objects.filter(
+                device=device,
+                summary_type='hour',
+                start_time__gte=plan.hour_start,
+                start_time__lt=plan.hour_end
+            ).values(*fields).order_by('start_time')
+        )
+
+    daily_rows = []
+    if plan.has_days:
+        daily_rows = list(
+            DataSummary.objects.filter(
+                device=device,
+                summary_type='day',
+                start_time__gte=plan.day_start,
+                start_time__lt=plan.day_end
+            ).values(*fields)
+        )
+
+    raw_hourly = SensorData.objects.filter(device=device, is_valid=True).filter(
+        Q(timestamp__gte=start_time, timestamp__lt=plan.hour_start) | Q(timestamp__gte=plan.hour_end)
+    ).annotate(hour=TruncHour('timestamp')).values('hour').annotate(**raw_aggregates()).order_by()
+
+    total = StatsAccumulator()
+    hours = {}
+
+    for row in daily_rows:
+        total.add(row)
+    for row in hourly_rows:
+        if not plan.in_days(row['start_time']):
+            total.add(row)
+        hours[row['start_time']] = StatsAccumulator()
+        hours[row['start_time']].add(row)
+    for row in raw_hourly:
+        total.add(row)
+        hours.setdefault(row['hour'], StatsAccumulator()).add(row)
+
+    return {
+        'summary': _format_summary(total.result()),
+        'hourly': [_format_hour(hour, hours[hour].result()) for hour in sorted(hours)],
+    }
@@ -1,7 +1,10 @@
+import asyncio
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from .models import SensorData
+from .realtime import device_group_name
+from .throttle import FrameThrottle, parse_throttle_options
 from devices.models import Device
 
 
@@ -10,7 +13,7 @@ class RealTimeDataConsumer(AsyncWebsocketConsumer):
 
     async def connect(self):
         self.device_id = self.scope['url_route']['kwargs']['device_id']
-        self.room_group_name = f'device_{self.device_id}'
+        self.room_group_name = device_group_name(self.device_id)
 
         # 验证设备权限
         device = await self.get_device()
@@ -18,6 +21,9 @@ class RealTimeDataConsumer(AsyncWebsocketConsumer):
             await self.close()
             return
 
+        # 订阅前按默认频率推送，subscribe 消息可调整
+        self.throttle = FrameThrottle(self.send_frame)
+
         # 加入房间组
         await self.channel_layer.group_add(
             self.room_group_name,
@@ -27,6 +33,9 @@ class RealTimeDataConsumer(AsyncWebsocketConsumer):
         await self.accept()
 
     async def disconnect(self, close_code):
+        if hasattr(self, 'throttle'):
+            self.throttle.close()
+
         # 离开房间组
         await self.channel_layer.group_discard(
             self.room_group_name,
@@ -39,18 +48,31 @@ class RealTimeDataConsumer(AsyncWebsocketConsumer):
         message_type = text_data_json.get('type')
 
         if message_type == 'subscribe':
+            max_frequency, mode = parse_throttle_options(text_data_json)
+            self.throttle.configure(max_frequency, mode)
+
             # 订阅确认
             await self.send(text_data=json.dumps({
                 'type': 'subscription_confirmed',
-                'device_id': self.device_id
+                'device_id': self.device_id,
+                'max_frequency': max_frequency,
+                'mode': mode
             }))
 
     async def sensor_data_update(self, event):
-        """发送传感器数据更新"""
-        await self.send(text_data=json.dumps({
+        """接收传感器数据更新，按订阅频率合并后发送"""
+        await self.throttle.push(self.device_id, event['data'], event.get('count', 1))
+
+    async def send_frame(self, device_id, bucket):
+        """发送一个推送间隔内合并的数据"""
+        message = {
             'type': 'sensor_update',
-            'data': event['data']
-        }))
+            'data': bucket.data,
+            'count': bucket.count
+        }
+        if self.throttle.mode == 'aggregate':
+            message['stats'] = bucket.summary()
+        await self.send(text_data=json.dumps(message))
 
     @database_sync_to_async
     def get_device(self):
@@ -59,3 +81,137 @@ class RealTimeDataConsumer(AsyncWebsocketConsumer):
             return Device.objects.get(id=self.device_id)
         except Device.DoesNotExist:
             return None
+
+
+class MultiplexRealTimeDataConsumer(AsyncWebsocketConsumer):
+    """
+    多设备实时数据推送消费者
+
+    一个连接通过 subscribe / unsubscribe 消息订阅多个设备，推送消息带 device_id。
+    """
+
+    # 单个连接最多订阅的设备数
+    max_subscriptions = 1000
+
+    async def connect(self):
+        self.user = self.scope.get('user')
+        if self.user is None or not self.user.is_authenticated:
+            await self.close()
+            return
+
+        self.device_ids = set()
+        self.throttle = FrameThrottle(self.send_frame)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if not hasattr(self, 'throttle'):
+            return
+        self.throttle.close()
+        await self._discard(self.device_ids)
+        self.device_ids = set()
+
+    async def receive(self, text_data):
+        """接收WebSocket消息"""
+        try:
+            message = json.loads(text_data)
+        except ValueError:
+            await self.send_error('消息格式错误')
+            return
+        if not isinstance(message, dict):
+            await self.send_error('消息必须是 JSON 对象')
+            return
+
+        message_type = message.get('type')
+        if message_type == 'subscribe':
+            await self.subscribe(message)
+        elif message_type == 'unsubscribe':
+            await self.unsubscribe(message)
+
+    async def subscribe(self, message):
+        requested = self.parse_device_ids(message.get('device_ids'))
+        if requested is None:
+            await self.send_error('device_ids 必须是设备ID列表')
+            return
+
+        new_ids = requested - self.device_ids
+        if len(self.device_ids) + len(new_ids) > self.max_subscriptions:
+            await self.send_error(f'单个连接最多订阅 {self.max_subscriptions} 个设备')
+            return
+
+        # 一次查询校验所有新订阅设备的归属
+        allowed = await self.get_owned_device_ids(new_ids) if new_ids else set()
+        await asyncio.gather(*[
+            self.channel_layer.group_add(device_group_name(device_id), self.channel_name)
+            for device_id in allowed
+        ])
+        self.device_ids |= allowed
+
+        if 'max_frequency' in message or 'mode' in message:
+            self.throttle.configure(*parse_throttle_options(message))
+
+        await self.send(text_data=json.dumps({
+            'type': 'subscription_confirmed',
+            'device_ids': sorted(requested & self.device_ids),
+            'rejected': sorted(new_ids - allowed),
+            'max_frequency': 1.0 / self.throttle.interval,
+            'mode': self.throttle.mode
+        }))
+
+    async def unsubscribe(self, message):
+        requested = self.parse_device_ids(message.get('device_ids'))
+        if requested is None:
+            await self.send_error('device_ids 必须是设备ID列表')
+            return
+
+        removed = requested & self.device_ids
+        await self._discard(removed)
+        self.device_ids -= removed
+
+        await self.send(text_data=json.dumps({
+            'type': 'unsubscribed',
+            'device_ids': sorted(removed)
+        }))
+
+    async def _discard(self, device_ids):
+        for device_id in device_ids:
+            self.throttle.discard(device_id)
+        await asyncio.gather(*[
+            self.channel_layer.group_discard(device_group_name(device_id), self.channel_name)
+            for device_id in device_ids
+        ])
+
+    async def sensor_data_update(self, event):
+        """接收传感器数据更新，按订阅频率合并后发送"""
+        device_id = event['data'].get('device')
+        if device_id in self.device_ids:
+            await self.throttle.push(device_id, event['data'], event.get('count', 1))
+
+    async def send_frame(self, device_id, bucket):
+        message = {
+            'type': 'sensor_update',
+            'device_id': device_id,
+            'data': bucket.data,
+            'count': bucket.count
+        }
+        if self.throttle.mode == 'aggregate':
+            message['stats'] = bucket.summary()
+        await self.send(text_data=json.dumps(message))
+
+    async def send_error(self, error):
+        await self.send(text_data=json.dumps({'type': 'error', 'error': error}))
+
+    @staticmethod
+    def parse_device_ids(value):
+        if not isinstance(value, list):
+            return None
+        try:
+            return {int(device_id) for device_id in value}
+        except (TypeError, ValueError):
+            return None
+
+    @database_sync_to_async
+    def get_owned_device_ids(self, device_ids):
+        """返回属于当前用户的设备ID"""
+        return set(Device.objects.filter(
+            owner=self.user, id__in=device_ids
+        ).values_list('id', flat=True))
@@ -0,0 +1,200 @@
+"""
+传感器数据导出
+
+按块从数据库读取（values_list + keyset 分块），逐块写出 CSV / NDJSON，XLSX 使用 openpyxl 只写模式，
+内存占用与导出行数无关。
+"""
+import csv
+import io
+import json
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from openpyxl import Workbook
+
+from .models import DataExport, SensorData
+
+# (字段, 表头)
+EXPORT_COLUMNS = [
+    ('timestamp', '时间'),
+    ('temperature', '温度'),
+    ('humidity', '湿度'),
+    ('light_intensity', '光照强度'),
+    ('pm25', 'PM2.5'),
+    ('co2', 'CO2'),
+]
+
+# 每次从数据库读取的行数
+CHUNK_SIZE = 2000
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 异步导出文件存放目录（相对 MEDIA_ROOT）
+EXPORT_DIR = 'exports'
+
+# 异步导出每写入多少行更新一次进度
+PROGRESS_INTERVAL = 10000
+
+CONTENT_TYPES = {
+    'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+FILE_EXTENSIONS = {
+    'excel': 'xlsx',
+    'csv': 'csv',
+    'ndjson': 'ndjson',
+}
+
+
+def iter_rows(queryset, chunk_size=CHUNK_SIZE):
+    """
+    按时间顺序分块读取导出字段，时间转换为本地时间
+
+    MySQL 驱动不支持服务端游标，iterator() 仍会把整个结果集读入内存，
+    因此按 (timestamp, id) 做 keyset 分块，每块一次查询。
+    """
+    fields = [field for field, _ in EXPORT_COLUMNS] + ['id']
+    queryset = queryset.order_by('timestamp', 'id')
+    last = None
+    while True:
+        chunk_qs = queryset
+        if last is not None:
+            chunk_qs = chunk_qs.filter(Q(timestamp__gt=last[0]) | Q(timestamp=last[0], id__gt=last[1]))
+        chunk = list(chunk_qs.values_list(*fields)[:chunk_size])
+        for row in chunk:
+            yield (timezone.localtime(row[0]).replace(tzinfo=None),) + tuple(row[1:-1])
+        if len(chunk) < chunk_size:
+            return
+        last = (chunk[-1][0], chunk[-1][-1])
+
+
+def iter_csv(rows, chunk_size=CHUNK_SIZE):
+    """逐块生成 CSV 文本"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([title for _, title in EXPORT_COLUMNS])
+    count = 0
+    for row in rows:
+        writer.writerow((row[0].strftime(TIME_FORMAT),) + row[1:])
+        count += 1
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson(rows, chunk_size=CHUNK_SIZE):
+    """逐块生成 NDJSON 文本（每行一个 JSON 对象）"""
+    keys = [field for field, _ in EXPORT_COLUMNS]
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(keys, (row[0].strftime(TIME_FORMAT),) + row[1:])), ensure_ascii=False))
+        if len(lines) >= chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def write_xlsx(rows, fileobj):
+    """以只写模式写出 XLSX，返回写入的行数"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('传感器数据')
+    sheet.append([title for _, title in EXPORT_COLUMNS])
+    count = 0
+    for row in rows:
+        sheet.append(row)
+        count += 1
+    workbook.save(fileobj)
+    return count
+
+
+def write_export(export_type, rows, fileobj):
+    """将数据写入二进制文件对象，返回写入的行数"""
+    if export_type == 'excel':
+        return write_xlsx(rows, fileobj)
+
+    count = 0
+
+    def counted(items):
+        nonlocal count
+        for item in items:
+            count += 1
+            yield item
+
+    chunks = iter_ndjson(counted(rows)) if export_type == 'ndjson' else iter_csv(counted(rows))
+    for chunk in chunks:
+        fileobj.write(chunk.encode('utf-8'))
+    return count
+
+
+def export_path(export):
+    """导出文件相对 MEDIA_ROOT 的路径"""
+    filename = f"{export.id}_{export.device.device_id}_{export.created_at.strftime('%Y%m%d%H%M%S')}"
+    return f"{EXPORT_DIR}/{export.user_id}/{filename}.{FILE_EXTENSIONS[export.export_type]}"
+
+
+def run_export_job(export):
+    """
+    执行异步导出任务
+
+    分块写入 MEDIA_ROOT 下的临时文件，写入过程中更新进度和行数，完成后原子重命名。
+    """
+    queryset = SensorData.objects.filter(
+        device=export.device,
+        timestamp__range=[export.start_time, export.end_time],
+        is_valid=True
+    )
+    total = queryset.count()
+    DataExport.objects.filter(pk=export.pk).update(status='processing', progress=0, row_count=0)
+
+    def tracked(rows):
+        count = 0
+        for row in rows:
+            yield row
+            count += 1
+            if count % PROGRESS_INTERVAL == 0:
+                DataExport.objects.filter(pk=export.pk).update(
+                    row_count=count,
+                    progress=min(99, count * 100 // max(total, 1))
+                )
+
+    relative_path = export_path(export)
+    full_path = Path(settings.MEDIA_ROOT) / relative_path
+    full_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = full_path.with_name(full_path.name + '.part')
+
+    try:
+        with open(temp_path, 'wb') as fileobj:
+            row_count = write_export(export.export_type, tracked(iter_rows(queryset)), fileobj)
+        os.replace(temp_path, full_path)
+    except Exception as exc:
+        temp_path.unlink(missing_ok=True)
+        DataExport.objects.filter(pk=export.pk).update(status='failed', error_message=str(exc))
+        raise
+
+    DataExport.objects.filter(pk=export.pk).update(
+        status='completed',
+        progress=100,
+        row_count=row_count,
+        file_path=relative_path,
+        file_size=full_path.stat().st_size,
+        completed_at=timezone.now()
+    )
+
+
+def cleanup_exports(retention_days):
+    """删除超过保留期的导出文件及记录，返回删除的记录数"""
+    threshold = timezone.now() - timedelta(days=retention_days)
+    expired = DataExport.objects.filter(created_at__lt=threshold)
+    for file_path in expired.exclude(file_path='').values_list('file_path', flat=True).iterator():
+        (Path(settings.MEDIA_ROOT) / file_path).unlink(missing_ok=True)
+    deleted, _ = expired.delete()
+    return deleted
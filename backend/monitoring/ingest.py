@@ -0,0 +1,155 @@
+"""
+传感器数据批量写入
+"""
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, OuterRef, PositiveBigIntegerField, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from devices.models import Device
+from iot_monitor.cache import DEVICE_ACTIVITY_NAMESPACE, READINGS_NAMESPACE, bump_versions
+from .models import LatestSensorData, SensorData
+from .realtime import publish_readings
+from .serializers import SensorDataBatchItemSerializer
+
+# 与 SensorDataCreateSerializer 保持一致的上报字段
+READING_FIELDS = ['temperature', 'humidity', 'light_intensity', 'pm25', 'co2']
+
+# 单次请求允许的最大数据条数
+MAX_BATCH_SIZE = 5000
+
+# bulk_create 每批写入的行数
+INSERT_BATCH_SIZE = 1000
+
+# 校准数据条数时每批处理的设备数
+RECONCILE_BATCH_SIZE = 500
+
+
+def validate_readings(items):
+    """
+    一次性校验批量数据
+
+    返回 (valid, errors)：valid 为 (设备, 数据字段) 列表，
+    errors 为 {'index': 序号, 'errors': 错误信息} 列表。
+    """
+    errors = []
+    parsed = []
+    for index, item in enumerate(items):
+        serializer = SensorDataBatchItemSerializer(data=item)
+        if serializer.is_valid():
+            parsed.append((index, serializer.validated_data))
+        else:
+            errors.append({'index': index, 'errors': serializer.errors})
+
+    # 所有涉及的设备只查询一次
+    devices = Device.objects.in_bulk({data['device'] for _, data in parsed})
+
+    valid = []
+    for index, data in parsed:
+        device = devices.get(data['device'])
+        if device is None:
+            errors.append({'index': index, 'errors': {'device': ['设备不存在']}})
+            continue
+        if device.status != 'online':
+            errors.append({'index': index, 'errors': {'non_field_errors': ['设备不在线，无法上报数据']}})
+            continue
+        valid.append((device, {field: data.get(field) for field in READING_FIELDS}))
+
+    errors.sort(key=lambda error: error['index'])
+    return valid, errors
+
+
+def ingest_readings(items):
+    """
+    批量写入传感器数据
+
+    校验、bulk_create 写入、按设备更新最后活跃时间，并对整批数据只做一次报警判断。
+    返回 (写入的 SensorData 列表, 逐条错误列表)。
+    """
+    valid, errors = validate_readings(items)
+    if not valid:
+        return [], errors
+
+    readings = [SensorData(device=device, **values) for device, values in valid]
+
+    with transaction.atomic():
+        SensorData.objects.bulk_create(readings, batch_size=INSERT_BATCH_SIZE)
+        record_readings(readings)
+
+    process_alerts(readings)
+    return readings, errors
+
+
+def update_latest(readings):
+    """将每台设备本批次的最后一条数据写入最新数据表（一条 upsert）"""
+    latest = {}
+    for reading in readings:
+        latest[reading.device_id] = reading
+
+    options = {
+        'update_conflicts': True,
+        'update_fields': READING_FIELDS + ['timestamp'],
+    }
+    # MySQL 按主键冲突更新，不支持（也不需要）指定 unique_fields
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = ['device']
+    LatestSensorData.objects.bulk_create([
+        LatestSensorData(
+            device_id=device_id,
+            timestamp=reading.timestamp,
+            **{field: getattr(reading, field) for field in READING_FIELDS}
+        )
+        for device_id, reading in latest.items()
+    ], **options)
+
+
+def record_readings(readings):
+    """
+    已写入的数据的后续处理：更新设备最后活跃时间、数据条数和最新数据表，并推送实时数据
+
+    单条上报和批量上报共用，调用方负责事务。
+    """
+    counts = Counter(reading.device_id for reading in readings)
+    Device.objects.filter(id__in=counts).update(
+        last_active=timezone.now(),
+        status='online',
+        reading_count=F('reading_count') + Case(
+            *[When(id=device_id, then=Value(count)) for device_id, count in counts.items()],
+            default=Value(0),
+            output_field=PositiveBigIntegerField()
+        ),
+    )
+    update_latest(readings)
+
+    # 事务提交后再推送和使缓存失效，避免客户端收到回滚的数据
+    transaction.on_commit(lambda: publish_readings(readings))
+    namespaces = {DEVICE_ACTIVITY_NAMESPACE.format(user=reading.device.owner_id) for reading in readings}
+    namespaces.update(READINGS_NAMESPACE.format(device_id=device_id) for device_id in counts)
+    transaction.on_commit(lambda: bump_versions(namespaces))
+
+
+def reconcile_reading_counts():
+    """
+    按 sensor_data 重新计算设备数据条数，修正删除数据或写入失败造成的偏差
+
+    每批设备一条 UPDATE ... SET reading_count = (SELECT COUNT ...)，计数与更新在同一语句内完成。
+    返回处理的设备数。
+    """
+    counts = SensorData.objects.filter(
+        device=OuterRef('pk')
+    ).order_by().values('device').annotate(total=Count('id')).values('total')
+
+    device_ids = list(Device.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(device_ids), RECONCILE_BATCH_SIZE):
+        Device.objects.filter(id__in=device_ids[start:start + RECONCILE_BATCH_SIZE]).update(
+            reading_count=Coalesce(Subquery(counts), Value(0))
+        )
+    return len(device_ids)
+
+
+def process_alerts(readings):
+    """整批数据在进程内一次性完成报警判断"""
+    from alerts.engine import rule_engine
+    rule_engine.process(readings)
@@ -0,0 +1,152 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import TruncHour
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from devices.models import Device
+from monitoring.aggregates import StatisticsPlan, device_statistics
+from monitoring.models import SensorData
+from monitoring.rollups import summarize_hours, summarize_windows, truncate
+
+
+BENCH_USERNAME = "benchmark"
+BENCH_DEVICE_ID = "BENCH-STATS-0001"
+RANGES = [("24h", timedelta(hours=24)), ("7d", timedelta(days=7)), ("30d", timedelta(days=30))]
+INSERT_BATCH_SIZE = 5000
+
+
+def legacy_statistics(device, start_time):
+    """原始实现：直接在 sensor_data 上聚合，用于对比"""
+    queryset = SensorData.objects.filter(device=device, timestamp__gte=start_time, is_valid=True)
+    summary = queryset.aggregate(
+        avg_temp=Avg("temperature"),
+        max_temp=Max("temperature"),
+        min_temp=Min("temperature"),
+        avg_humidity=Avg("humidity"),
+        max_humidity=Max("humidity"),
+        min_humidity=Min("humidity"),
+        avg_pm25=Avg("pm25"),
+        max_pm25=Max("pm25"),
+        avg_co2=Avg("co2"),
+        max_co2=Max("co2"),
+        data_count=Count("id"),
+    )
+    hourly = list(
+        queryset.annotate(hour=TruncHour("timestamp"))
+        .values("hour")
+        .annotate(avg_temp=Avg("temperature"), avg_humidity=Avg("humidity"), avg_pm25=Avg("pm25"))
+        .order_by("hour")
+    )
+    return {"summary": summary, "hourly": hourly}
+
+
+def measure(func, repeat):
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = len(ctx.captured_queries)
+    return statistics.median(timings), min(timings), queries
+
+
+class Command(BaseCommand):
+    help = "Benchmark DataStatisticsView latency (24h/7d/30d) on a seeded sensor_data table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Rows to seed for the benchmark device (default: 1000000).")
+        parser.add_argument("--days", type=int, default=30, help="Time span covered by the seeded rows (default: 30).")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (default: 5).")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark device and its data afterwards.")
+
+    def handle(self, *args, **options):
+        rows = int(options["rows"])
+        days = int(options["days"])
+        repeat = int(options["repeat"])
+
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        device, _ = Device.objects.get_or_create(
+            device_id=BENCH_DEVICE_ID,
+            defaults={
+                "name": "统计基准测试设备",
+                "device_type": "composite",
+                "location": "benchmark",
+                "status": "online",
+                "owner": user,
+            },
+        )
+
+        now = timezone.now()
+        if device.sensor_data.count() != rows:
+            self.stdout.write(f"Seeding {rows} rows over {days} days ...")
+            device.sensor_data.all().delete()
+            device.data_summaries.all().delete()
+            self._seed(device, rows, now - timedelta(days=days), now)
+
+        # 只为基准设备生成汇总，不移动全局水位线
+        hour_end = truncate(now, "hour")
+        day_end = truncate(hour_end, "day")
+        first = now - timedelta(days=days)
+        summarize_hours(truncate(first, "hour"), hour_end, devices=[device])
+        summarize_windows("day", truncate(first, "day"), day_end, devices=[device])
+
+        self.stdout.write(f"{'range':<6}{'legacy ms':>12}{'planned ms':>12}{'legacy q':>10}{'planned q':>11}")
+        for name, delta in RANGES:
+            start_time = now - delta
+            plan = StatisticsPlan(start_time, now, hour_watermark=hour_end, day_watermark=day_end)
+            legacy_ms, _, legacy_queries = measure(lambda: legacy_statistics(device, start_time), repeat)
+            planned_ms, _, planned_queries = measure(
+                lambda: device_statistics(device, start_time, now=now, plan=plan), repeat
+            )
+            self.stdout.write(f"{name:<6}{legacy_ms:>12.1f}{planned_ms:>12.1f}{legacy_queries:>10}{planned_queries:>11}")
+
+        if options["keep"]:
+            # 汇总只为本次测量生成，保留会抬高 get_watermark 回退时使用的 Max(end_time)
+            device.data_summaries.all().delete()
+        else:
+            device.delete()
+            user.delete()
+
+    def _seed(self, device, rows, start, end):
+        """
+        写入基准数据
+
+        timestamp 为 auto_now_add，写入时取当前时间；写入后再按 id 顺序用 bulk_update 改为历史时间。
+        """
+        batch = []
+        for i in range(rows):
+            batch.append(
+                SensorData(
+                    device=device,
+                    temperature=20 + (i % 100) / 10,
+                    humidity=40 + (i % 300) / 10,
+                    light_intensity=500 + i % 200,
+                    pm25=10 + i % 60,
+                    co2=400 + i % 400,
+                )
+            )
+            if len(batch) >= INSERT_BATCH_SIZE:
+                SensorData.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            SensorData.objects.bulk_create(batch)
+
+        step = (end - start) / rows
+        ids = list(device.sensor_data.order_by("id").values_list("id", flat=True))
+        for offset in range(0, len(ids), INSERT_BATCH_SIZE):
+            SensorData.objects.bulk_update(
+                [
+                    SensorData(id=pk, timestamp=start + step * index)
+                    for index, pk in enumerate(ids[offset:offset + INSERT_BATCH_SIZE], start=offset)
+                ],
+                ["timestamp"],
+            )
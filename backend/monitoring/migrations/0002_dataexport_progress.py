@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("monitoring", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataexport",
+            name="progress",
+            field=models.PositiveSmallIntegerField(default=0, verbose_name="进度(%)"),
+        ),
+        migrations.AlterField(
+            model_name="dataexport",
+            name="export_type",
+            field=models.CharField(
+                choices=[
+                    ("excel", "Excel"),
+                    ("csv", "CSV"),
+                    ("json", "JSON"),
+                    ("ndjson", "NDJSON"),
+                ],
+                max_length=10,
+                verbose_name="导出类型",
+            ),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+LATEST_FIELDS = ["temperature", "humidity", "light_intensity", "pm25", "co2", "timestamp"]
+
+
+def backfill_latest(apps, schema_editor):
+    Device = apps.get_model("devices", "Device")
+    SensorData = apps.get_model("monitoring", "SensorData")
+    LatestSensorData = apps.get_model("monitoring", "LatestSensorData")
+
+    latest = []
+    for device_id in Device.objects.values_list("id", flat=True).iterator():
+        row = (
+            SensorData.objects.filter(device_id=device_id)
+            .order_by("-timestamp", "-id")
+            .values(*LATEST_FIELDS)
+            .first()
+        )
+        if row:
+            latest.append(LatestSensorData(device_id=device_id, **row))
+    LatestSensorData.objects.bulk_create(latest, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("devices", "0001_initial"),
+        ("monitoring", "0002_dataexport_progress"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LatestSensorData",
+            fields=[
+                (
+                    "device",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="latest_reading",
+                        serialize=False,
+                        to="devices.device",
+                        verbose_name="设备",
+                    ),
+                ),
+                (
+                    "temperature",
+                    models.FloatField(blank=True, null=True, verbose_name="温度(℃)"),
+                ),
+                (
+                    "humidity",
+                    models.FloatField(blank=True, null=True, verbose_name="湿度(%)"),
+                ),
+                (
+                    "light_intensity",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="光照强度(lux)"
+                    ),
+                ),
+                (
+                    "pm25",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="PM2.5(μg/m³)"
+                    ),
+                ),
+                (
+                    "co2",
+                    models.FloatField(blank=True, null=True, verbose_name="CO2浓度(ppm)"),
+                ),
+                ("timestamp", models.DateTimeField(verbose_name="采集时间")),
+            ],
+            options={
+                "verbose_name": "设备最新数据",
+                "verbose_name_plural": "设备最新数据",
+                "db_table": "sensor_data_latest",
+            },
+        ),
+        migrations.RunPython(backfill_latest, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:20
+
+from django.db import migrations, models
+from django.db.models import F
+
+COUNT_FIELDS = [
+    ("temp_count", "temp_avg"),
+    ("humidity_count", "humidity_avg"),
+    ("pm25_count", "pm25_avg"),
+    ("co2_count", "co2_avg"),
+]
+
+
+def backfill_counts(apps, schema_editor):
+    """已有汇总没有记录各字段的数量，有平均值的字段按 data_count 计（与之前的加权方式一致）"""
+    DataSummary = apps.get_model("monitoring", "DataSummary")
+    for count_field, avg_field in COUNT_FIELDS:
+        DataSummary.objects.filter(**{f"{avg_field}__isnull": False}).update(**{count_field: F("data_count")})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("monitoring", "0003_latestsensordata"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="datasummary",
+            name="temp_count",
+            field=models.IntegerField(default=0, verbose_name="温度数据点数量"),
+        ),
+        migrations.AddField(
+            model_name="datasummary",
+            name="humidity_count",
+            field=models.IntegerField(default=0, verbose_name="湿度数据点数量"),
+        ),
+        migrations.AddField(
+            model_name="datasummary",
+            name="pm25_count",
+            field=models.IntegerField(default=0, verbose_name="PM2.5数据点数量"),
+        ),
+        migrations.AddField(
+            model_name="datasummary",
+            name="co2_count",
+            field=models.IntegerField(default=0, verbose_name="CO2数据点数量"),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
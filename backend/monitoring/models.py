@@ -44,6 +44,26 @@ class SensorData(models.Model):
         return f"{self.device.name} - {self.timestamp}"
 
 
+class LatestSensorData(models.Model):
+    """设备最新数据（由上报接口同步写入，避免按设备查询 sensor_data）"""
+    device = models.OneToOneField(Device, on_delete=models.CASCADE, primary_key=True,
+                                  related_name='latest_reading', verbose_name='设备')
+    temperature = models.FloatField(null=True, blank=True, verbose_name='温度(℃)')
+    humidity = models.FloatField(null=True, blank=True, verbose_name='湿度(%)')
+    light_intensity = models.FloatField(null=True, blank=True, verbose_name='光照强度(lux)')
+    pm25 = models.FloatField(null=True, blank=True, verbose_name='PM2.5(μg/m³)')
+    co2 = models.FloatField(null=True, blank=True, verbose_name='CO2浓度(ppm)')
+    timestamp = models.DateTimeField(verbose_name='采集时间')
+
+    class Meta:
+        db_table = 'sensor_data_latest'
+        verbose_name = '设备最新数据'
+        verbose_name_plural = '设备最新数据'
+
+    def __str__(self):
+        return f"{self.device.name} - {self.timestamp}"
+
+
 class DataSummary(models.Model):
     """数据汇总模型（按小时/天汇总）"""
     SUMMARY_TYPE_CHOICES = [
@@ -83,6 +103,12 @@ class DataSummary(models.Model):
     # 采集的数据点数量
     data_count = models.IntegerField(default=0, verbose_name='数据点数量')
 
+    # 各字段非空值的数量，合并汇总时作为平均值的权重（字段可能只在部分数据中上报）
+    temp_count = models.IntegerField(default=0, verbose_name='温度数据点数量')
+    humidity_count = models.IntegerField(default=0, verbose_name='湿度数据点数量')
+    pm25_count = models.IntegerField(default=0, verbose_name='PM2.5数据点数量')
+    co2_count = models.IntegerField(default=0, verbose_name='CO2数据点数量')
+
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
 
     class Meta:
@@ -112,6 +138,7 @@ class DataExport(models.Model):
         ('excel', 'Excel'),
         ('csv', 'CSV'),
         ('json', 'JSON'),
+        ('ndjson', 'NDJSON'),
     ]
 
     user = models.ForeignKey('auth.User', on_delete=models.CASCADE, verbose_name='用户')
@@ -123,6 +150,7 @@ class DataExport(models.Model):
     file_path = models.CharField(max_length=255, blank=True, verbose_name='文件路径')
     file_size = models.IntegerField(null=True, blank=True, verbose_name='文件大小(字节)')
     row_count = models.IntegerField(null=True, blank=True, verbose_name='数据行数')
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name='进度(%)')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     completed_at = models.DateTimeField(null=True, blank=True, verbose_name='完成时间')
     error_message = models.TextField(blank=True, verbose_name='错误信息')
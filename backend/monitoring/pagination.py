@@ -0,0 +1,120 @@
+"""
+传感器数据游标分页
+
+按 (timestamp, id) 倒序做 keyset 分页，利用 (device, -timestamp) 索引定位，
+翻页耗时与页码深度无关；游标为不透明的 base64 字符串。
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# 总数缓存时间（秒）
+COUNT_CACHE_TIMEOUT = 60
+
+
+def encode_cursor(item, reverse=False):
+    payload = {'t': item.timestamp.isoformat(), 'i': item.pk}
+    if reverse:
+        payload['r'] = 1
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """解析游标，返回 (timestamp, id, reverse)"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(payload['t']), int(payload['i']), bool(payload.get('r'))
+    except (TypeError, ValueError, KeyError):
+        raise NotFound('无效的游标')
+
+
+def cached_count(queryset, cache_key):
+    """带缓存的精确总数，只在客户端需要时计算"""
+    total = cache.get(cache_key)
+    if total is None:
+        total = queryset.count()
+        cache.set(cache_key, total, timeout=COUNT_CACHE_TIMEOUT)
+    return total
+
+
+class SensorDataCursorPagination(BasePagination):
+    """按 (timestamp, id) 倒序的游标分页"""
+    page_size = 50
+    max_page_size = 1000
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+
+    def get_page_size(self, request):
+        value = request.query_params.get(self.page_size_query_param) or request.query_params.get('limit')
+        try:
+            page_size = int(value)
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        reverse = False
+        if cursor:
+            timestamp, pk, reverse = decode_cursor(cursor)
+            if reverse:
+                queryset = queryset.filter(Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=pk))
+            else:
+                queryset = queryset.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk))
+
+        ordering = ('timestamp', 'id') if reverse else ('-timestamp', '-id')
+        items = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(items) > self.page_size
+        items = items[:self.page_size]
+
+        if reverse:
+            items.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+
+        self.next_cursor = encode_cursor(items[-1]) if items and has_next else None
+        self.previous_cursor = encode_cursor(items[0], reverse=True) if items and has_previous else None
+        return items
+
+    def get_next_link(self):
+        return self._link(self.next_cursor)
+
+    def get_previous_link(self):
+        return self._link(self.previous_cursor)
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'limit')
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,114 @@
+"""
+实时数据推送
+
+上报写入成功（事务提交）后，按设备将本批数据合并为一条消息发送到 device_{id} 组。
+同一设备组在 REALTIME_PUBLISH_INTERVAL 内只立即推送一次；窗口内的后续数据只保留最新一条并累计条数，
+窗口结束时由延迟任务补推一次，突发上报后设备静默时客户端也能收到最后的数据。
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+
+from .serializers import SensorDataSerializer
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_KEY = 'monitoring:realtime:throttle:{}'
+PENDING_KEY = 'monitoring:realtime:pending:{}'
+FLUSH_KEY = 'monitoring:realtime:flush:{}'
+
+# 待补推数据和补推锁的过期时间（窗口的倍数），补推任务丢失时不会永久阻塞
+PENDING_TIMEOUT_FACTOR = 10
+
+
+def device_group_name(device_id):
+    """设备实时数据的 channel 组名"""
+    return f'device_{device_id}'
+
+
+def coalesce_readings(readings):
+    """按设备合并数据，返回 {设备id: (最新数据, 条数)}"""
+    batches = {}
+    for reading in readings:
+        _, count = batches.get(reading.device_id, (None, 0))
+        batches[reading.device_id] = (reading, count + 1)
+    return batches
+
+
+def _send(channel_layer, device_id, data, count):
+    try:
+        async_to_sync(channel_layer.group_send)(device_group_name(device_id), {
+            'type': 'sensor_data_update',
+            'data': data,
+            'count': count,
+        })
+    except Exception:
+        # 推送失败不影响数据写入，客户端仍可通过接口轮询
+        logger.exception('实时数据推送失败: device=%s', device_id)
+        return False
+    return True
+
+
+def _take_pending(device_id):
+    """取出并清除待补推的 (数据, 条数)，没有时返回 (None, 0)"""
+    key = PENDING_KEY.format(device_id)
+    pending = cache.get(key)
+    if pending is None:
+        return None, 0
+    cache.delete(key)
+    return pending
+
+
+def _defer(device_id, data, count, interval):
+    """窗口内的数据覆盖待补推数据并累计条数，每个窗口只安排一次补推"""
+    timeout = interval * PENDING_TIMEOUT_FACTOR
+    key = PENDING_KEY.format(device_id)
+    _, pending_count = cache.get(key) or (None, 0)
+    cache.set(key, (data, pending_count + count), timeout=timeout)
+
+    flush_key = FLUSH_KEY.format(device_id)
+    if not cache.add(flush_key, 1, timeout=timeout):
+        return
+    from .tasks import flush_realtime_readings
+    try:
+        flush_realtime_readings.apply_async((device_id,), countdown=interval)
+    except Exception:
+        cache.delete(flush_key)
+        logger.exception('实时数据补推任务提交失败: device=%s', device_id)
+
+
+def publish_readings(readings):
+    """将数据推送到对应设备的 channel 组，返回立即推送的设备数"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return 0
+
+    interval = settings.REALTIME_PUBLISH_INTERVAL
+    published = 0
+    for device_id, (reading, count) in coalesce_readings(readings).items():
+        data = SensorDataSerializer(reading).data
+        # cache.add 只在键不存在时成功，用作每个设备组的限流窗口
+        if interval and not cache.add(THROTTLE_KEY.format(device_id), 1, timeout=interval):
+            _defer(device_id, data, count, interval)
+            continue
+        # 新窗口的首条推送带上尚未补推的条数，之后的补推不会再推送更旧的数据
+        _, pending_count = _take_pending(device_id)
+        if _send(channel_layer, device_id, data, count + pending_count):
+            published += 1
+    return published
+
+
+def flush_pending(device_id):
+    """补推窗口内积累的最新数据，并重新开始限流窗口；返回是否推送"""
+    cache.delete(FLUSH_KEY.format(device_id))
+    data, count = _take_pending(device_id)
+    channel_layer = get_channel_layer()
+    if data is None or channel_layer is None:
+        return False
+    interval = settings.REALTIME_PUBLISH_INTERVAL
+    if interval:
+        cache.set(THROTTLE_KEY.format(device_id), 1, timeout=interval)
+    return _send(channel_layer, device_id, data, count)
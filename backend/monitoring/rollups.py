@@ -0,0 +1,265 @@
+"""
+数据汇总（DataSummary）增量计算
+
+按水位线只计算已结束的时间窗口：原始数据 -> 小时，小时 -> 天，天 -> 周、月。
+结果按 (device, summary_type, start_time) 唯一约束 upsert，重复执行是幂等的。
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Avg, Count, F, Max, Min, Q, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import DataSummary, SensorData
+
+# (汇总字段前缀, SensorData 字段, 是否统计最小值)，与 DataSummary 的字段一一对应
+SUMMARY_METRICS = [
+    ('temp', 'temperature', True),
+    ('humidity', 'humidity', True),
+    ('pm25', 'pm25', False),
+    ('co2', 'co2', False),
+]
+
+SUMMARY_VALUE_FIELDS = [
+    f'{prefix}_{stat}'
+    for prefix, _, has_min in SUMMARY_METRICS
+    for stat in (('avg', 'max', 'min', 'count') if has_min else ('avg', 'max', 'count'))
+] + ['data_count']
+
+TRUNC_FUNCTIONS = {
+    'hour': TruncHour,
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+# 每种汇总的数据来源；周和月都由天汇总得到（周跨月，无法由周汇总出月）
+ROLLUP_SOURCES = {
+    'day': 'hour',
+    'week': 'day',
+    'month': 'day',
+}
+
+# 每次最多处理的窗口数，避免首次运行或长时间停机后单次任务过大
+MAX_WINDOWS = {
+    'hour': 24 * 7,
+    'day': 31,
+    'week': 8,
+    'month': 3,
+}
+
+# 窗口结束后延迟一段时间再汇总，等待边界附近仍在提交的数据
+CLOSE_DELAY = timedelta(minutes=1)
+
+WATERMARK_KEY = 'monitoring:rollup:watermark:{}'
+
+UPSERT_BATCH_SIZE = 1000
+
+
+def truncate(value, summary_type):
+    """将时间截断到所在窗口的开始（按当前时区）"""
+    local = timezone.localtime(value)
+    if summary_type == 'hour':
+        return local.replace(minute=0, second=0, microsecond=0)
+    local = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    if summary_type == 'week':
+        return local - timedelta(days=local.weekday())
+    if summary_type == 'month':
+        return local.replace(day=1)
+    return local
+
+
+def next_window(start, summary_type):
+    """窗口的结束时间（即下一个窗口的开始）"""
+    if summary_type == 'hour':
+        return start + timedelta(hours=1)
+    if summary_type == 'day':
+        return start + timedelta(days=1)
+    if summary_type == 'week':
+        return start + timedelta(days=7)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def get_watermark(summary_type):
+    """
+    已完成汇总的截止时间
+
+    优先读取缓存，缓存丢失时回退到已有汇总的最大结束时间。
+    """
+    watermark = cache.get(WATERMARK_KEY.format(summary_type))
+    if watermark is None:
+        watermark = DataSummary.objects.filter(
+            summary_type=summary_type
+        ).aggregate(end=Max('end_time'))['end']
+    return watermark
+
+
+def set_watermark(summary_type, value):
+    cache.set(WATERMARK_KEY.format(summary_type), value, timeout=None)
+
+
+def upsert_summaries(summaries):
+    """按唯一约束写入汇总，已存在的窗口直接覆盖"""
+    options = {
+        'update_conflicts': True,
+        'update_fields': ['end_time'] + SUMMARY_VALUE_FIELDS,
+        'batch_size': UPSERT_BATCH_SIZE,
+    }
+    # MySQL 按任意唯一索引冲突更新，不支持（也不需要）指定 unique_fields
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = ['device', 'summary_type', 'start_time']
+    DataSummary.objects.bulk_create(summaries, **options)
+
+
+def raw_aggregates():
+    """原始数据的聚合表达式，字段与 DataSummary 一致"""
+    aggregates = {'data_count': Count('id')}
+    for prefix, field, has_min in SUMMARY_METRICS:
+        aggregates[f'{prefix}_avg'] = Avg(field)
+        aggregates[f'{prefix}_count'] = Count(field)
+        aggregates[f'{prefix}_max'] = Max(field)
+        if has_min:
+            aggregates[f'{prefix}_min'] = Min(field)
+    return aggregates
+
+
+def _summary_aggregates():
+    """由低一级汇总合并：平均值按各字段非空值数量加权，与直接聚合原始数据的结果一致"""
+    aggregates = {'data_count': Sum('data_count')}
+    for prefix, _, has_min in SUMMARY_METRICS:
+        has_value = Q(**{f'{prefix}_avg__isnull': False})
+        aggregates[f'{prefix}_weighted'] = Sum(F(f'{prefix}_avg') * F(f'{prefix}_count'), filter=has_value)
+        aggregates[f'{prefix}_count'] = Sum(f'{prefix}_count', filter=has_value)
+        aggregates[f'{prefix}_max'] = Max(f'{prefix}_max')
+        if has_min:
+            aggregates[f'{prefix}_min'] = Min(f'{prefix}_min')
+    return aggregates
+
+
+def _closed_range(summary_type, upper):
+    """
+    计算本次需要汇总的窗口范围 [start, end)
+
+    upper 为数据来源的可用截止时间；没有需要处理的窗口时返回 None。
+    """
+    start = get_watermark(summary_type)
+    if start is None:
+        if summary_type == 'hour':
+            first = SensorData.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+        else:
+            first = DataSummary.objects.filter(
+                summary_type=ROLLUP_SOURCES[summary_type]
+            ).order_by('start_time').values_list('start_time', flat=True).first()
+        if first is None:
+            return None
+        start = first
+
+    start = truncate(start, summary_type)
+    end = truncate(upper, summary_type)
+    if end <= start:
+        return None
+
+    limit = start
+    for _ in range(MAX_WINDOWS[summary_type]):
+        limit = next_window(limit, summary_type)
+        if limit >= end:
+            break
+    return start, min(end, limit)
+
+
+def rollup_hours(now=None):
+    """将已结束的小时窗口从原始数据汇总为小时汇总，返回写入的汇总条数"""
+    now = now or timezone.now()
+    window = _closed_range('hour', now - CLOSE_DELAY)
+    if window is None:
+        return 0
+    start, end = window
+
+    count = summarize_hours(start, end)
+    set_watermark('hour', end)
+    return count
+
+
+def rollup_summaries(summary_type):
+    """将已完整覆盖的低一级汇总合并为 day/week/month 汇总，返回写入的汇总条数"""
+    source_watermark = get_watermark(ROLLUP_SOURCES[summary_type])
+    if source_watermark is None:
+        return 0
+
+    window = _closed_range(summary_type, source_watermark)
+    if window is None:
+        return 0
+    start, end = window
+
+    count = summarize_windows(summary_type, start, end)
+    set_watermark(summary_type, end)
+    return count
+
+
+def summarize_hours(start, end, devices=None):
+    """由原始数据计算 [start, end) 内的小时汇总（不移动水位线），返回写入的汇总条数"""
+    queryset = SensorData.objects.filter(
+        timestamp__gte=start,
+        timestamp__lt=end,
+        is_valid=True
+    )
+    if devices is not None:
+        queryset = queryset.filter(device__in=devices)
+
+    rows = queryset.annotate(
+        bucket=TruncHour('timestamp')
+    ).values('device_id', 'bucket').annotate(**raw_aggregates()).order_by()
+
+    summaries = [
+        DataSummary(
+            device_id=row['device_id'],
+            summary_type='hour',
+            start_time=row['bucket'],
+            end_time=next_window(row['bucket'], 'hour'),
+            **{field: row[field] for field in SUMMARY_VALUE_FIELDS}
+        )
+        for row in rows
+    ]
+    upsert_summaries(summaries)
+    return len(summaries)
+
+
+def summarize_windows(summary_type, start, end, devices=None):
+    """由低一级汇总计算 [start, end) 内的 day/week/month 汇总（不移动水位线），返回写入的汇总条数"""
+    queryset = DataSummary.objects.filter(
+        summary_type=ROLLUP_SOURCES[summary_type],
+        start_time__gte=start,
+        start_time__lt=end
+    )
+    if devices is not None:
+        queryset = queryset.filter(device__in=devices)
+
+    trunc = TRUNC_FUNCTIONS[summary_type]
+    rows = queryset.annotate(
+        bucket=trunc('start_time')
+    ).values('device_id', 'bucket').annotate(**_summary_aggregates()).order_by()
+
+    summaries = []
+    for row in rows:
+        values = {'data_count': row['data_count'] or 0}
+        for prefix, _, has_min in SUMMARY_METRICS:
+            weight = row[f'{prefix}_count'] or 0
+            values[f'{prefix}_avg'] = row[f'{prefix}_weighted'] / weight if weight else None
+            values[f'{prefix}_count'] = weight
+            values[f'{prefix}_max'] = row[f'{prefix}_max']
+            if has_min:
+                values[f'{prefix}_min'] = row[f'{prefix}_min']
+        summaries.append(DataSummary(
+            device_id=row['device_id'],
+            summary_type=summary_type,
+            start_time=row['bucket'],
+            end_time=next_window(truncate(row['bucket'], summary_type), summary_type),
+            **values
+        ))
+
+    upsert_summaries(summaries)
+    return len(summaries)
@@ -2,5 +2,6 @@ from django.urls import re_path
 from . import consumers
 
 websocket_urlpatterns = [
+    re_path(r'ws/realtime/$', consumers.MultiplexRealTimeDataConsumer.as_asgi()),
     re_path(r'ws/realtime/(?P<device_id>\d+)/$', consumers.RealTimeDataConsumer.as_asgi()),
 ]
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import SensorData, DataSummary
+from .models import SensorData, DataSummary, DataExport
 
 
 class SensorDataSerializer(serializers.ModelSerializer):
@@ -40,3 +40,43 @@ class DataQuerySerializer(serializers.Serializer):
     start_time = serializers.DateTimeField(required=True)
     end_time = serializers.DateTimeField(required=True)
     data_type = serializers.CharField(required=False, default='all')
+
+
+class SensorDataBatchItemSerializer(serializers.Serializer):
+    """批量上报中的单条数据（设备在批量校验时统一查询）"""
+    device = serializers.IntegerField()
+    temperature = serializers.FloatField(required=False, allow_null=True)
+    humidity = serializers.FloatField(required=False, allow_null=True)
+    light_intensity = serializers.FloatField(required=False, allow_null=True)
+    pm25 = serializers.FloatField(required=False, allow_null=True)
+    co2 = serializers.FloatField(required=False, allow_null=True)
+
+
+class DataExportSerializer(serializers.ModelSerializer):
+    """导出任务序列化器"""
+    device_name = serializers.CharField(source='device.name', read_only=True)
+
+    class Meta:
+        model = DataExport
+        fields = ['id', 'device', 'device_name', 'export_type', 'start_time', 'end_time', 'status',
+                  'progress', 'row_count', 'file_size', 'created_at', 'completed_at', 'error_message']
+        read_only_fields = fields
+
+
+class DataExportCreateSerializer(serializers.ModelSerializer):
+    """导出任务创建序列化器"""
+    export_type = serializers.ChoiceField(choices=['excel', 'csv', 'ndjson'], default='excel')
+
+    class Meta:
+        model = DataExport
+        fields = ['device', 'export_type', 'start_time', 'end_time']
+
+    def validate_device(self, value):
+        if value.owner_id != self.context['request'].user.id:
+            raise serializers.ValidationError("设备不存在")
+        return value
+
+    def validate(self, data):
+        if data['start_time'] >= data['end_time']:
+            raise serializers.ValidationError("开始时间必须早于结束时间")
+        return data
@@ -0,0 +1,64 @@
+from celery import shared_task
+from django.conf import settings
+
+from .exporters import cleanup_exports, run_export_job
+from .ingest import reconcile_reading_counts
+from .models import DataExport
+from .realtime import flush_pending
+from .rollups import rollup_hours, rollup_summaries
+
+
+@shared_task
+def rollup_hourly_summaries():
+    """汇总已结束的小时数据"""
+    return rollup_hours()
+
+
+@shared_task
+def rollup_daily_summaries():
+    """由小时汇总生成天汇总"""
+    return rollup_summaries('day')
+
+
+@shared_task
+def rollup_weekly_summaries():
+    """由天汇总生成周汇总"""
+    return rollup_summaries('week')
+
+
+@shared_task
+def rollup_monthly_summaries():
+    """由天汇总生成月汇总"""
+    return rollup_summaries('month')
+
+
+@shared_task
+def run_data_export(export_id):
+    """执行异步数据导出"""
+    try:
+        export = DataExport.objects.select_related('device').get(id=export_id)
+    except DataExport.DoesNotExist:
+        return
+
+    if export.status != 'pending':
+        return
+
+    run_export_job(export)
+
+
+@shared_task
+def cleanup_old_exports():
+    """清理超过保留期的导出文件"""
+    return cleanup_exports(settings.DATA_EXPORT_RETENTION_DAYS)
+
+
+@shared_task
+def reconcile_device_reading_counts():
+    """校准设备数据条数"""
+    return reconcile_reading_counts()
+
+
+@shared_task
+def flush_realtime_readings(device_id):
+    """补推限流窗口内积累的实时数据"""
+    return flush_pending(device_id)
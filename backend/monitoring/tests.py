@@ -1,3 +1,386 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import resource
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import TruncHour
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from devices.models import Device
+from .aggregates import SUMMARY_OUTPUT, StatisticsPlan, device_statistics
+from .consumers import MultiplexRealTimeDataConsumer
+from .exporters import iter_csv, iter_ndjson, iter_rows, write_export
+from .ingest import ingest_readings, reconcile_reading_counts
+from .models import DataSummary, LatestSensorData, SensorData
+from .realtime import FLUSH_KEY, PENDING_KEY, THROTTLE_KEY, device_group_name, flush_pending
+from .rollups import (
+    CLOSE_DELAY, get_watermark, rollup_hours, rollup_summaries, summarize_hours, summarize_windows
+)
+from .throttle import FrameThrottle, parse_throttle_options
+
+# 大范围导出的行数与内存上限
+LARGE_EXPORT_ROWS = 200_000
+PEAK_MEMORY_LIMIT = 16 * 1024 * 1024
+RSS_GROWTH_LIMIT_KB = 64 * 1024
+
+
+def synthetic_rows(count):
+    start = datetime(2026, 1, 1)
+    for i in range(count):
+        yield (start + timedelta(seconds=10 * i), 20 + i % 10, 50.0, 300.0, 35.0, 420.0)
+
+
+class NullWriter(io.RawIOBase):
+    """丢弃写入内容的文件对象，只统计字节数"""
+
+    def __init__(self):
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.size += len(data)
+        return len(data)
+
+
+class ExportMemoryTest(SimpleTestCase):
+    """导出内存占用不随行数增长"""
+
+    def assert_bounded(self, export):
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        tracemalloc.start()
+        try:
+            export()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+        self.assertLess(peak, PEAK_MEMORY_LIMIT)
+        self.assertLess(rss_growth, RSS_GROWTH_LIMIT_KB)
+
+    def test_csv_stream(self):
+        def export():
+            for _ in iter_csv(synthetic_rows(LARGE_EXPORT_ROWS)):
+                pass
+        self.assert_bounded(export)
+
+    def test_ndjson_stream(self):
+        def export():
+            for _ in iter_ndjson(synthetic_rows(LARGE_EXPORT_ROWS)):
+                pass
+        self.assert_bounded(export)
+
+    def test_xlsx_write_only(self):
+        def export():
+            # XLSX 需要可回溯的文件对象
+            with tempfile.TemporaryFile() as fileobj:
+                self.assertEqual(write_export('excel', synthetic_rows(LARGE_EXPORT_ROWS), fileobj), LARGE_EXPORT_ROWS)
+        self.assert_bounded(export)
+
+    def test_write_export_counts_rows(self):
+        output = NullWriter()
+        self.assertEqual(write_export('csv', synthetic_rows(1000), output), 1000)
+        self.assertGreater(output.size, 0)
+
+
+class ExportRowsTest(TestCase):
+    """按 (timestamp, id) 分块读取时不遗漏、不重复"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='exporter', password='pass')
+        self.device = Device.objects.create(
+            name='导出测试设备', device_id='EXPORT-0001', device_type='composite',
+            location='lab', status='online', owner=user
+        )
+        SensorData.objects.bulk_create([
+            SensorData(device=self.device, temperature=float(i)) for i in range(10)
+        ])
+
+    def test_chunked_rows_cover_range(self):
+        queryset = SensorData.objects.filter(device=self.device)
+        rows = list(iter_rows(queryset, chunk_size=3))
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(sorted(row[1] for row in rows), [float(i) for i in range(10)])
+
+
+class LatestReadingTest(TestCase):
+    """上报数据同步写入最新数据表，每台设备只保留一行"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='latest', password='pass')
+        self.devices = [
+            Device.objects.create(
+                name=f'最新数据设备{i}', device_id=f'LATEST-000{i}', device_type='composite',
+                location='lab', status='online', owner=user
+            )
+            for i in range(2)
+        ]
+
+    def test_batch_keeps_last_reading_per_device(self):
+        first, second = self.devices
+        ingest_readings([
+            {'device': first.id, 'temperature': 20.0},
+            {'device': second.id, 'temperature': 30.0},
+            {'device': first.id, 'temperature': 21.0},
+        ])
+        ingest_readings([{'device': second.id, 'temperature': 31.0, 'co2': 450.0}])
+
+        latest = {item.device_id: item for item in LatestSensorData.objects.all()}
+        self.assertEqual(len(latest), 2)
+        self.assertEqual(latest[first.id].temperature, 21.0)
+        self.assertEqual(latest[second.id].temperature, 31.0)
+        self.assertEqual(latest[second.id].co2, 450.0)
+
+
+class ReadingCountTest(TestCase):
+    """设备数据条数随上报累加，并可按 sensor_data 校准"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='counter', password='pass')
+        self.device = Device.objects.create(
+            name='计数设备', device_id='COUNT-0001', device_type='composite',
+            location='lab', status='online', owner=user
+        )
+
+    def test_ingest_increments_and_reconcile_corrects(self):
+        ingest_readings([{'device': self.device.id, 'temperature': float(i)} for i in range(5)])
+        self.device.refresh_from_db()
+        self.assertEqual(self.device.reading_count, 5)
+
+        SensorData.objects.filter(device=self.device, temperature__lt=2).delete()
+        reconcile_reading_counts()
+        self.device.refresh_from_db()
+        self.assertEqual(self.device.reading_count, 3)
+
+
+class FrameThrottleTest(SimpleTestCase):
+    """间隔内的数据合并为一帧，中间帧被丢弃"""
+
+    def test_coalesces_frames_within_interval(self):
+        sent = []
+
+        async def send(key, bucket):
+            sent.append((key, bucket.data, bucket.count, bucket.summary()))
+
+        async def run():
+            throttle = FrameThrottle(send, max_frequency=20, mode='aggregate')
+            for value in (20.0, 22.0, 21.0):
+                await throttle.push(1, {'temperature': value}, count=2)
+            await asyncio.sleep(0.1)
+            throttle.close()
+
+        asyncio.run(run())
+
+        self.assertEqual(len(sent), 2)
+        self.assertEqual(sent[0][1], {'temperature': 20.0})
+        _, data, count, stats = sent[1]
+        self.assertEqual(data, {'temperature': 21.0})
+        self.assertEqual(count, 4)
+        self.assertEqual(stats['temperature'], {'min': 21.0, 'max': 22.0, 'avg': 21.5})
+
+    def test_parse_throttle_options(self):
+        self.assertEqual(parse_throttle_options({'max_frequency': 1000, 'mode': 'aggregate'}), (20.0, 'aggregate'))
+        self.assertEqual(parse_throttle_options({'max_frequency': 'x', 'mode': 'bad'}), (2.0, 'latest'))
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    REALTIME_PUBLISH_INTERVAL=60,
+)
+class RealtimeTrailingPushTest(TestCase):
+    """突发上报后设备静默，窗口结束时补推最新数据和累计条数"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='realtime', password='pass')
+        self.device = Device.objects.create(
+            name='实时设备', device_id='REALTIME-0001', device_type='composite',
+            location='lab', status='online', owner=user
+        )
+        cache.delete_many([key.format(self.device.id) for key in (THROTTLE_KEY, PENDING_KEY, FLUSH_KEY)])
+        self.layer = get_channel_layer()
+        self.channel = async_to_sync(self.layer.new_channel)()
+        async_to_sync(self.layer.group_add)(device_group_name(self.device.id), self.channel)
+
+    def receive(self):
+        return async_to_sync(self.layer.receive)(self.channel)
+
+    def test_burst_then_silence(self):
+        with mock.patch('monitoring.tasks.flush_realtime_readings.apply_async') as schedule:
+            for value in (20.0, 21.0, 22.0):
+                with self.captureOnCommitCallbacks(execute=True):
+                    ingest_readings([{'device': self.device.id, 'temperature': value}])
+
+        first = self.receive()
+        self.assertEqual((first['data']['temperature'], first['count']), (20.0, 1))
+        # 窗口内只安排一次补推
+        schedule.assert_called_once_with((self.device.id,), countdown=60)
+
+        self.assertTrue(flush_pending(self.device.id))
+        trailing = self.receive()
+        self.assertEqual((trailing['data']['temperature'], trailing['count']), (22.0, 2))
+        self.assertFalse(flush_pending(self.device.id))
+
+
+class SummaryTestMixin:
+    def create_device(self, username):
+        cache.clear()
+        user = User.objects.create_user(username=username, password='pass')
+        return Device.objects.create(
+            name='汇总设备', device_id=f'{username.upper()}-0001', device_type='composite',
+            location='lab', status='online', owner=user
+        )
+
+    def add_readings(self, *readings):
+        """写入 (时间, 字段) 数据；timestamp 为 auto_now_add，写入后再改为指定时间"""
+        for timestamp, values in readings:
+            reading = SensorData.objects.create(device=self.device, **values)
+            SensorData.objects.filter(pk=reading.pk).update(timestamp=timestamp)
+
+
+class RollupTest(SummaryTestMixin, TestCase):
+    """汇总按水位线增量推进，重复执行是幂等的，合并后的平均值与原始数据一致"""
+
+    def setUp(self):
+        self.device = self.create_device('rollup')
+        self.start = timezone.make_aware(datetime(2026, 3, 2))
+
+    def test_watermark_advances_and_reruns_are_idempotent(self):
+        self.add_readings(*[
+            (self.start + timedelta(hours=hour, minutes=10), {'temperature': 20 + hour}) for hour in range(3)
+        ])
+        now = self.start + timedelta(hours=2, minutes=30)
+
+        # 第 3 个小时尚未结束
+        self.assertEqual(rollup_hours(now=now), 2)
+        self.assertEqual(get_watermark('hour'), self.start + timedelta(hours=2))
+        self.assertEqual(rollup_hours(now=now), 0)
+
+        summarize_hours(self.start, self.start + timedelta(hours=2))
+        hours = DataSummary.objects.filter(summary_type='hour').order_by('start_time')
+        self.assertEqual(list(hours.values_list('temp_avg', flat=True)), [20, 21])
+
+        # 天汇总等到小时水位线越过当天结束才生成
+        self.assertEqual(rollup_summaries('day'), 0)
+        rollup_hours(now=self.start + timedelta(days=1, minutes=5))
+        self.assertEqual(rollup_summaries('day'), 1)
+        self.assertEqual(rollup_summaries('day'), 0)
+        self.assertEqual(DataSummary.objects.get(summary_type='day').data_count, 3)
+
+    def test_late_reading_within_close_delay(self):
+        hour_end = self.start + timedelta(hours=1)
+        self.add_readings((self.start + timedelta(minutes=5), {'temperature': 20}))
+        self.assertEqual(rollup_hours(now=hour_end + timedelta(seconds=30)), 0)
+
+        # 窗口结束后 CLOSE_DELAY 内才提交的数据仍计入该小时
+        self.add_readings((hour_end - timedelta(seconds=5), {'temperature': 30}))
+        self.assertEqual(rollup_hours(now=hour_end + CLOSE_DELAY + timedelta(seconds=1)), 1)
+        summary = DataSummary.objects.get(summary_type='hour')
+        self.assertEqual((summary.data_count, summary.temp_count, summary.temp_avg), (2, 2, 25))
+
+    def test_day_average_weighted_by_field_count(self):
+        # 第一个小时每条数据都有温度，第二个小时只有一条有温度
+        second_hour = self.start + timedelta(hours=1)
+        self.add_readings(
+            *[(self.start + timedelta(minutes=minute), {'temperature': 10, 'humidity': 50}) for minute in range(4)],
+            *[
+                (second_hour + timedelta(minutes=minute), {'temperature': None if minute else 30, 'humidity': 50})
+                for minute in range(4)
+            ],
+        )
+        summarize_hours(self.start, self.start + timedelta(days=1))
+        summarize_windows('day', self.start, self.start + timedelta(days=1))
+
+        day = DataSummary.objects.get(summary_type='day')
+        self.assertAlmostEqual(day.temp_avg, SensorData.objects.aggregate(avg=Avg('temperature'))['avg'])
+        self.assertEqual((day.data_count, day.temp_count, day.humidity_count, day.pm25_count), (8, 5, 8, 0))
+        self.assertIsNone(day.pm25_avg)
+
+
+class StatisticsPlanTest(SummaryTestMixin, TestCase):
+    """汇总、实时桶和原始数据边缘拼接后的结果与直接聚合原始数据一致"""
+
+    def setUp(self):
+        self.device = self.create_device('planned')
+        base = timezone.make_aware(datetime(2026, 3, 2))
+        self.now = base + timedelta(days=2, hours=13, minutes=25)
+        readings = []
+        timestamp = base
+        index = 0
+        while timestamp <= self.now:
+            readings.append((timestamp, {
+                'temperature': 15 + index % 17,
+                'humidity': None if index % 3 == 0 else 40 + index % 11,
+                'pm25': 10 + index % 7 if index % 5 else None,
+                'co2': 400 + index % 50,
+            }))
+            timestamp += timedelta(minutes=20)
+            index += 1
+        self.add_readings(*readings)
+
+        # 小时汇总到第 3 天 11 点，天汇总到第 3 天 0 点；起始时间不在整点上
+        self.hour_watermark = base + timedelta(days=2, hours=11)
+        self.day_watermark = base + timedelta(days=2)
+        summarize_hours(base, self.hour_watermark)
+        summarize_windows('day', base, self.day_watermark)
+
+    def raw_statistics(self, start_time):
+        queryset = SensorData.objects.filter(device=self.device, timestamp__gte=start_time, is_valid=True)
+        summary = queryset.aggregate(
+            avg_temp=Avg('temperature'), max_temp=Max('temperature'), min_temp=Min('temperature'),
+            avg_humidity=Avg('humidity'), max_humidity=Max('humidity'), min_humidity=Min('humidity'),
+            avg_pm25=Avg('pm25'), max_pm25=Max('pm25'), avg_co2=Avg('co2'), max_co2=Max('co2'),
+            data_count=Count('id'),
+        )
+        hourly = list(
+            queryset.annotate(hour=TruncHour('timestamp')).values('hour')
+            .annotate(avg_temp=Avg('temperature'), avg_humidity=Avg('humidity'), avg_pm25=Avg('pm25'))
+            .order_by('hour')
+        )
+        return summary, hourly
+
+    def test_stitched_equals_raw(self):
+        start_time = self.now - timedelta(hours=48)
+        plan = StatisticsPlan(start_time, self.now, self.hour_watermark, self.day_watermark)
+        self.assertTrue(plan.has_days and plan.has_hours)
+        self.assertLess(start_time, plan.hour_start)
+        self.assertLess(plan.hour_end, self.now)
+
+        result = device_statistics(self.device, start_time, now=self.now, plan=plan)
+        summary, hourly = self.raw_statistics(start_time)
+
+        self.assertEqual(result['summary']['data_count'], summary['data_count'])
+        for name, _ in SUMMARY_OUTPUT:
+            self.assertAlmostEqual(result['summary'][name], summary[name], msg=name)
+
+        expected_hours = [timezone.localtime(row['hour']) for row in hourly]
+        self.assertEqual([item['hour'] for item in result['hourly']], expected_hours)
+        for item, row in zip(result['hourly'], hourly):
+            for name in ('avg_temp', 'avg_humidity', 'avg_pm25'):
+                if row[name] is None:
+                    self.assertIsNone(item[name])
+                else:
+                    self.assertAlmostEqual(item[name], row[name], msg=f"{item['hour']} {name}")
+
+
+class MultiplexMessageTest(SimpleTestCase):
+    """非对象的 JSON 消息返回错误而不是断开连接"""
+
+    def test_non_object_payload(self):
+        consumer = MultiplexRealTimeDataConsumer()
+        consumer.send = mock.AsyncMock()
+        for text in ('[]', '"x"', '1', 'not json'):
+            consumer.send.reset_mock()
+            async_to_sync(consumer.receive)(text)
+            self.assertEqual(json.loads(consumer.send.call_args.kwargs['text_data'])['type'], 'error')
@@ -0,0 +1,126 @@
+"""
+WebSocket 推送限频
+
+每个订阅者按自己的 max_frequency 推送：间隔内到达的数据只保留最新值（latest 模式）
+或累积为 min/max/avg 桶（aggregate 模式），间隔结束时发送一帧，中间帧直接丢弃。
+消费者只做内存合并，能及时读空 channel 层队列，不会因浏览器处理慢而积压。
+"""
+import asyncio
+import time
+
+from .ingest import READING_FIELDS
+
+# 未指定时的默认推送频率（次/秒）
+DEFAULT_MAX_FREQUENCY = 2.0
+
+# 允许的推送频率范围（次/秒）
+MIN_MAX_FREQUENCY = 0.1
+MAX_MAX_FREQUENCY = 20.0
+
+THROTTLE_MODES = ('latest', 'aggregate')
+
+
+def parse_throttle_options(message):
+    """从 subscribe 消息中解析 (max_frequency, mode)，非法值使用默认值"""
+    try:
+        frequency = float(message.get('max_frequency', DEFAULT_MAX_FREQUENCY))
+    except (TypeError, ValueError):
+        frequency = DEFAULT_MAX_FREQUENCY
+    if frequency != frequency or frequency <= 0:
+        frequency = DEFAULT_MAX_FREQUENCY
+    frequency = max(MIN_MAX_FREQUENCY, min(frequency, MAX_MAX_FREQUENCY))
+
+    mode = message.get('mode', 'latest')
+    if mode not in THROTTLE_MODES:
+        mode = 'latest'
+    return frequency, mode
+
+
+class FrameBucket:
+    """一个推送间隔内合并的数据"""
+
+    def __init__(self):
+        self.data = None
+        self.count = 0
+        self.frames = 0
+        self.stats = {}
+
+    def add(self, data, count=1):
+        self.data = data
+        self.count += count
+        self.frames += 1
+        for field in READING_FIELDS:
+            value = data.get(field)
+            if value is None:
+                continue
+            stat = self.stats.get(field)
+            if stat is None:
+                self.stats[field] = {'min': value, 'max': value, 'sum': value, 'n': 1}
+            else:
+                stat['min'] = min(stat['min'], value)
+                stat['max'] = max(stat['max'], value)
+                stat['sum'] += value
+                stat['n'] += 1
+
+    def summary(self):
+        """各字段在间隔内的 min/max/avg（按收到的帧计算）"""
+        return {
+            field: {'min': stat['min'], 'max': stat['max'], 'avg': stat['sum'] / stat['n']}
+            for field, stat in self.stats.items()
+        }
+
+
+class FrameThrottle:
+    """
+    按 key（设备）限频的推送缓冲
+
+    send 为 async 回调 send(key, bucket)，每个 key 每个间隔最多调用一次。
+    """
+
+    def __init__(self, send, max_frequency=DEFAULT_MAX_FREQUENCY, mode='latest'):
+        self.send = send
+        self.pending = {}
+        self.last_sent = {}
+        self.timers = {}
+        self.configure(max_frequency, mode)
+
+    def configure(self, max_frequency, mode):
+        self.interval = 1.0 / max_frequency
+        self.mode = mode
+
+    async def push(self, key, data, count=1):
+        self.pending.setdefault(key, FrameBucket()).add(data, count)
+        if key in self.timers:
+            return
+
+        wait = self.last_sent.get(key, 0) + self.interval - time.monotonic()
+        if wait <= 0:
+            await self.flush(key)
+        else:
+            self.timers[key] = asyncio.create_task(self._flush_later(key, wait))
+
+    async def _flush_later(self, key, wait):
+        await asyncio.sleep(wait)
+        self.timers.pop(key, None)
+        await self.flush(key)
+
+    async def flush(self, key):
+        bucket = self.pending.pop(key, None)
+        if bucket is None:
+            return
+        self.last_sent[key] = time.monotonic()
+        await self.send(key, bucket)
+
+    def discard(self, key):
+        """丢弃 key 的缓冲和定时器（取消订阅时调用）"""
+        timer = self.timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        self.pending.pop(key, None)
+        self.last_sent.pop(key, None)
+
+    def close(self):
+        for key in list(self.timers):
+            self.discard(key)
+        self.pending.clear()
+        self.last_sent.clear()
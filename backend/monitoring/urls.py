@@ -10,8 +10,12 @@ router.register(r'data', views.SensorDataViewSet, basename='sensordata')
 urlpatterns = [
     path('', include(router.urls)),
     path('upload/', views.DataUploadView.as_view(), name='data-upload'),
+    path('upload/batch/', views.DataBatchUploadView.as_view(), name='data-batch-upload'),
     path('query/', views.DataQueryView.as_view(), name='data-query'),
     path('export/', views.DataExportView.as_view(), name='data-export'),
+    path('exports/', views.DataExportJobView.as_view(), name='data-export-jobs'),
+    path('exports/<int:pk>/', views.DataExportJobDetailView.as_view(), name='data-export-job-detail'),
+    path('exports/<int:pk>/download/', views.DataExportDownloadView.as_view(), name='data-export-download'),
     path('realtime/<int:device_id>/', views.RealTimeDataView.as_view(), name='realtime-data'),
     path('statistics/<int:device_id>/', views.DataStatisticsView.as_view(), name='data-statistics'),
 ]
@@ -3,18 +3,25 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Avg, Max, Min, Count
-from django.db.models.functions import TruncHour, TruncDay
+from django.db import transaction
 from django.utils import timezone
 from datetime import datetime, timedelta
-from .models import SensorData, DataSummary
-from .serializers import SensorDataSerializer, SensorDataCreateSerializer, DataSummarySerializer, DataQuerySerializer
+from .models import SensorData, DataExport, LatestSensorData
+from .serializers import (
+    SensorDataSerializer, SensorDataCreateSerializer, DataQuerySerializer,
+    DataExportSerializer, DataExportCreateSerializer
+)
+from .ingest import ingest_readings, record_readings, process_alerts, MAX_BATCH_SIZE
+from .aggregates import device_statistics
+from .pagination import SensorDataCursorPagination, cached_count
+from .exporters import CONTENT_TYPES, FILE_EXTENSIONS, iter_csv, iter_ndjson, iter_rows, write_xlsx
 from devices.models import Device
+from iot_monitor.cache import DEFAULT_TIMEOUT, DEVICES_NAMESPACE, READINGS_NAMESPACE, cache_response
 
-import pandas as pd
-from openpyxl import Workbook
-from django.http import HttpResponse
-import json
+import tempfile
+from pathlib import Path
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
 
 
 class SensorDataViewSet(viewsets.ReadOnlyModelViewSet):
@@ -22,9 +29,10 @@ class SensorDataViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = SensorDataSerializer
     permission_classes = [IsAuthenticated]
 
+    pagination_class = SensorDataCursorPagination
+
     def get_queryset(self):
         device_id = self.request.query_params.get('device_id')
-        limit = self.request.query_params.get('limit', 100)
 
         queryset = SensorData.objects.filter(
             device__owner=self.request.user
@@ -33,30 +41,28 @@ class SensorDataViewSet(viewsets.ReadOnlyModelViewSet):
         if device_id:
             queryset = queryset.filter(device_id=device_id)
 
-        return queryset[:int(limit)]
+        return queryset
 
     @action(detail=False, methods=['get'])
     def latest(self, request):
         """获取所有设备的最新数据"""
-        devices = Device.objects.filter(owner=request.user)
-        result = []
-
-        for device in devices:
-            latest = device.sensor_data.first()
-            if latest:
-                result.append({
-                    'device_id': device.device_id,
-                    'device_name': device.name,
-                    'device_type': device.device_type,
-                    'location': device.location,
-                    'status': device.status,
-                    'temperature': latest.temperature,
-                    'humidity': latest.humidity,
-                    'light_intensity': latest.light_intensity,
-                    'pm25': latest.pm25,
-                    'co2': latest.co2,
-                    'timestamp': latest.timestamp,
-                })
+        latest_readings = LatestSensorData.objects.filter(
+            device__owner=request.user
+        ).select_related('device')
+
+        result = [{
+            'device_id': latest.device.device_id,
+            'device_name': latest.device.name,
+            'device_type': latest.device.device_type,
+            'location': latest.device.location,
+            'status': latest.device.status,
+            'temperature': latest.temperature,
+            'humidity': latest.humidity,
+            'light_intensity': latest.light_intensity,
+            'pm25': latest.pm25,
+            'co2': latest.co2,
+            'timestamp': latest.timestamp,
+        } for latest in latest_readings]
 
         return Response(result)
 
@@ -69,17 +75,13 @@ class DataUploadView(APIView):
         """接收设备上报的数据"""
         serializer = SensorDataCreateSerializer(data=request.data)
         if serializer.is_valid():
-            sensor_data = serializer.save()
+            with transaction.atomic():
+                sensor_data = serializer.save()
+                # 更新设备最后活跃时间和最新数据
+                record_readings([sensor_data])
 
             # 检查报警规则
-            from alerts.tasks import check_alert_rules
-            check_alert_rules.delay(sensor_data.id)
-
-            # 更新设备最后活跃时间
-            device = sensor_data.device
-            device.last_active = timezone.now()
-            device.status = 'online'
-            device.save()
+            process_alerts([sensor_data])
 
             return Response({
                 'message': '数据上报成功',
@@ -89,6 +91,39 @@ class DataUploadView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class DataBatchUploadView(APIView):
+    """批量数据上报视图"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        接收网关批量上报的数据
+
+        请求体为数据列表，或 {"readings": [...]}；单条数据校验失败不影响其余数据写入。
+        """
+        items = request.data.get('readings') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'readings 必须是非空列表'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_BATCH_SIZE:
+            return Response({'error': f'单次最多上报 {MAX_BATCH_SIZE} 条数据'}, status=status.HTTP_400_BAD_REQUEST)
+
+        readings, errors = ingest_readings(items)
+        if not readings:
+            return Response({
+                'message': '数据上报失败',
+                'accepted': 0,
+                'rejected': len(errors),
+                'errors': errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'message': '数据上报成功',
+            'accepted': len(readings),
+            'rejected': len(errors),
+            'errors': errors
+        }, status=status.HTTP_201_CREATED)
+
+
 class DataQueryView(APIView):
     """数据查询视图"""
     permission_classes = [IsAuthenticated]
@@ -112,24 +147,25 @@ class DataQueryView(APIView):
             device=device,
             timestamp__range=[start_time, end_time],
             is_valid=True
-        ).order_by('-timestamp')
+        ).select_related('device')
 
-        # 分页
-        page = self.request.query_params.get('page', 1)
-        page_size = self.request.query_params.get('page_size', 50)
+        # 游标分页：按 (timestamp, id) 定位，翻页耗时与页码深度无关
+        paginator = SensorDataCursorPagination()
+        data = paginator.paginate_queryset(queryset, request, view=self)
 
-        start = (int(page) - 1) * int(page_size)
-        end = start + int(page_size)
+        result = {
+            'page_size': paginator.page_size,
+            'next_cursor': paginator.next_cursor,
+            'previous_cursor': paginator.previous_cursor,
+            'data': SensorDataSerializer(data, many=True).data
+        }
 
-        data = queryset[start:end]
-        total = queryset.count()
+        # 精确总数按需计算并缓存
+        if request.query_params.get('include_total') in ('1', 'true'):
+            cache_key = f'monitoring:query-count:{device.id}:{start_time.isoformat()}:{end_time.isoformat()}'
+            result['total'] = cached_count(queryset, cache_key)
 
-        return Response({
-            'total': total,
-            'page': int(page),
-            'page_size': int(page_size),
-            'data': SensorDataSerializer(data, many=True).data
-        })
+        return Response(result)
 
 
 class DataExportView(APIView):
@@ -137,7 +173,7 @@ class DataExportView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        """导出数据为Excel"""
+        """导出数据（type: excel / csv / ndjson）"""
         device_id = request.query_params.get('device_id')
         start_time = request.query_params.get('start_time')
         end_time = request.query_params.get('end_time')
@@ -152,8 +188,11 @@ class DataExportView(APIView):
             return Response({'error': '设备不存在'}, status=status.HTTP_404_NOT_FOUND)
 
         # 解析时间
-        start_time = datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S')
-        end_time = datetime.strptime(end_time, '%Y-%m-%d %H:%M:%S')
+        try:
+            start_time = timezone.make_aware(datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S'))
+            end_time = timezone.make_aware(datetime.strptime(end_time, '%Y-%m-%d %H:%M:%S'))
+        except ValueError:
+            return Response({'error': '时间格式应为 YYYY-MM-DD HH:MM:SS'}, status=status.HTTP_400_BAD_REQUEST)
 
         queryset = SensorData.objects.filter(
             device=device,
@@ -161,47 +200,92 @@ class DataExportView(APIView):
             is_valid=True
         ).order_by('timestamp')
 
+        filename = f"{device.device_id}_{timezone.now().strftime('%Y%m%d')}"
         if export_type == 'excel':
-            return self._export_excel(queryset, device)
-        else:
-            return self._export_csv(queryset, device)
+            return self._export_excel(queryset, filename)
+        if export_type == 'ndjson':
+            return self._stream(iter_ndjson(iter_rows(queryset)), 'ndjson', filename)
+        return self._stream(iter_csv(iter_rows(queryset)), 'csv', filename)
+
+    def _export_excel(self, queryset, filename):
+        """导出为Excel：只写模式写入临时文件后分块发送"""
+        output = tempfile.TemporaryFile()
+        write_xlsx(iter_rows(queryset), output)
+        output.seek(0)
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f'{filename}.{FILE_EXTENSIONS["excel"]}',
+            content_type=CONTENT_TYPES['excel']
+        )
+
+    def _stream(self, chunks, export_type, filename):
+        """流式导出 CSV / NDJSON"""
+        response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[export_type])
+        response['Content-Disposition'] = f'attachment; filename="{filename}.{FILE_EXTENSIONS[export_type]}"'
+        return response
+
 
-    def _export_excel(self, queryset, device):
-        """导出为Excel"""
-        data = list(queryset.values(
-            'timestamp', 'temperature', 'humidity',
-            'light_intensity', 'pm25', 'co2'
-        ))
+class DataExportJobView(APIView):
+    """异步导出任务视图"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """获取当前用户的导出任务"""
+        exports = DataExport.objects.filter(user=request.user).select_related('device')[:50]
+        return Response(DataExportSerializer(exports, many=True).data)
+
+    def post(self, request):
+        """创建导出任务，文件由 Celery 任务在后台生成"""
+        serializer = DataExportCreateSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        df = pd.DataFrame(data)
-        output = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        output['Content-Disposition'] = f'attachment; filename="{device.device_id}_{timezone.now().strftime("%Y%m%d")}.xlsx"'
+        export = serializer.save(user=request.user)
 
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='传感器数据', index=False)
+        from .tasks import run_data_export
+        run_data_export.delay(export.id)
 
-        return output
+        return Response(DataExportSerializer(export).data, status=status.HTTP_202_ACCEPTED)
 
-    def _export_csv(self, queryset, device):
-        """导出为CSV"""
-        import csv
-        output = HttpResponse(content_type='text/csv')
-        output['Content-Disposition'] = f'attachment; filename="{device.device_id}_{timezone.now().strftime("%Y%m%d")}.csv"'
 
-        writer = csv.writer(output)
-        writer.writerow(['时间', '温度', '湿度', '光照强度', 'PM2.5', 'CO2'])
+class DataExportJobDetailView(APIView):
+    """导出任务状态视图"""
+    permission_classes = [IsAuthenticated]
 
-        for data in queryset:
-            writer.writerow([
-                data.timestamp,
-                data.temperature,
-                data.humidity,
-                data.light_intensity,
-                data.pm25,
-                data.co2
-            ])
+    def get(self, request, pk):
+        """查询导出任务状态与进度"""
+        try:
+            export = DataExport.objects.select_related('device').get(pk=pk, user=request.user)
+        except DataExport.DoesNotExist:
+            return Response({'error': '导出任务不存在'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(DataExportSerializer(export).data)
 
-        return output
+
+class DataExportDownloadView(APIView):
+    """导出文件下载视图"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        """下载已完成的导出文件"""
+        try:
+            export = DataExport.objects.get(pk=pk, user=request.user)
+        except DataExport.DoesNotExist:
+            return Response({'error': '导出任务不存在'}, status=status.HTTP_404_NOT_FOUND)
+
+        if export.status != 'completed':
+            return Response({'error': '导出尚未完成', 'status': export.status}, status=status.HTTP_409_CONFLICT)
+
+        full_path = Path(settings.MEDIA_ROOT) / export.file_path
+        if not full_path.exists():
+            return Response({'error': '导出文件已过期'}, status=status.HTTP_410_GONE)
+
+        return FileResponse(
+            open(full_path, 'rb'),
+            as_attachment=True,
+            filename=full_path.name,
+            content_type=CONTENT_TYPES[export.export_type]
+        )
 
 
 class RealTimeDataView(APIView):
@@ -211,10 +295,12 @@ class RealTimeDataView(APIView):
     def get(self, request, device_id):
         """获取指定设备的实时数据"""
         try:
-            device = Device.objects.get(id=device_id, owner=request.user)
+            device = Device.objects.select_related('latest_reading').get(id=device_id, owner=request.user)
         except Device.DoesNotExist:
             return Response({'error': '设备不存在'}, status=status.HTTP_404_NOT_FOUND)
 
+        latest = getattr(device, 'latest_reading', None)
+
         # 获取最近的数据点
         recent_data = device.sensor_data.all()[:100]
         serializer = SensorDataSerializer(recent_data, many=True)
@@ -228,6 +314,14 @@ class RealTimeDataView(APIView):
                 'location': device.location,
                 'status': device.status,
             },
+            'latest': {
+                'temperature': latest.temperature,
+                'humidity': latest.humidity,
+                'light_intensity': latest.light_intensity,
+                'pm25': latest.pm25,
+                'co2': latest.co2,
+                'timestamp': latest.timestamp,
+            } if latest else None,
             'data': serializer.data
         })
 
@@ -236,6 +330,7 @@ class DataStatisticsView(APIView):
     """数据统计视图"""
     permission_classes = [IsAuthenticated]
 
+    @cache_response(READINGS_NAMESPACE, DEVICES_NAMESPACE, window=DEFAULT_TIMEOUT)
     def get(self, request, device_id):
         """获取设备数据统计"""
         try:
@@ -256,37 +351,11 @@ class DataStatisticsView(APIView):
         else:
             start_time = now - timedelta(hours=24)
 
-        queryset = SensorData.objects.filter(
-            device=device,
-            timestamp__gte=start_time,
-            is_valid=True
-        )
-
-        stats = queryset.aggregate(
-            avg_temp=Avg('temperature'),
-            max_temp=Max('temperature'),
-            min_temp=Min('temperature'),
-            avg_humidity=Avg('humidity'),
-            max_humidity=Max('humidity'),
-            min_humidity=Min('humidity'),
-            avg_pm25=Avg('pm25'),
-            max_pm25=Max('pm25'),
-            avg_co2=Avg('co2'),
-            max_co2=Max('co2'),
-            data_count=Count('id')
-        )
-
-        # 按小时统计
-        hourly_stats = queryset.annotate(
-            hour=TruncHour('timestamp')
-        ).values('hour').annotate(
-            avg_temp=Avg('temperature'),
-            avg_humidity=Avg('humidity'),
-            avg_pm25=Avg('pm25'),
-        ).order_by('hour')
+        # 已结束的小时读取 DataSummary，未汇总部分读取原始数据
+        stats = device_statistics(device, start_time, now=now)
 
         return Response({
-            'summary': stats,
-            'hourly': list(hourly_stats),
+            'summary': stats['summary'],
+            'hourly': stats['hourly'],
             'time_range': time_range
         })
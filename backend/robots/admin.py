@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import RobotGroup, RobotComponent, RiskEvent
+from .models import RobotGroup, RobotComponent, RobotRiskHistory, RiskEvent
 
 
 @admin.register(RobotGroup)
@@ -9,8 +9,14 @@ class RobotGroupAdmin(admin.ModelAdmin):
     search_fields = ("key", "name")
 
 
+class RobotRiskHistoryInline(admin.TabularInline):
+    model = RobotRiskHistory
+    extra = 0
+
+
 @admin.register(RobotComponent)
 class RobotComponentAdmin(admin.ModelAdmin):
+    inlines = [RobotRiskHistoryInline]
     list_display = (
         "robot_id",
         "part_no",
@@ -22,11 +28,21 @@ class RobotComponentAdmin(admin.ModelAdmin):
         "status",
         "risk_level",
         "risk_score",
+        "history_count",
         "last_seen",
         "updated_at",
     )
     list_filter = ("group", "status", "level", "risk_level")
     search_fields = ("robot_id", "name", "part_no", "reference_no", "type_spec", "tech", "remark")
+    readonly_fields = ("history_count",)
+
+    def save_formset(self, request, form, formset, change):
+        super().save_formset(request, form, formset, change)
+        if formset.model is RobotRiskHistory:
+            # 内联增删历史记录后按子表重新计数
+            component = form.instance
+            component.history_count = component.history_entries.count()
+            component.save(update_fields=["history_count"])
 
 
 @admin.register(RiskEvent)
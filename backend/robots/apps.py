@@ -6,3 +6,5 @@ class RobotsConfig(AppConfig):
     name = "robots"
     verbose_name = "机器人平台"
 
+    def ready(self):
+        from . import signals  # noqa: F401
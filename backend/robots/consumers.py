@@ -0,0 +1,33 @@
+import json
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .realtime import DASHBOARD_GROUP, get_snapshot
+
+
+class DashboardConsumer(AsyncWebsocketConsumer):
+    """机器人看板推送：连接时发送全量快照，之后推送增量"""
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+
+        # 先加入组再取快照，避免丢失两者之间的增量
+        await self.channel_layer.group_add(DASHBOARD_GROUP, self.channel_name)
+        await self.accept()
+
+        snapshot = await database_sync_to_async(get_snapshot)()
+        await self.send_json({"type": "snapshot", "data": snapshot})
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(DASHBOARD_GROUP, self.channel_name)
+
+    async def dashboard_delta(self, event):
+        await self.send_json({"type": "delta", "data": event["delta"]})
+
+    async def send_json(self, content):
+        await self.send(text_data=json.dumps(content, cls=DjangoJSONEncoder, ensure_ascii=False))
@@ -0,0 +1,64 @@
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+
+from .event_counts import hourly_series
+from .models import RobotComponent
+from .serializers import RobotComponentSerializer
+from .stats import LEVELS, annotate_group_stats, axis_bad_counts, group_stats, high_risk_previews
+
+
+def build_dashboard_payload(now=None):
+    """
+    机器人看板数据
+
+    组统计、汇总和等级分布来自同一条分组条件聚合查询，查询次数与组数无关。
+    """
+    now = now or timezone.now()
+    high_risk_preview_limit = 12
+
+    groups = list(annotate_group_stats())
+    previews = high_risk_previews(high_risk_preview_limit)
+
+    group_payload = []
+    summary = {"total": 0, "highRisk": 0, "historyHighRisk": 0, "marked": 0}
+    level_dist = {}
+    for group in groups:
+        stats = group_stats(group)
+        for key in summary:
+            summary[key] += stats[key]
+        for level in LEVELS:
+            level_dist[level] = level_dist.get(level, 0) + stats[f"level{level}"]
+        group_payload.append(
+            {
+                "key": group.key,
+                "name": group.name,
+                "expected_total": group.expected_total,
+                "total": stats["total"],
+                "highRisk": stats["highRisk"],
+                "historyHighRisk": stats["historyHighRisk"],
+                "marked": stats["marked"],
+                "highRiskDevices": previews.get(group.id, []),
+                "highRiskDevicesPreviewLimit": high_risk_preview_limit,
+            }
+        )
+    level_dist = {level: count for level, count in level_dist.items() if count}
+
+    axis_bad = axis_bad_counts()
+
+    recent_components = list(RobotComponent.objects.select_related("group").order_by("-updated_at")[:20])
+    top_high_risk = list(RobotComponent.objects.select_related("group").filter(level="H").order_by("-updated_at")[:20])
+    # 两个列表的历史记录一次查询取出
+    prefetch_related_objects(recent_components + top_high_risk, "history_entries")
+    recent_payload = RobotComponentSerializer(recent_components, many=True).data
+    top_high_risk_payload = RobotComponentSerializer(top_high_risk, many=True).data
+
+    return {
+        "summary": summary,
+        "groupStats": group_payload,
+        "levelDistribution": level_dist,
+        "axisBad": axis_bad,
+        "events24h": hourly_series(now),
+        "recentUpdated": recent_payload,
+        "highRiskList": top_high_risk_payload,
+        "generatedAt": now.isoformat(),
+    }
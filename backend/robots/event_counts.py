@@ -0,0 +1,106 @@
+"""
+风险事件小时计数
+
+按 (小时, 组, 严重程度) 维护事件计数，事件写入时累加，看板和事件统计读取最近 24 个小时桶，
+不再对事件表做 TruncHour 聚合。小时桶按 UTC 整点划分，只保留最近 RING_HOURS 小时，
+跨小时时新的桶在首个事件写入时创建，不需要重算；删除事件时扣减对应的桶。
+"""
+from collections import Counter
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db.models import Case, F, Q, Sum, Value, When
+from django.utils import timezone
+
+from .models import RiskEventHourlyCount
+
+# 保留的小时桶数
+RING_HOURS = 48
+
+SERIES_HOURS = 24
+
+
+def floor_hour(value):
+    return value.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def ring_start(now=None):
+    return floor_hour(now or timezone.now()) - timedelta(hours=RING_HOURS - 1)
+
+
+def _bucket_counts(events, now=None):
+    """按 (小时, 组, 严重程度) 统计事件数，超出保留范围的事件不计"""
+    start = ring_start(now)
+    return Counter(
+        (floor_hour(event.triggered_at), event.group_id, event.severity)
+        for event in events
+        if event.triggered_at >= start
+    )
+
+
+def count_events(events, now=None):
+    """累加事件所在小时桶的计数"""
+    counts = _bucket_counts(events, now)
+    if not counts:
+        return
+
+    # 先补齐缺失的桶，再用一条 UPDATE 累加，并发写入时不丢计数
+    RiskEventHourlyCount.objects.bulk_create(
+        [RiskEventHourlyCount(hour=hour, group_id=group_id, severity=severity) for hour, group_id, severity in counts],
+        ignore_conflicts=True,
+    )
+    condition = Q()
+    whens = []
+    for (hour, group_id, severity), count in counts.items():
+        key = Q(hour=hour, group_id=group_id, severity=severity)
+        condition |= key
+        whens.append(When(key, then=Value(count)))
+    RiskEventHourlyCount.objects.filter(condition).update(count=F("count") + Case(*whens, default=Value(0)))
+
+
+def uncount_events(events, now=None):
+    """删除事件后扣减所在小时桶的计数，计数不足的桶不扣减（无符号列不能为负）"""
+    counts = _bucket_counts(events, now)
+    if not counts:
+        return
+    condition = Q()
+    whens = []
+    for (hour, group_id, severity), count in counts.items():
+        key = Q(hour=hour, group_id=group_id, severity=severity)
+        condition |= key & Q(count__gte=count)
+        whens.append(When(key, then=Value(count)))
+    RiskEventHourlyCount.objects.filter(condition).update(count=F("count") - Case(*whens, default=Value(0)))
+
+
+def series_start(now=None, hours=SERIES_HOURS):
+    """最近 hours 个小时桶中第一个桶的起点（含当前小时）"""
+    return floor_hour(now or timezone.now()) - timedelta(hours=hours - 1)
+
+
+def fill_series(counts, start, hours=SERIES_HOURS):
+    """{小时: 事件数} 转为按小时排列的序列，没有事件的小时为 0"""
+    series = []
+    for offset in range(hours):
+        hour = start + timedelta(hours=offset)
+        series.append({"time": timezone.localtime(hour).isoformat(), "count": counts.get(hour, 0)})
+    return series
+
+
+def hourly_series(now=None, hours=SERIES_HOURS, group_key=None, severity=None):
+    """最近 hours 个小时桶的事件数，可按组和严重程度过滤"""
+    start = series_start(now, hours)
+    queryset = RiskEventHourlyCount.objects.filter(hour__gte=start)
+    if group_key:
+        queryset = queryset.filter(group__key=group_key)
+    if severity:
+        queryset = queryset.filter(severity=severity)
+    counts = {
+        floor_hour(row["hour"]): row["count"]
+        for row in queryset.values("hour").annotate(count=Sum("count")).order_by()
+    }
+    return fill_series(counts, start, hours)
+
+
+def prune_event_counts(now=None):
+    """删除超出保留范围的小时桶，返回删除的行数"""
+    deleted, _ = RiskEventHourlyCount.objects.filter(hour__lt=ring_start(now)).delete()
+    return deleted
@@ -0,0 +1,96 @@
+"""
+风险事件自动生成
+
+评分后部件风险等级升至 high / critical 时生成 RiskEvent。同一部件同一原因在去重窗口内
+已有未解决事件时不再生成；整批候选事件只用一次查询检查已有事件，并分批 bulk_create。
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .event_counts import count_events
+from .models import RiskEvent
+from .realtime import publish_event_changes
+from .stats import invalidate_event_stats
+
+RISK_LEVEL_RANK = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+
+# 升至这些等级时生成事件
+EVENT_LEVELS = {"high", "critical"}
+
+# 同一 (部件, 原因) 的去重窗口
+DEDUPE_WINDOW = timedelta(minutes=30)
+
+OPEN_STATUSES = ["pending", "acknowledged"]
+
+INSERT_BATCH_SIZE = 1000
+
+
+def is_escalation(previous_level, risk_level):
+    """风险等级是否升至 high / critical"""
+    return risk_level in EVENT_LEVELS and RISK_LEVEL_RANK[risk_level] > RISK_LEVEL_RANK.get(previous_level, 0)
+
+
+def build_event(component_id, group_id, robot_id, robot_name, reason, severity, risk_score, triggered_at):
+    return RiskEvent(
+        component_id=component_id,
+        group_id=group_id,
+        robot_id=robot_id,
+        robot_name=robot_name,
+        message=f"风险事件：{reason}",
+        reason=reason,
+        severity=severity,
+        status="pending",
+        risk_score=risk_score,
+        triggered_at=triggered_at,
+    )
+
+
+def emit_risk_events(candidates, now=None):
+    """
+    去重后批量写入候选事件（未保存的 RiskEvent 列表），返回写入的事件
+
+    调用方负责事务；事件在事务提交后推送到看板。
+    """
+    candidates = list(candidates)
+    if not candidates:
+        return []
+    now = now or timezone.now()
+
+    # 一次查询取出窗口内所有相关部件的未解决事件，走 (component, reason, -triggered_at) 索引
+    seen = set(
+        RiskEvent.objects.filter(
+            component_id__in={event.component_id for event in candidates},
+            status__in=OPEN_STATUSES,
+            triggered_at__gte=now - DEDUPE_WINDOW,
+        ).values_list("component_id", "reason")
+    )
+
+    events = []
+    for event in candidates:
+        key = (event.component_id, event.reason)
+        if key in seen:
+            continue
+        seen.add(key)
+        events.append(event)
+
+    RiskEvent.objects.bulk_create(events, batch_size=INSERT_BATCH_SIZE)
+
+    # MySQL 的 bulk_create 不返回主键，按 (部件, 原因, 触发时间) 补查，推送的事件才有 id
+    if any(event.pk is None for event in events):
+        ids = {
+            (component_id, reason, triggered_at): event_id
+            for component_id, reason, triggered_at, event_id in RiskEvent.objects.filter(
+                component_id__in={event.component_id for event in events},
+                triggered_at__in={event.triggered_at for event in events},
+            ).order_by("id").values_list("component_id", "reason", "triggered_at", "id")
+        }
+        for event in events:
+            event.pk = ids.get((event.component_id, event.reason, event.triggered_at))
+
+    count_events(events, now=now)
+    if events:
+        transaction.on_commit(invalidate_event_stats)
+    publish_event_changes(events)
+    return events
@@ -0,0 +1,32 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+from .models import RobotComponent, RobotRiskHistory
+
+INSERT_BATCH_SIZE = 2000
+
+
+@transaction.atomic
+def append_risk_history(entries):
+    """
+    批量追加历史风险记录并累加部件的 history_count
+
+    entries 为未保存的 RobotRiskHistory 列表（须设置 component_id）。
+    """
+    entries = list(entries)
+    if not entries:
+        return 0
+    RobotRiskHistory.objects.bulk_create(entries, batch_size=INSERT_BATCH_SIZE)
+
+    counts = Counter(entry.component_id for entry in entries)
+    RobotComponent.objects.filter(id__in=counts).update(
+        history_count=F("history_count")
+        + Case(
+            *[When(id=component_id, then=Value(count)) for component_id, count in counts.items()],
+            default=Value(0),
+            output_field=PositiveIntegerField(),
+        )
+    )
+    return len(entries)
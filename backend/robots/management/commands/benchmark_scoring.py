@@ -0,0 +1,112 @@
+import statistics
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from robots.models import RiskEvent, RobotComponent, RobotGroup
+from robots.scoring import READ_BATCH_SIZE, rescore_components, score_arrays
+
+
+BENCH_GROUP_KEY = "benchmark"
+STATUSES = np.array(["online", "offline", "maintenance"])
+INSERT_BATCH_SIZE = 5000
+
+
+def random_telemetry(count, seed=0):
+    """生成 count 个部件的遥测数组，分布与演示数据相近"""
+    rng = np.random.default_rng(seed)
+    return {
+        "status": STATUSES[rng.choice(3, size=count, p=[0.8, 0.15, 0.05])],
+        "battery": rng.integers(5, 101, size=count),
+        "health": rng.integers(40, 101, size=count),
+        "motor_temp": rng.integers(40, 100, size=count),
+        "network_latency": rng.integers(10, 400, size=count),
+    }
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), min(timings)
+
+
+class Command(BaseCommand):
+    help = "Benchmark vectorized risk scoring and rescore_components on a seeded component table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--components", type=int, default=100_000, help="Components to score (default: 100000).")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (default: 5).")
+        parser.add_argument(
+            "--changed",
+            type=float,
+            default=0.1,
+            help="Fraction of components whose telemetry changes before each rescore (default: 0.1).",
+        )
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark group and its components afterwards.")
+
+    def handle(self, *args, **options):
+        count = int(options["components"])
+        repeat = int(options["repeat"])
+        changed = float(options["changed"])
+
+        telemetry = random_telemetry(count)
+        fail_mask = np.zeros(count, dtype=np.int64)
+        arrays_ms, _ = measure(lambda: score_arrays(fail_mask=fail_mask, **telemetry), repeat)
+        self.stdout.write(f"score_arrays        {count:>8} components {arrays_ms:>10.1f} ms")
+
+        group, _ = RobotGroup.objects.get_or_create(key=BENCH_GROUP_KEY, defaults={"name": "评分基准测试"})
+        queryset = RobotComponent.objects.filter(group=group)
+        if queryset.count() != count:
+            self.stdout.write(f"Seeding {count} components ...")
+            queryset.delete()
+            self._seed(group, telemetry)
+        # 首次评分写回全部结果，之后测量只有部分部件变化时的重算
+        rescore_components(queryset)
+
+        unchanged_ms, _ = measure(lambda: rescore_components(queryset, batch_size=READ_BATCH_SIZE), repeat)
+        self.stdout.write(f"rescore (no change) {count:>8} components {unchanged_ms:>10.1f} ms")
+
+        timings = []
+        updated = 0
+        step = max(int(1 / changed), 1) if changed > 0 else 0
+        for run in range(repeat):
+            if step:
+                ids = list(queryset.order_by("id").values_list("id", flat=True)[run % step::step])
+                queryset.filter(id__in=ids).update(health=40 + run)
+            started = time.perf_counter()
+            updated = rescore_components(queryset, batch_size=READ_BATCH_SIZE)
+            timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f"rescore ({updated} changed) {count:>8} components {statistics.median(timings):>10.1f} ms"
+        )
+
+        if not options["keep"]:
+            # 组与部件之间是 PROTECT 外键，先删除重算时生成的风险事件和部件
+            RiskEvent.objects.filter(group=group).delete()
+            queryset.delete()
+            group.delete()
+
+    def _seed(self, group, telemetry):
+        count = len(telemetry["status"])
+        batch = []
+        for index in range(count):
+            batch.append(
+                RobotComponent(
+                    group=group,
+                    robot_id=f"{BENCH_GROUP_KEY}-{index:06d}",
+                    part_no=f"BENCH-{index}",
+                    reference_no="BENCH",
+                    type_spec="benchmark",
+                    tech="benchmark",
+                    **{field: values[index].item() for field, values in telemetry.items()},
+                )
+            )
+            if len(batch) >= INSERT_BATCH_SIZE:
+                RobotComponent.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            RobotComponent.objects.bulk_create(batch)
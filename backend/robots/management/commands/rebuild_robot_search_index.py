@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from robots.search import reindex_all
+
+
+class Command(BaseCommand):
+    help = "Rebuild the trigram keyword search index for robot components."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Components re-indexed per transaction (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        total = reindex_all(batch_size=int(options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Re-indexed components={total}"))
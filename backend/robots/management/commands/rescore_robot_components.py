@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from robots.models import RobotComponent
+from robots.scoring import READ_BATCH_SIZE, rescore_components
+
+
+class Command(BaseCommand):
+    help = "Recompute risk score, risk level, level and A1-A7 checks for robot components."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--group", help="Only rescore components of this group key.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=READ_BATCH_SIZE,
+            help=f"Components scored per pass (default: {READ_BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        queryset = RobotComponent.objects.all()
+        if options["group"]:
+            queryset = queryset.filter(group__key=options["group"])
+
+        started = time.perf_counter()
+        updated = rescore_components(queryset, batch_size=int(options["batch_size"]))
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(self.style.SUCCESS(f"Rescored components, updated={updated} in {elapsed:.1f} ms"))
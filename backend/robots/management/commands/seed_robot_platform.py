@@ -5,7 +5,21 @@ from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.utils import timezone
 
-from robots.models import RiskEvent, RobotComponent, RobotGroup
+from robots.event_counts import count_events
+from robots.history import append_risk_history
+from robots.models import (
+    AXIS_KEYS,
+    AXIS_LABELS,
+    RiskEvent,
+    RobotComponent,
+    RobotGroup,
+    RobotRiskHistory,
+    compute_axis_fail_mask,
+)
+from robots.realtime import schedule_refresh
+from robots.scoring import derive_level, derive_risk_level
+from robots.search import reindex_all
+from robots.stats import invalidate_event_stats
 
 
 ROBOT_GROUPS = [
@@ -52,26 +66,8 @@ def pick(rand, items):
     return items[int(rand() * len(items))]
 
 
-CHECK_KEYS = ["A1", "A2", "A3", "A4", "A5", "A6", "A7"]
-CHECK_LABELS = {
-    "A1": "供电/线束",
-    "A2": "温度/散热",
-    "A3": "通信/网络",
-    "A4": "传感器/对位",
-    "A5": "抓手/执行器",
-    "A6": "控制/程序",
-    "A7": "安全/急停",
-}
-
-
-def derive_risk_level(score: int) -> str:
-    if score >= 90:
-        return "critical"
-    if score >= 80:
-        return "high"
-    if score >= 60:
-        return "medium"
-    return "low"
+CHECK_KEYS = AXIS_KEYS
+CHECK_LABELS = AXIS_LABELS
 
 
 def create_reference_no(rand) -> str:
@@ -156,7 +152,8 @@ def create_checks(rand, risk_score: int, motor_temp: int, network_latency: int,
     return checks
 
 
-def create_component(group: RobotGroup, index: int) -> RobotComponent:
+def create_component(group: RobotGroup, index: int):
+    """返回 (未保存的部件, 未保存的历史风险记录列表)"""
     seed = hash_string(f"{group.key}::{index}")
     rand = mulberry32(seed)
 
@@ -184,7 +181,7 @@ def create_component(group: RobotGroup, index: int) -> RobotComponent:
     )
     risk_score = clamp(int(round(score)), 0, 100)
     risk_level = derive_risk_level(risk_score)
-    level = "H" if risk_score >= 85 else "M" if risk_score >= 65 else "L"
+    level = derive_level(risk_score)
 
     history = []
     history_count = (1 + int(rand() * 3)) if rand() < 0.22 else 0
@@ -193,12 +190,12 @@ def create_component(group: RobotGroup, index: int) -> RobotComponent:
         event_time = timezone.now() - timedelta(hours=past_hours)
         event_score = clamp(int(round(risk_score - 10 + rand() * 25)), 40, 100)
         history.append(
-            {
-                "id": f"{seed}-{h}",
-                "time": event_time.isoformat(),
-                "score": event_score,
-                "level": derive_risk_level(event_score),
-            }
+            RobotRiskHistory(
+                entry_id=f"{seed}-{h}",
+                recorded_at=event_time,
+                score=event_score,
+                level=derive_risk_level(event_score),
+            )
         )
 
     reason = (
@@ -231,7 +228,7 @@ def create_component(group: RobotGroup, index: int) -> RobotComponent:
 
     checks = create_checks(rand, risk_score, motor_temp, network_latency, battery)
 
-    return RobotComponent(
+    component = RobotComponent(
         group=group,
         robot_id=build_robot_id(group.key, index),
         name=f"{model} #{pad_number(index + 1, 4)}",
@@ -242,6 +239,7 @@ def create_component(group: RobotGroup, index: int) -> RobotComponent:
         mark=0,
         remark=remark,
         checks=checks,
+        axis_fail_mask=compute_axis_fail_mask(checks),
         level=level,
         status=status,
         battery=battery,
@@ -251,8 +249,8 @@ def create_component(group: RobotGroup, index: int) -> RobotComponent:
         last_seen=last_seen,
         risk_score=risk_score,
         risk_level=risk_level,
-        risk_history=history,
     )
+    return component, history
 
 
 def seed_risk_events(groups, total_events: int = 240):
@@ -291,6 +289,21 @@ def seed_risk_events(groups, total_events: int = 240):
         )
 
     RiskEvent.objects.bulk_create(events, batch_size=2000)
+    count_events(events)
+    invalidate_event_stats()
+
+
+def seed_risk_history(histories):
+    """histories 为 {robot_id: [RobotRiskHistory]}；bulk_create 在 MySQL 上不返回主键，按 robot_id 回查"""
+    component_ids = dict(
+        RobotComponent.objects.filter(robot_id__in=list(histories)).values_list("robot_id", "id")
+    )
+    entries = []
+    for robot_id, history in histories.items():
+        for entry in history:
+            entry.component_id = component_ids[robot_id]
+            entries.append(entry)
+    append_risk_history(entries)
 
 
 class Command(BaseCommand):
@@ -332,13 +345,23 @@ class Command(BaseCommand):
             groups[spec["key"]] = group
 
         components = []
+        histories = {}
         for spec in ROBOT_GROUPS:
             group = groups[spec["key"]]
             for index in range(spec["total"]):
-                components.append(create_component(group, index))
+                component, history = create_component(group, index)
+                components.append(component)
+                if history:
+                    histories[component.robot_id] = history
 
         RobotComponent.objects.bulk_create(components, batch_size=2000)
+        seed_risk_history(histories)
+        # bulk_create 不触发信号（MySQL 也不返回主键），重新读取部件建立搜索索引
+        reindex_all()
         seed_risk_events(groups, total_events=event_count)
 
+        # 批量写入不触发信号，提交后统一重算看板
+        transaction.on_commit(schedule_refresh)
+
         self.stdout.write(self.style.SUCCESS(f"Seeded groups={len(ROBOT_GROUPS)}, components={len(components)}, events={event_count}"))
 
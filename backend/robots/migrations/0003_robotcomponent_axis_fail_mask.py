@@ -0,0 +1,59 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+AXIS_KEYS = ["A1", "A2", "A3", "A4", "A5", "A6", "A7"]
+BATCH_SIZE = 2000
+
+
+def compute_axis_fail_mask(checks):
+    mask = 0
+    if not isinstance(checks, dict):
+        return mask
+    for index, axis in enumerate(AXIS_KEYS):
+        item = checks.get(axis)
+        if isinstance(item, dict) and item.get("ok") is False:
+            mask |= 1 << index
+    return mask
+
+
+def backfill_axis_fail_mask(apps, schema_editor):
+    RobotComponent = apps.get_model("robots", "RobotComponent")
+
+    last_id = 0
+    while True:
+        batch = list(
+            RobotComponent.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "checks")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for component in batch:
+            component.axis_fail_mask = compute_axis_fail_mask(component.checks)
+        RobotComponent.objects.bulk_update(batch, ["axis_fail_mask"])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("robots", "0002_robotcomponent_number"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="robotcomponent",
+            name="axis_fail_mask",
+            field=models.PositiveSmallIntegerField(
+                default=0, verbose_name="检查失败轴位掩码"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="robotcomponent",
+            index=models.Index(
+                fields=["axis_fail_mask"], name="robot_compo_axis_fa_3a4bd3_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_axis_fail_mask, migrations.RunPython.noop),
+    ]
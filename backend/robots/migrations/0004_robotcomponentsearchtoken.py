@@ -0,0 +1,79 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SEARCH_FIELDS = ["robot_id", "name", "part_no", "reference_no", "type_spec", "tech"]
+BATCH_SIZE = 1000
+
+
+def trigrams(text):
+    text = (text or "").lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def backfill_search_tokens(apps, schema_editor):
+    RobotComponent = apps.get_model("robots", "RobotComponent")
+    RobotComponentSearchToken = apps.get_model("robots", "RobotComponentSearchToken")
+
+    last_id = 0
+    while True:
+        batch = list(
+            RobotComponent.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", *SEARCH_FIELDS)[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        tokens = []
+        for component in batch:
+            component_tokens = set()
+            for field in SEARCH_FIELDS:
+                component_tokens |= trigrams(getattr(component, field))
+            tokens.extend(
+                RobotComponentSearchToken(component_id=component.id, token=token)
+                for token in component_tokens
+            )
+        RobotComponentSearchToken.objects.bulk_create(tokens, batch_size=BATCH_SIZE)
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("robots", "0003_robotcomponent_axis_fail_mask"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RobotComponentSearchToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("token", models.CharField(max_length=3, verbose_name="三元组")),
+                (
+                    "component",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_tokens",
+                        to="robots.robotcomponent",
+                        verbose_name="部件",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "部件搜索索引",
+                "verbose_name_plural": "部件搜索索引",
+                "db_table": "robot_component_search_tokens",
+                "unique_together": {("token", "component")},
+            },
+        ),
+        migrations.RunPython(backfill_search_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,171 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:00
+
+from datetime import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+
+def parse_time(value):
+    try:
+        recorded_at = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if timezone.is_naive(recorded_at):
+        recorded_at = timezone.make_aware(recorded_at)
+    return recorded_at
+
+
+def copy_risk_history(apps, schema_editor):
+    RobotComponent = apps.get_model("robots", "RobotComponent")
+    RobotRiskHistory = apps.get_model("robots", "RobotRiskHistory")
+
+    last_id = 0
+    while True:
+        batch = list(
+            RobotComponent.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "risk_history", "updated_at")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        entries = []
+        changed = []
+        for component in batch:
+            history = component.risk_history if isinstance(component.risk_history, list) else []
+            count = 0
+            for index, item in enumerate(history):
+                if not isinstance(item, dict):
+                    continue
+                # 时间无法解析的记录不丢弃，改用部件的更新时间
+                recorded_at = parse_time(item.get("time")) or component.updated_at
+                entries.append(
+                    RobotRiskHistory(
+                        component_id=component.id,
+                        entry_id=str(item.get("id") or f"{component.id}-{index}")[:64],
+                        recorded_at=recorded_at,
+                        score=max(0, int(item.get("score") or 0)),
+                        level=item.get("level") or "low",
+                    )
+                )
+                count += 1
+            if count:
+                component.history_count = count
+                changed.append(component)
+        RobotRiskHistory.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+        RobotComponent.objects.bulk_update(changed, ["history_count"])
+        last_id = batch[-1].id
+
+
+def restore_risk_history(apps, schema_editor):
+    """回滚：把子表记录写回 risk_history JSON 列（新的在前，与子表默认排序一致）"""
+    RobotComponent = apps.get_model("robots", "RobotComponent")
+    RobotRiskHistory = apps.get_model("robots", "RobotRiskHistory")
+
+    last_id = 0
+    while True:
+        batch = list(
+            RobotComponent.objects.filter(id__gt=last_id, history_count__gt=0)
+            .order_by("id")
+            .only("id")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        histories = {}
+        for entry in RobotRiskHistory.objects.filter(component__in=batch).order_by("component_id", "-recorded_at", "-id"):
+            histories.setdefault(entry.component_id, []).append(
+                {
+                    "id": entry.entry_id,
+                    "time": entry.recorded_at.isoformat(),
+                    "score": entry.score,
+                    "level": entry.level,
+                }
+            )
+        for component in batch:
+            component.risk_history = histories.get(component.id, [])
+        RobotComponent.objects.bulk_update(batch, ["risk_history"])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("robots", "0004_robotcomponentsearchtoken"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="robotcomponent",
+            name="history_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="历史风险记录数"),
+        ),
+        migrations.AddIndex(
+            model_name="robotcomponent",
+            index=models.Index(
+                fields=["history_count"], name="robot_compo_history_3a1c45_idx"
+            ),
+        ),
+        migrations.CreateModel(
+            name="RobotRiskHistory",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("entry_id", models.CharField(max_length=64, verbose_name="记录ID")),
+                ("recorded_at", models.DateTimeField(verbose_name="记录时间")),
+                (
+                    "score",
+                    models.PositiveSmallIntegerField(default=0, verbose_name="风险分数"),
+                ),
+                (
+                    "level",
+                    models.CharField(
+                        choices=[
+                            ("critical", "严重"),
+                            ("high", "高"),
+                            ("medium", "中"),
+                            ("low", "低"),
+                        ],
+                        default="low",
+                        max_length=16,
+                        verbose_name="风险等级",
+                    ),
+                ),
+                (
+                    "component",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="history_entries",
+                        to="robots.robotcomponent",
+                        verbose_name="部件",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "历史风险记录",
+                "verbose_name_plural": "历史风险记录",
+                "db_table": "robot_risk_history",
+                "ordering": ["-recorded_at", "-id"],
+                "indexes": [
+                    models.Index(
+                        fields=["component", "-recorded_at"],
+                        name="robot_risk__compone_9312a9_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(copy_risk_history, restore_risk_history),
+        migrations.RemoveField(
+            model_name="robotcomponent",
+            name="risk_history",
+        ),
+    ]
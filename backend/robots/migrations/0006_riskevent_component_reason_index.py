@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("robots", "0005_robotriskhistory"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="riskevent",
+            index=models.Index(
+                fields=["component", "reason", "-triggered_at"],
+                name="risk_events_compone_86923e_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:10
+
+from datetime import timedelta, timezone as dt_timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+RING_HOURS = 48
+
+
+def backfill_counts(apps, schema_editor):
+    RiskEvent = apps.get_model("robots", "RiskEvent")
+    RiskEventHourlyCount = apps.get_model("robots", "RiskEventHourlyCount")
+    since = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=RING_HOURS - 1)
+    rows = (
+        RiskEvent.objects.filter(triggered_at__gte=since)
+        .annotate(hour=TruncHour("triggered_at", tzinfo=dt_timezone.utc))
+        .values("hour", "group_id", "severity")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    RiskEventHourlyCount.objects.bulk_create(
+        [
+            RiskEventHourlyCount(hour=row["hour"], group_id=row["group_id"], severity=row["severity"], count=row["count"])
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("robots", "0006_riskevent_component_reason_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RiskEventHourlyCount",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("hour", models.DateTimeField(verbose_name="小时")),
+                (
+                    "severity",
+                    models.CharField(
+                        choices=[("critical", "严重"), ("high", "高"), ("medium", "中"), ("low", "低")],
+                        max_length=16,
+                        verbose_name="严重程度",
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0, verbose_name="事件数")),
+                (
+                    "group",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="event_hour_counts",
+                        to="robots.robotgroup",
+                        verbose_name="组",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "风险事件小时计数",
+                "verbose_name_plural": "风险事件小时计数",
+                "db_table": "risk_event_hourly_counts",
+                "unique_together": {("hour", "group", "severity")},
+            },
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
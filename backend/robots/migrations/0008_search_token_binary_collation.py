@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:20
+
+from django.db import migrations
+
+# 只有 MySQL 需要：默认的 utf8mb4 排序规则忽略大小写和重音，其他数据库按字节比较
+TOKEN_COLUMN_SQL = "ALTER TABLE robot_component_search_tokens MODIFY token varchar(3) NOT NULL"
+
+
+def use_binary_collation(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(f"{TOKEN_COLUMN_SQL} COLLATE utf8mb4_bin")
+
+
+def use_default_collation(apps, schema_editor):
+    # 不指定排序规则时恢复为表的默认排序规则
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(TOKEN_COLUMN_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("robots", "0007_riskeventhourlycount"),
+    ]
+
+    operations = [
+        migrations.RunPython(use_binary_collation, use_default_collation),
+    ]
@@ -1,5 +1,44 @@
 from django.db import models
 
+AXIS_KEYS = ["A1", "A2", "A3", "A4", "A5", "A6", "A7"]
+AXIS_LABELS = {
+    "A1": "供电/线束",
+    "A2": "温度/散热",
+    "A3": "通信/网络",
+    "A4": "传感器/对位",
+    "A5": "抓手/执行器",
+    "A6": "控制/程序",
+    "A7": "安全/急停",
+}
+
+# 全部轴位掩码
+AXIS_MASK_ALL = (1 << len(AXIS_KEYS)) - 1
+
+
+def axis_bit(axis: str) -> int:
+    return 1 << AXIS_KEYS.index(axis)
+
+
+def compute_axis_fail_mask(checks) -> int:
+    """A1-A7 中 ok 为 False 的轴对应位置 1"""
+    mask = 0
+    if not isinstance(checks, dict):
+        return mask
+    for axis in AXIS_KEYS:
+        item = checks.get(axis)
+        if isinstance(item, dict) and item.get("ok") is False:
+            mask |= axis_bit(axis)
+    return mask
+
+
+def masks_matching(bits: int, any_set: bool) -> list:
+    """
+    所有 7 位掩码中与 bits 有交集（any_set=True）或无交集的取值
+
+    用于把轴过滤转换为对 axis_fail_mask 索引的 IN 查询。
+    """
+    return [mask for mask in range(AXIS_MASK_ALL + 1) if bool(mask & bits) == any_set]
+
 
 class RobotGroup(models.Model):
     key = models.CharField(max_length=32, unique=True, verbose_name="组Key")
@@ -52,6 +91,7 @@ class RobotComponent(models.Model):
     remark = models.TextField(blank=True, default="", verbose_name="备注")
 
     checks = models.JSONField(default=dict, verbose_name="A1-A7检查项")
+    axis_fail_mask = models.PositiveSmallIntegerField(default=0, verbose_name="检查失败轴位掩码")
     level = models.CharField(max_length=1, choices=LEVEL_CHOICES, default="L", verbose_name="等级")
 
     status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="online", verbose_name="状态")
@@ -63,7 +103,7 @@ class RobotComponent(models.Model):
 
     risk_score = models.PositiveSmallIntegerField(default=0, verbose_name="风险分数")
     risk_level = models.CharField(max_length=16, choices=RISK_LEVEL_CHOICES, default="low", verbose_name="风险等级")
-    risk_history = models.JSONField(default=list, verbose_name="历史风险记录")
+    history_count = models.PositiveIntegerField(default=0, verbose_name="历史风险记录数")
 
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
@@ -80,15 +120,52 @@ class RobotComponent(models.Model):
             models.Index(fields=["risk_level"]),
             models.Index(fields=["level"]),
             models.Index(fields=["status"]),
+            models.Index(fields=["axis_fail_mask"]),
+            models.Index(fields=["history_count"]),
         ]
 
     def __str__(self):
         return f"{self.part_no} ({self.robot_id})"
 
+    def save(self, *args, **kwargs):
+        self.axis_fail_mask = compute_axis_fail_mask(self.checks)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "checks" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "axis_fail_mask"}
+        super().save(*args, **kwargs)
+
     @property
     def is_high_risk(self) -> bool:
         return self.level == "H"
 
+    @property
+    def has_history(self) -> bool:
+        return self.history_count > 0
+
+
+class RobotRiskHistory(models.Model):
+    component = models.ForeignKey(
+        RobotComponent, on_delete=models.CASCADE, related_name="history_entries", verbose_name="部件"
+    )
+    entry_id = models.CharField(max_length=64, verbose_name="记录ID")
+    recorded_at = models.DateTimeField(verbose_name="记录时间")
+    score = models.PositiveSmallIntegerField(default=0, verbose_name="风险分数")
+    level = models.CharField(
+        max_length=16, choices=RobotComponent.RISK_LEVEL_CHOICES, default="low", verbose_name="风险等级"
+    )
+
+    class Meta:
+        db_table = "robot_risk_history"
+        verbose_name = "历史风险记录"
+        verbose_name_plural = "历史风险记录"
+        ordering = ["-recorded_at", "-id"]
+        indexes = [
+            models.Index(fields=["component", "-recorded_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.component_id} {self.recorded_at} {self.score}"
+
 
 class RiskEvent(models.Model):
     SEVERITY_CHOICES = [
@@ -138,7 +215,48 @@ class RiskEvent(models.Model):
             models.Index(fields=["severity"]),
             models.Index(fields=["status"]),
             models.Index(fields=["triggered_at"]),
+            models.Index(fields=["component", "reason", "-triggered_at"]),
         ]
 
     def __str__(self):
         return f"{self.robot_id} {self.message}"
+
+
+class RiskEventHourlyCount(models.Model):
+    """风险事件按 (小时, 组, 严重程度) 的计数，由 robots.event_counts 在事件写入时维护"""
+
+    hour = models.DateTimeField(verbose_name="小时")
+    group = models.ForeignKey(
+        RobotGroup, on_delete=models.CASCADE, related_name="event_hour_counts", verbose_name="组"
+    )
+    severity = models.CharField(max_length=16, choices=RiskEvent.SEVERITY_CHOICES, verbose_name="严重程度")
+    count = models.PositiveIntegerField(default=0, verbose_name="事件数")
+
+    class Meta:
+        db_table = "risk_event_hourly_counts"
+        verbose_name = "风险事件小时计数"
+        verbose_name_plural = "风险事件小时计数"
+        unique_together = [["hour", "group", "severity"]]
+
+    def __str__(self):
+        return f"{self.hour} {self.group_id} {self.severity} {self.count}"
+
+
+class RobotComponentSearchToken(models.Model):
+    """部件关键字搜索的三元组索引，由 robots.search 在部件写入时维护"""
+
+    component = models.ForeignKey(
+        RobotComponent, on_delete=models.CASCADE, related_name="search_tokens", verbose_name="部件"
+    )
+    # MySQL 上由迁移 0008 设为二进制排序规则：默认的 utf8mb4 排序规则忽略大小写和重音，
+    # Python 中不同的三元组会在唯一索引上冲突
+    token = models.CharField(max_length=3, verbose_name="三元组")
+
+    class Meta:
+        db_table = "robot_component_search_tokens"
+        verbose_name = "部件搜索索引"
+        verbose_name_plural = "部件搜索索引"
+        unique_together = ["token", "component"]
+
+    def __str__(self):
+        return f"{self.token} ({self.component_id})"
@@ -0,0 +1,109 @@
+"""
+机器人看板实时推送
+
+连接时发送一份全量快照（多个看板共享缓存中的同一份），之后只推送增量：
+- 部件 / 风险事件变更时立即推送变更的行
+- 变更后合并一段时间统一重算一次看板，只推送发生变化的部分
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+
+from iot_monitor.cache import ROBOTS_DASHBOARD_NAMESPACE, bump_version
+
+from .dashboard import build_dashboard_payload
+from .serializers import RiskEventSerializer, RobotComponentSerializer
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_GROUP = "robots_dashboard"
+
+SNAPSHOT_KEY = "robots:dashboard:snapshot"
+REFRESH_LOCK_KEY = "robots:dashboard:refresh"
+
+# 快照缓存时间（秒），兜底未经过钩子的数据变更
+SNAPSHOT_TIMEOUT = 300
+
+# 变更后合并多久再重算看板（秒）
+REFRESH_DELAY = 2
+
+# 单次变更超过该行数时不推送行，只等待重算
+MAX_ROW_DELTA = 50
+
+
+def get_snapshot():
+    """看板全量快照，缓存丢失时重新计算"""
+    snapshot = cache.get(SNAPSHOT_KEY)
+    if snapshot is None:
+        snapshot = build_dashboard_payload()
+        cache.set(SNAPSHOT_KEY, snapshot, timeout=SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def send_delta(delta):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(DASHBOARD_GROUP, {"type": "dashboard.delta", "delta": delta})
+    except Exception:
+        # 推送失败不影响写入，看板仍可通过接口刷新
+        logger.exception("看板增量推送失败")
+
+
+def refresh_snapshot():
+    """重算看板并推送发生变化的部分，返回变化的字段名列表"""
+    cache.delete(REFRESH_LOCK_KEY)
+    previous = cache.get(SNAPSHOT_KEY) or {}
+    snapshot = build_dashboard_payload()
+    cache.set(SNAPSHOT_KEY, snapshot, timeout=SNAPSHOT_TIMEOUT)
+
+    changed = {
+        key: value
+        for key, value in snapshot.items()
+        if key != "generatedAt" and previous.get(key) != value
+    }
+    if changed:
+        bump_version(ROBOTS_DASHBOARD_NAMESPACE)
+        send_delta({"kind": "sections", "sections": changed, "generatedAt": snapshot["generatedAt"]})
+    return sorted(changed)
+
+
+def schedule_refresh():
+    """在 REFRESH_DELAY 后重算看板，期间的多次变更只重算一次"""
+    if not cache.add(REFRESH_LOCK_KEY, 1, timeout=REFRESH_DELAY * 5):
+        return
+    from .tasks import refresh_dashboard_snapshot
+    try:
+        refresh_dashboard_snapshot.apply_async(countdown=REFRESH_DELAY)
+    except Exception:
+        cache.delete(REFRESH_LOCK_KEY)
+        logger.exception("看板重算任务提交失败")
+
+
+def _publish(kind, rows, serializer_class, action):
+    if len(rows) <= MAX_ROW_DELTA:
+        if kind == "component":
+            prefetch_related_objects(rows, "history_entries")
+        send_delta({"kind": kind, "action": action, "items": serializer_class(rows, many=True).data})
+    schedule_refresh()
+
+
+def publish_component_changes(components, action="updated"):
+    """
+    推送部件变更（事务提交后执行）
+
+    save() 由信号自动调用；bulk_create / bulk_update / update() 等批量写入需要显式调用。
+    """
+    components = list(components)
+    transaction.on_commit(lambda: _publish("component", components, RobotComponentSerializer, action))
+
+
+def publish_event_changes(events, action="created"):
+    """推送风险事件变更（事务提交后执行），用法同 publish_component_changes"""
+    events = list(events)
+    transaction.on_commit(lambda: _publish("event", events, RiskEventSerializer, action))
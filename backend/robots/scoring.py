@@ -0,0 +1,247 @@
+"""
+机器人部件风险评分
+
+根据遥测字段（状态、电量、健康度、电机温度、网络时延）计算 risk_score / risk_level / level
+以及 A1-A7 检查项，规则与 seed_robot_platform 生成演示数据时一致（去掉随机项，取其期望值）。
+
+评分在 NumPy 数组上一次完成：整批部件只读取评分所需的列，计算后只写回结果发生变化的行，
+只有分数变化的行按结果分组批量更新。
+检查项中 A1（供电）、A2（散热）、A3（通信）由遥测阈值决定，A6（控制）在高分且无其他失败项时置为失败，
+A4、A5、A7 为人工检查项，保持原值。
+"""
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .events import build_event, emit_risk_events, is_escalation
+from .models import AXIS_KEYS, AXIS_LABELS, RobotComponent, axis_bit
+from .realtime import MAX_ROW_DELTA, publish_component_changes
+
+BASE_SCORE = 30
+
+# 演示数据评分中随机项 rand() * 12 的期望值
+EXPECTED_NOISE = 6
+
+HOT_MOTOR_TEMP = 88
+HIGH_LATENCY = 280
+LOW_BATTERY = 15
+
+RISK_LEVELS = np.array(["low", "medium", "high", "critical"])
+RISK_LEVEL_THRESHOLDS = [60, 80, 90]
+
+LEVELS = np.array(["L", "M", "H"])
+LEVEL_THRESHOLDS = [65, 85]
+
+# 高于该分数且没有其他失败项时，A6 置为失败
+CONTROL_FAIL_SCORE = 80
+
+# 由评分规则维护的轴位，其余轴位为人工检查项
+DERIVED_AXES_MASK = axis_bit("A1") | axis_bit("A2") | axis_bit("A3") | axis_bit("A6")
+
+SCORE_COLUMNS = ["status", "battery", "health", "motor_temp", "network_latency"]
+RESULT_FIELDS = ["risk_score", "risk_level", "level", "axis_fail_mask"]
+
+READ_BATCH_SIZE = 20000
+UPDATE_BATCH_SIZE = 1000
+
+
+def derive_risk_level(score: int) -> str:
+    return str(RISK_LEVELS[np.digitize(score, RISK_LEVEL_THRESHOLDS)])
+
+
+def derive_level(score: int) -> str:
+    return str(LEVELS[np.digitize(score, LEVEL_THRESHOLDS)])
+
+
+def score_arrays(status, battery, health, motor_temp, network_latency, fail_mask):
+    """
+    对整批部件评分
+
+    参数为等长数组（status 为字符串数组，fail_mask 为当前 axis_fail_mask），
+    返回 (risk_score, risk_level, level, axis_fail_mask) 四个数组。
+    """
+    battery = np.asarray(battery, dtype=np.float64)
+    health = np.asarray(health, dtype=np.float64)
+    motor_temp = np.asarray(motor_temp)
+    network_latency = np.asarray(network_latency)
+    offline = np.asarray(status) == "offline"
+    hot = motor_temp >= HOT_MOTOR_TEMP
+    slow = network_latency >= HIGH_LATENCY
+
+    raw = (
+        BASE_SCORE
+        + (100 - health) * 0.55
+        + (30 - battery) * 0.7
+        + np.where(offline, 20, 0)
+        + np.where(hot, 8, 0)
+        + np.where(slow, 8, 0)
+        + EXPECTED_NOISE
+    )
+    score = np.clip(np.rint(raw), 0, 100).astype(np.int64)
+
+    mask = np.asarray(fail_mask, dtype=np.int64) & ~DERIVED_AXES_MASK
+    mask |= np.where(battery <= LOW_BATTERY, axis_bit("A1"), 0)
+    mask |= np.where(hot, axis_bit("A2"), 0)
+    mask |= np.where(slow, axis_bit("A3"), 0)
+    mask |= np.where((score >= CONTROL_FAIL_SCORE) & (mask == 0), axis_bit("A6"), 0)
+
+    risk_level = RISK_LEVELS[np.digitize(score, RISK_LEVEL_THRESHOLDS)]
+    level = LEVELS[np.digitize(score, LEVEL_THRESHOLDS)]
+    return score, risk_level, level, mask
+
+
+def derive_reason(status, battery, health, motor_temp, network_latency) -> str:
+    """风险升高的主要原因，顺序与演示数据一致"""
+    if status == "offline":
+        return "长时间离线"
+    if battery <= 12:
+        return "电量过低"
+    if health <= 70:
+        return "健康度偏低"
+    if network_latency >= HIGH_LATENCY:
+        return "网络时延异常"
+    if motor_temp >= HOT_MOTOR_TEMP:
+        return "电机温度偏高"
+    return "风险分数升高"
+
+
+def checks_from_mask(checks, mask):
+    """按掩码更新检查项的 ok 标记，保留其他内容"""
+    checks = dict(checks) if isinstance(checks, dict) else {}
+    for axis in AXIS_KEYS:
+        item = dict(checks.get(axis) or {"label": AXIS_LABELS[axis]})
+        item["ok"] = not (mask & axis_bit(axis))
+        checks[axis] = item
+    return checks
+
+
+def score_components(components):
+    """
+    对已加载的部件实例评分并就地写入结果
+
+    返回 {部件: 变化的字段列表}，只包含结果发生变化的部件。
+    """
+    components = list(components)
+    if not components:
+        return {}
+    columns = {column: [getattr(component, column) for component in components] for column in SCORE_COLUMNS}
+    score, risk_level, level, mask = score_arrays(
+        fail_mask=[component.axis_fail_mask for component in components], **columns
+    )
+
+    changed = {}
+    for index, component in enumerate(components):
+        fields = []
+        for field, value in zip(RESULT_FIELDS, (int(score[index]), str(risk_level[index]), str(level[index]), int(mask[index]))):
+            if getattr(component, field) != value:
+                setattr(component, field, value)
+                fields.append(field)
+        if "axis_fail_mask" in fields:
+            component.checks = checks_from_mask(component.checks, component.axis_fail_mask)
+            fields.append("checks")
+        if fields:
+            changed[component] = fields
+    return changed
+
+
+def rescore_components(queryset=None, batch_size=READ_BATCH_SIZE):
+    """
+    按主键分批重算部件评分，只写回结果变化的行
+
+    每批只读取评分所需的列；检查项 JSON 只为掩码变化的行读取，风险等级升至 high / critical
+    的部件生成风险事件，写回的部件推送到看板。返回写回的部件数。
+    """
+    queryset = RobotComponent.objects.all() if queryset is None else queryset
+    columns = ["id", *SCORE_COLUMNS, *RESULT_FIELDS]
+    updated = 0
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).order_by("id").values_list(*columns)[:batch_size])
+        if not rows:
+            return updated
+        last_id = rows[-1][0]
+        updated += _write_changes(rows)
+
+
+def _write_changes(rows):
+    ids, status, battery, health, motor_temp, network_latency, old_score, old_risk_level, old_level, old_mask = (
+        np.array(column) for column in zip(*rows)
+    )
+    score, risk_level, level, mask = score_arrays(status, battery, health, motor_temp, network_latency, old_mask)
+
+    mask_changed = mask != old_mask
+    changed = mask_changed | (score != old_score) | (risk_level != old_risk_level) | (level != old_level)
+    if not changed.any():
+        return 0
+
+    checks = dict(
+        RobotComponent.objects.filter(id__in=ids[mask_changed].tolist()).values_list("id", "checks")
+    )
+    now = timezone.now()
+    score_only, with_checks = [], []
+    # 只有分数变化的行按结果分组（等级由分数决定，组数不超过分数取值数），每组一条 UPDATE ... WHERE id IN；
+    # bulk_update 为每行生成 CASE 分支，变化行多时远慢于分组更新
+    by_result = {}
+    for index in np.flatnonzero(changed):
+        component = RobotComponent(
+            id=int(ids[index]),
+            risk_score=int(score[index]),
+            risk_level=str(risk_level[index]),
+            level=str(level[index]),
+            axis_fail_mask=int(mask[index]),
+            updated_at=now,
+        )
+        if mask_changed[index]:
+            component.checks = checks_from_mask(checks.get(component.id), component.axis_fail_mask)
+            with_checks.append(component)
+        else:
+            score_only.append(component)
+            key = (component.risk_score, component.risk_level, component.level)
+            by_result.setdefault(key, []).append(component.id)
+
+    escalated = [
+        index for index in np.flatnonzero(changed) if is_escalation(str(old_risk_level[index]), str(risk_level[index]))
+    ]
+
+    fields = ["risk_score", "risk_level", "level", "updated_at"]
+    with transaction.atomic():
+        for (risk_score, risk_level_value, level_value), id_list in by_result.items():
+            for offset in range(0, len(id_list), UPDATE_BATCH_SIZE):
+                RobotComponent.objects.filter(id__in=id_list[offset:offset + UPDATE_BATCH_SIZE]).update(
+                    risk_score=risk_score, risk_level=risk_level_value, level=level_value, updated_at=now
+                )
+        RobotComponent.objects.bulk_update(
+            with_checks, fields + ["axis_fail_mask", "checks"], batch_size=UPDATE_BATCH_SIZE
+        )
+        # bulk_update 不触发信号，显式推送；写回的实例只有评分字段，行数少到会逐行推送时重新读取完整部件
+        written = score_only + with_checks
+        if len(written) <= MAX_ROW_DELTA:
+            written = RobotComponent.objects.filter(
+                id__in=[component.id for component in written]
+            ).select_related("group")
+        publish_component_changes(written)
+        if escalated:
+            info = {
+                row[0]: row[1:]
+                for row in RobotComponent.objects.filter(
+                    id__in=[int(ids[index]) for index in escalated]
+                ).values_list("id", "group_id", "robot_id", "name")
+            }
+            emit_risk_events(
+                [
+                    build_event(
+                        int(ids[index]),
+                        *info[int(ids[index])],
+                        reason=derive_reason(
+                            status[index], battery[index], health[index], motor_temp[index], network_latency[index]
+                        ),
+                        severity=str(risk_level[index]),
+                        risk_score=int(score[index]),
+                        triggered_at=now,
+                    )
+                    for index in escalated
+                    if int(ids[index]) in info
+                ],
+                now=now,
+            )
+    return len(score_only) + len(with_checks)
@@ -0,0 +1,95 @@
+"""
+机器人部件关键字搜索
+
+robot_id / name / part_no / reference_no / type_spec / tech 的小写三元组写入
+robot_component_search_tokens（(token, component) 唯一索引，token 列为二进制排序规则，
+与 Python 中的去重和计数一致）。搜索时先用三元组索引取出
+包含关键字全部三元组的候选部件，再在候选集上确认子串匹配，并按 完全匹配 > 前缀匹配 > 子串匹配 排序。
+少于 3 个字符的关键字没有三元组，直接按子串匹配。
+"""
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+
+from .models import RobotComponent, RobotComponentSearchToken
+
+SEARCH_FIELDS = ["robot_id", "name", "part_no", "reference_no", "type_spec", "tech"]
+
+TOKEN_SIZE = 3
+
+INDEX_BATCH_SIZE = 1000
+
+
+def trigrams(text):
+    text = (text or "").lower()
+    return {text[i:i + TOKEN_SIZE] for i in range(len(text) - TOKEN_SIZE + 1)}
+
+
+def component_tokens(component):
+    tokens = set()
+    for field in SEARCH_FIELDS:
+        tokens |= trigrams(getattr(component, field))
+    return tokens
+
+
+@transaction.atomic
+def index_components(components):
+    """重建给定部件的搜索索引（部件须已有主键）"""
+    components = list(components)
+    if not components:
+        return 0
+    RobotComponentSearchToken.objects.filter(component__in=components).delete()
+    tokens = [
+        RobotComponentSearchToken(component_id=component.pk, token=token)
+        for component in components
+        for token in component_tokens(component)
+    ]
+    RobotComponentSearchToken.objects.bulk_create(tokens, batch_size=INDEX_BATCH_SIZE)
+    return len(tokens)
+
+
+def reindex_all(queryset=None, batch_size=INDEX_BATCH_SIZE):
+    """按主键分批重建搜索索引，返回处理的部件数"""
+    queryset = RobotComponent.objects.all() if queryset is None else queryset
+    queryset = queryset.only("id", *SEARCH_FIELDS).order_by("id")
+    last_id = 0
+    total = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return total
+        index_components(batch)
+        total += len(batch)
+        last_id = batch[-1].id
+
+
+def _any_field(lookup, keyword):
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= Q(**{f"{field}__{lookup}": keyword})
+    return condition
+
+
+def search_components(queryset, keyword):
+    """按关键字过滤部件并按匹配程度排序"""
+    keyword = keyword.strip()
+    tokens = trigrams(keyword)
+    if tokens:
+        candidates = (
+            RobotComponentSearchToken.objects.filter(token__in=tokens)
+            .values("component_id")
+            .annotate(hits=Count("token"))
+            .filter(hits=len(tokens))
+            .values("component_id")
+        )
+        queryset = queryset.filter(id__in=candidates).filter(_any_field("icontains", keyword))
+    else:
+        queryset = queryset.filter(_any_field("icontains", keyword))
+
+    return queryset.annotate(
+        search_rank=Case(
+            When(_any_field("iexact", keyword), then=Value(3)),
+            When(_any_field("istartswith", keyword), then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    ).order_by("-search_rank", "-updated_at")
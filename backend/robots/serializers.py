@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from .models import RobotGroup, RobotComponent, RiskEvent
+from .stats import GROUP_CARD_STATS, annotate_group_stats, group_stats
 
 
 class RobotGroupSerializer(serializers.ModelSerializer):
@@ -11,17 +12,10 @@ class RobotGroupSerializer(serializers.ModelSerializer):
         fields = ("id", "key", "name", "expected_total", "stats")
 
     def get_stats(self, obj: RobotGroup):
-        stats = getattr(obj, "_stats", None)
-        if stats is not None:
-            return stats
-        return {
-            "total": obj.components.count(),
-            "online": obj.components.filter(status="online").count(),
-            "offline": obj.components.filter(status="offline").count(),
-            "maintenance": obj.components.filter(status="maintenance").count(),
-            "highRisk": obj.components.filter(level="H").count(),
-            "historyHighRisk": obj.components.exclude(risk_history=[]).count(),
-        }
+        if not hasattr(obj, "stat_total"):
+            obj = annotate_group_stats().get(pk=obj.pk)
+        stats = group_stats(obj)
+        return {name: stats[name] for name in GROUP_CARD_STATS}
 
 
 class RobotComponentSerializer(serializers.ModelSerializer):
@@ -34,7 +28,7 @@ class RobotComponentSerializer(serializers.ModelSerializer):
     networkLatency = serializers.IntegerField(source="network_latency")
     riskScore = serializers.IntegerField(source="risk_score")
     riskLevel = serializers.CharField(source="risk_level")
-    riskHistory = serializers.JSONField(source="risk_history")
+    riskHistory = serializers.SerializerMethodField(method_name="get_risk_history")
     lastSeen = serializers.DateTimeField(source="last_seen")
     isHighRisk = serializers.BooleanField(source="is_high_risk", read_only=True)
 
@@ -66,6 +60,16 @@ class RobotComponentSerializer(serializers.ModelSerializer):
             "isHighRisk",
         )
 
+    def get_risk_history(self, obj: RobotComponent):
+        # 没有历史记录的部件不查询子表；列表接口通过 prefetch_related("history_entries") 一次取出
+        if not obj.history_count:
+            return []
+        time_field = serializers.DateTimeField()
+        return [
+            {"id": entry.entry_id, "time": time_field.to_representation(entry.recorded_at), "score": entry.score, "level": entry.level}
+            for entry in obj.history_entries.all()
+        ]
+
 
 class RiskEventSerializer(serializers.ModelSerializer):
     group = serializers.CharField(source="group.key", read_only=True)
@@ -85,3 +89,15 @@ class RiskEventSerializer(serializers.ModelSerializer):
             "notes",
             "triggered_at",
         )
+
+
+class RobotTelemetrySerializer(serializers.Serializer):
+    """单条遥测数据，未提供的字段保持不变"""
+
+    robot_id = serializers.CharField(max_length=64)
+    status = serializers.ChoiceField(choices=RobotComponent.STATUS_CHOICES, required=False)
+    battery = serializers.IntegerField(min_value=0, max_value=100, required=False)
+    health = serializers.IntegerField(min_value=0, max_value=100, required=False)
+    motorTemp = serializers.IntegerField(source="motor_temp", min_value=0, max_value=32767, required=False)
+    networkLatency = serializers.IntegerField(source="network_latency", min_value=0, max_value=32767, required=False)
+    lastSeen = serializers.DateTimeField(source="last_seen", required=False)
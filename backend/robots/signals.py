@@ -0,0 +1,34 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .event_counts import count_events, uncount_events
+from .models import RiskEvent, RobotComponent
+from .realtime import publish_component_changes, publish_event_changes, schedule_refresh
+from .search import SEARCH_FIELDS, index_components
+from .stats import invalidate_event_stats
+
+
+@receiver(post_save, sender=RobotComponent)
+def component_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) & set(SEARCH_FIELDS):
+        index_components([instance])
+    publish_component_changes([instance], action="created" if created else "updated")
+
+
+@receiver(post_save, sender=RiskEvent)
+def event_saved(sender, instance, created, **kwargs):
+    if created:
+        count_events([instance])
+    transaction.on_commit(invalidate_event_stats)
+    publish_event_changes([instance], action="created" if created else "updated")
+
+
+@receiver(post_delete, sender=RobotComponent)
+@receiver(post_delete, sender=RiskEvent)
+def row_deleted(sender, instance, **kwargs):
+    # 删除多为批量清理，不逐行推送，只重算看板
+    transaction.on_commit(schedule_refresh)
+    if sender is RiskEvent:
+        uncount_events([instance])
+        transaction.on_commit(invalidate_event_stats)
@@ -0,0 +1,134 @@
+"""
+机器人组统计
+
+所有组的计数在一条 GROUP BY 查询中用条件聚合完成，轴检查失败数按 axis_fail_mask 索引分组一条查询，
+各组高风险预览用窗口函数一条查询取 Top-N，查询次数与组数无关。
+
+风险事件统计的严重程度 × 状态矩阵由一条分组查询完成，24 小时分布读取小时计数表，结果带版本号缓存，
+事件写入或状态变化时使缓存失效。
+"""
+from datetime import timezone as dt_timezone
+
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber, TruncHour
+
+from iot_monitor.cache import bump_version, get_or_compute
+from iot_monitor.stats import by_severity, by_status, severity_status_matrix
+
+from .event_counts import fill_series, floor_hour, hourly_series, series_start
+from .models import AXIS_KEYS, RiskEvent, RobotComponent, RobotGroup, axis_bit
+
+LEVELS = [level for level, _ in RobotComponent.LEVEL_CHOICES]
+
+# 组统计字段 -> 部件过滤条件（None 表示全部部件）
+GROUP_STAT_FILTERS = {
+    "total": None,
+    "online": Q(components__status="online"),
+    "offline": Q(components__status="offline"),
+    "maintenance": Q(components__status="maintenance"),
+    "highRisk": Q(components__level="H"),
+    "historyHighRisk": Q(components__history_count__gt=0),
+    "marked": ~Q(components__mark=0),
+    **{f"level{level}": Q(components__level=level) for level in LEVELS},
+}
+
+# 组卡片（组列表接口）返回的统计字段
+GROUP_CARD_STATS = ["total", "online", "offline", "maintenance", "highRisk", "historyHighRisk"]
+
+
+def annotate_group_stats(queryset=None):
+    """为组查询集附加 stat_<字段> 计数注解"""
+    queryset = RobotGroup.objects.all() if queryset is None else queryset
+    return queryset.annotate(**{
+        f"stat_{name}": Count("components", filter=condition)
+        for name, condition in GROUP_STAT_FILTERS.items()
+    })
+
+
+def group_stats(group):
+    """读取 annotate_group_stats 附加的计数"""
+    return {name: getattr(group, f"stat_{name}") for name in GROUP_STAT_FILTERS}
+
+
+def axis_bad_counts(queryset=None):
+    """各轴检查失败的部件数（按掩码分组，最多 128 行）"""
+    queryset = RobotComponent.objects.all() if queryset is None else queryset
+    counts = dict.fromkeys(AXIS_KEYS, 0)
+    rows = queryset.filter(axis_fail_mask__gt=0).values("axis_fail_mask").annotate(count=Count("id")).order_by()
+    for row in rows:
+        for axis in AXIS_KEYS:
+            if row["axis_fail_mask"] & axis_bit(axis):
+                counts[axis] += row["count"]
+    return counts
+
+
+def high_risk_previews(limit):
+    """各组按风险分数排序的前 limit 个高风险部件，返回 {group_id: [...]}"""
+    rows = (
+        RobotComponent.objects.filter(level="H")
+        .annotate(
+            rank=Window(
+                RowNumber(),
+                partition_by=F("group_id"),
+                order_by=[F("risk_score").desc(), F("updated_at").desc()],
+            )
+        )
+        .filter(rank__lte=limit)
+        .order_by("group_id", "rank")
+        .values("group_id", "id", "robot_id", "name")
+    )
+    previews = {}
+    for item in rows:
+        previews.setdefault(item["group_id"], []).append(
+            {"id": item["id"], "robot_id": item["robot_id"], "name": item["name"] or item["robot_id"]}
+        )
+    return previews
+
+
+EVENT_STATUSES = [status for status, _ in RiskEvent.STATUS_CHOICES]
+EVENT_SEVERITIES = [severity for severity, _ in reversed(RiskEvent.SEVERITY_CHOICES)]
+
+EVENT_STATS_NAMESPACE = "robots:event_stats"
+EVENT_STATS_TIMEOUT = 60
+
+
+def invalidate_event_stats():
+    bump_version(EVENT_STATS_NAMESPACE)
+
+
+def event_statistics(queryset, group_key=None, severity=None, status=None, now=None):
+    """
+    风险事件统计
+
+    严重程度 × 状态矩阵一次分组查询，最近事件一次查询；24 小时分布读取小时计数表，
+    计数表没有状态维度，按状态过滤时改为只聚合最近 24 小时的事件。结果按过滤参数缓存。
+    """
+    # serializers 依赖本模块的组统计，在函数内导入避免循环导入
+    from .serializers import RiskEventSerializer
+
+    def compute():
+        matrix = severity_status_matrix(queryset, EVENT_STATUSES, EVENT_SEVERITIES)
+        if status:
+            start = series_start(now)
+            rows = (
+                queryset.filter(triggered_at__gte=start)
+                .annotate(hour=TruncHour("triggered_at", tzinfo=dt_timezone.utc))
+                .values("hour")
+                .annotate(count=Count("id"))
+                .order_by()
+            )
+            hourly = fill_series({floor_hour(row["hour"]): row["count"] for row in rows}, start)
+        else:
+            hourly = hourly_series(now, group_key=group_key, severity=severity)
+
+        recent = queryset.order_by("-triggered_at")[:5]
+        return {
+            "severity_stats": {severity: count for severity, count in by_severity(matrix).items() if count},
+            "total_stats": {status: count for status, count in by_status(matrix).items() if count},
+            "matrix": matrix,
+            "recent_alerts": RiskEventSerializer(recent, many=True).data,
+            "hourly": hourly,
+        }
+
+    cache_parts = [group_key or "", status or "", severity or ""]
+    return get_or_compute(EVENT_STATS_NAMESPACE, cache_parts, compute, timeout=EVENT_STATS_TIMEOUT)
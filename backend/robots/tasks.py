@@ -0,0 +1,23 @@
+from celery import shared_task
+
+from .event_counts import prune_event_counts
+from .realtime import refresh_snapshot
+from .scoring import rescore_components
+
+
+@shared_task
+def refresh_dashboard_snapshot():
+    """重算机器人看板并推送变化"""
+    return refresh_snapshot()
+
+
+@shared_task
+def rescore_robot_components():
+    """重算全部部件风险评分，返回写回的部件数"""
+    return rescore_components()
+
+
+@shared_task
+def prune_risk_event_counts():
+    """删除超出保留范围的事件小时计数"""
+    return prune_event_counts()
@@ -0,0 +1,110 @@
+"""
+机器人遥测批量写入
+
+按 robot_id 一次读取所有相关部件，在内存中应用遥测并对整批部件一次重算风险评分和检查项，
+只更新实际变化的字段：变化字段相同的部件归为一组，每组一次 bulk_update。
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import RobotComponent
+from .realtime import publish_component_changes
+from .events import build_event, emit_risk_events, is_escalation
+from .scoring import derive_reason, score_components
+from .serializers import RobotTelemetrySerializer
+
+# 单次请求允许的最大遥测条数
+MAX_TELEMETRY_BATCH = 5000
+
+UPDATE_BATCH_SIZE = 1000
+
+
+def validate_telemetry(items):
+    """逐条校验，返回 ({robot_id: 遥测字段}, 错误列表)；同一 robot_id 多条时后者覆盖前者"""
+    updates = {}
+    errors = []
+    for index, item in enumerate(items):
+        serializer = RobotTelemetrySerializer(data=item)
+        if not serializer.is_valid():
+            errors.append({"index": index, "errors": serializer.errors})
+            continue
+        data = dict(serializer.validated_data)
+        robot_id = data.pop("robot_id")
+        updates.setdefault(robot_id, {}).update(data)
+    return updates, errors
+
+
+def apply_telemetry(items):
+    """
+    批量应用遥测数据
+
+    返回 {"accepted", "updated", "events", "unknown", "errors"}：updated 为实际写入的部件数，
+    events 为生成的风险事件数，unknown 为不存在的 robot_id。
+    """
+    updates, errors = validate_telemetry(items)
+    if not updates:
+        return {"accepted": 0, "updated": 0, "events": 0, "unknown": [], "errors": errors}
+
+    now = timezone.now()
+    components = list(
+        RobotComponent.objects.filter(robot_id__in=list(updates)).select_related("group")
+    )
+    found = {component.robot_id for component in components}
+
+    telemetry_changed = {}
+    for component in components:
+        values = updates[component.robot_id]
+        values.setdefault("last_seen", now)
+        changed = [field for field, value in values.items() if getattr(component, field) != value]
+        for field in changed:
+            setattr(component, field, values[field])
+        telemetry_changed[component.pk] = changed
+
+    # 整批部件一次评分
+    previous_levels = {component.pk: component.risk_level for component in components}
+    scored = score_components(components)
+
+    groups = {}
+    for component in components:
+        changed = telemetry_changed[component.pk] + scored.get(component, [])
+        if changed:
+            component.updated_at = now
+            groups.setdefault(tuple(sorted(changed)) + ("updated_at",), []).append(component)
+
+    with transaction.atomic():
+        for fields, batch in groups.items():
+            RobotComponent.objects.bulk_update(batch, list(fields), batch_size=UPDATE_BATCH_SIZE)
+        changed_components = [component for batch in groups.values() for component in batch]
+        publish_component_changes(changed_components)
+
+        events = emit_risk_events(
+            [
+                build_event(
+                    component.pk,
+                    component.group_id,
+                    component.robot_id,
+                    component.name,
+                    reason=derive_reason(
+                        component.status,
+                        component.battery,
+                        component.health,
+                        component.motor_temp,
+                        component.network_latency,
+                    ),
+                    severity=component.risk_level,
+                    risk_score=component.risk_score,
+                    triggered_at=now,
+                )
+                for component in changed_components
+                if is_escalation(previous_levels[component.pk], component.risk_level)
+            ],
+            now=now,
+        )
+
+    return {
+        "accepted": len(found),
+        "updated": len(changed_components),
+        "events": len(events),
+        "unknown": sorted(set(updates) - found),
+        "errors": errors,
+    }
@@ -0,0 +1,377 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from iot_monitor.cache import ROBOTS_DASHBOARD_NAMESPACE, bump_version
+from .event_counts import count_events, hourly_series
+from .history import append_risk_history
+from .management.commands.benchmark_scoring import random_telemetry
+from .models import RiskEvent, RobotComponent, RobotGroup, RobotRiskHistory, axis_bit, compute_axis_fail_mask
+from .scoring import rescore_components, score_arrays
+from .stats import invalidate_event_stats
+
+# 看板接口的查询次数上限（与组数、部件数无关）
+DASHBOARD_QUERY_LIMIT = 7
+
+# 风险事件统计接口的查询次数上限（与事件数无关）
+EVENT_STATISTICS_QUERY_LIMIT = 3
+
+
+def create_components(group, count, level="L", failed_axes=()):
+    checks = {f"A{n}": {"ok": f"A{n}" not in failed_axes, "label": f"A{n}"} for n in range(1, 8)}
+    RobotComponent.objects.bulk_create(
+        [
+            RobotComponent(
+                group=group,
+                robot_id=f"{group.key}-{level}-{index}",
+                part_no=f"P{index}",
+                reference_no=f"R{index}",
+                type_spec="spec",
+                tech="tech",
+                level=level,
+                checks=checks,
+                axis_fail_mask=compute_axis_fail_mask(checks),
+                mark=index % 2,
+            )
+            for index in range(count)
+        ]
+    )
+
+
+class DashboardQueryCountTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="viewer", password="pass"))
+
+    def add_group(self, key):
+        group = RobotGroup.objects.create(key=key, name=key, expected_total=5)
+        create_components(group, 3, level="H", failed_axes=("A2",))
+        create_components(group, 2, level="L")
+        return group
+
+    def fetch_dashboard(self):
+        # 测试数据直接批量写入，不经过看板重算，这里手动使响应缓存失效
+        bump_version(ROBOTS_DASHBOARD_NAMESPACE)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/robots/dashboard/")
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx.captured_queries)
+
+    def test_query_count_independent_of_group_count(self):
+        self.add_group("g1")
+        data, few_groups = self.fetch_dashboard()
+        self.assertLessEqual(few_groups, DASHBOARD_QUERY_LIMIT)
+        self.assertEqual(data["summary"]["total"], 5)
+
+        for index in range(2, 10):
+            self.add_group(f"g{index}")
+        data, many_groups = self.fetch_dashboard()
+        self.assertEqual(many_groups, few_groups)
+
+        self.assertEqual(data["summary"], {"total": 45, "highRisk": 27, "historyHighRisk": 0, "marked": 18})
+        self.assertEqual(data["levelDistribution"], {"H": 27, "L": 18})
+        self.assertEqual(data["axisBad"]["A2"], 27)
+        self.assertEqual(data["axisBad"]["A1"], 0)
+        group = data["groupStats"][0]
+        self.assertEqual((group["total"], group["highRisk"], len(group["highRiskDevices"])), (5, 3, 3))
+
+
+class GroupListQueryCountTest(TestCase):
+    def test_group_list_is_single_query(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="viewer", password="pass"))
+        for index in range(5):
+            group = RobotGroup.objects.create(key=f"g{index}", name=f"g{index}")
+            create_components(group, 2, level="H")
+            create_components(group, 1, level="L")
+
+        with self.assertNumQueries(1):
+            response = client.get("/api/robots/groups/")
+
+        self.assertEqual(response.status_code, 200)
+        stats = response.json()[0]["stats"]
+        self.assertEqual(stats, {
+            "total": 3, "online": 3, "offline": 0, "maintenance": 0, "highRisk": 2, "historyHighRisk": 0,
+        })
+
+
+class AxisFilterTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="viewer", password="pass"))
+        group = RobotGroup.objects.create(key="axis", name="axis")
+        create_components(group, 2, level="H", failed_axes=("A3",))
+        create_components(group, 3, level="M", failed_axes=("A5",))
+        create_components(group, 4, level="L")
+
+    def count(self, **params):
+        response = self.client.get("/api/robots/components/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["count"]
+
+    def test_axis_filters_use_mask(self):
+        self.assertEqual(self.count(axisKeys="A3", axisOk="false"), 2)
+        self.assertEqual(self.count(axisKeys="A3,A5", axisOk="false"), 5)
+        self.assertEqual(self.count(axisKeys="A3,A5", axisOk="true"), 4)
+        self.assertEqual(self.count(axisKey="A1", axisOk="true"), 9)
+
+    def test_save_recomputes_mask(self):
+        component = RobotComponent.objects.filter(level="L").first()
+        component.checks["A7"]["ok"] = False
+        component.save(update_fields=["checks"])
+        component.refresh_from_db()
+        self.assertEqual(component.axis_fail_mask, 1 << 6)
+
+
+class KeywordSearchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="viewer", password="pass"))
+        group = RobotGroup.objects.create(key="search", name="search")
+        for robot_id, part_no in [("RB-1001", "XPART-1001"), ("RB-2001", "PART-77"), ("ZZ-3001", "RB-1001X")]:
+            RobotComponent.objects.create(
+                group=group, robot_id=robot_id, part_no=part_no, reference_no="REF", type_spec="spec", tech="tech"
+            )
+
+    def search(self, keyword):
+        response = self.client.get("/api/robots/components/", {"keyword": keyword})
+        self.assertEqual(response.status_code, 200)
+        return [item["robot_id"] for item in response.json()["results"]]
+
+    def test_substring_match_ranked(self):
+        # RB-1001 完全匹配 robot_id，ZZ-3001 仅前缀匹配 part_no
+        self.assertEqual(self.search("rb-1001"), ["RB-1001", "ZZ-3001"])
+        self.assertEqual(self.search("part-1"), ["RB-1001"])
+
+    def test_short_keyword_substring(self):
+        self.assertEqual(sorted(self.search("zz")), ["ZZ-3001"])
+        self.assertEqual(self.search("77"), ["RB-2001"])
+
+    def test_index_follows_updates(self):
+        component = RobotComponent.objects.get(robot_id="RB-2001")
+        component.tech = "laserweld"
+        component.save()
+        self.assertEqual(self.search("serwe"), ["RB-2001"])
+
+    def test_tokens_equal_under_default_collation(self):
+        # "afe" 与 "afé"、全角与半角在默认排序规则下相等，二进制排序规则下不冲突
+        component = RobotComponent.objects.get(robot_id="RB-2001")
+        component.tech = "cafe café ＡＢＣ abc"
+        component.save()
+        self.assertEqual(self.search("afé"), ["RB-2001"])
+
+
+class RiskHistoryTest(TestCase):
+    def test_history_tab_uses_counter(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="viewer", password="pass"))
+        group = RobotGroup.objects.create(key="hist", name="hist")
+        create_components(group, 3)
+        component = RobotComponent.objects.first()
+        append_risk_history([
+            RobotRiskHistory(component_id=component.id, entry_id=f"e{index}", recorded_at=timezone.now(), score=90, level="critical")
+            for index in range(2)
+        ])
+
+        response = client.get("/api/robots/components/", {"tab": "history"})
+        results = response.json()["results"]
+        self.assertEqual([item["id"] for item in results], [component.id])
+        self.assertEqual(len(results[0]["riskHistory"]), 2)
+        component.refresh_from_db()
+        self.assertEqual(component.history_count, 2)
+
+
+class TelemetryTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="gateway", password="pass", is_staff=True))
+        group = RobotGroup.objects.create(key="tele", name="tele")
+        create_components(group, 3)
+
+    def post(self, items):
+        return self.client.post("/api/robots/telemetry/", {"items": items}, format="json")
+
+    def test_bulk_update_recomputes_score(self):
+        last_seen = "2026-10-18T08:00:00Z"
+        items = [
+            {"robot_id": "tele-L-0", "status": "offline", "battery": 5, "health": 40, "lastSeen": last_seen},
+            {"robot_id": "tele-L-1", "battery": 90, "lastSeen": last_seen},
+            {"robot_id": "missing", "battery": 50},
+            {"robot_id": "tele-L-2", "battery": 500},
+        ]
+        response = self.post(items)
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual((result["accepted"], result["updated"]), (2, 2))
+        self.assertEqual(result["unknown"], ["missing"])
+        self.assertEqual(result["errors"][0]["index"], 3)
+
+        component = RobotComponent.objects.get(robot_id="tele-L-0")
+        self.assertEqual((component.status, component.battery, component.health), ("offline", 5, 40))
+        self.assertEqual((component.risk_score, component.risk_level, component.level), (100, "critical", "H"))
+
+        # 数据未变化时不写入
+        response = self.post(items[:2])
+        self.assertEqual(response.json()["updated"], 0)
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(User.objects.create_user(username="viewer", password="pass"))
+        self.assertEqual(self.post([{"robot_id": "tele-L-0", "battery": 1}]).status_code, 403)
+
+
+class ScoringTest(TestCase):
+    def test_score_arrays_match_scalar_rules(self):
+        score, risk_level, level, mask = score_arrays(
+            status=["offline", "online", "online"],
+            battery=[5, 100, 30],
+            health=[40, 100, 40],
+            motor_temp=[60, 90, 60],
+            network_latency=[30, 30, 300],
+            fail_mask=[0, axis_bit("A5") | axis_bit("A6"), 0],
+        )
+        self.assertEqual(score.tolist(), [100, 0, 77])
+        self.assertEqual(risk_level.tolist(), ["critical", "low", "medium"])
+        self.assertEqual(level.tolist(), ["H", "L", "M"])
+        # A1 电量过低；A2 温度过高且保留人工 A5、清除规则 A6；A3 时延过高
+        self.assertEqual(mask.tolist(), [axis_bit("A1"), axis_bit("A2") | axis_bit("A5"), axis_bit("A3")])
+
+    def test_rescore_writes_only_changed_rows(self):
+        group = RobotGroup.objects.create(key="score", name="score")
+        create_components(group, 4)
+        RobotComponent.objects.filter(robot_id="score-L-0").update(battery=5, health=40, status="offline")
+
+        self.assertEqual(rescore_components(), 1)
+        component = RobotComponent.objects.get(robot_id="score-L-0")
+        self.assertEqual((component.risk_score, component.level), (100, "H"))
+        self.assertFalse(component.checks["A1"]["ok"])
+        self.assertEqual(component.axis_fail_mask, axis_bit("A1"))
+
+        self.assertEqual(rescore_components(), 0)
+
+    def test_rescore_publishes_written_rows(self):
+        group = RobotGroup.objects.create(key="publish", name="publish")
+        create_components(group, 3)
+        RobotComponent.objects.filter(robot_id="publish-L-1").update(health=60)
+
+        with mock.patch("robots.realtime.send_delta") as send_delta:
+            with mock.patch("robots.realtime.schedule_refresh") as refresh:
+                with self.captureOnCommitCallbacks(execute=True):
+                    rescore_components()
+        deltas = [call.args[0] for call in send_delta.call_args_list if call.args[0]["kind"] == "component"]
+        self.assertEqual([item["robot_id"] for delta in deltas for item in delta["items"]], ["publish-L-1"])
+        self.assertEqual(deltas[0]["items"][0]["group"], "publish")
+        self.assertTrue(refresh.called)
+
+    def test_score_arrays_fleet_under_a_second(self):
+        telemetry = random_telemetry(100_000)
+        started = time.perf_counter()
+        score, *_ = score_arrays(fail_mask=np.zeros(100_000, dtype=np.int64), **telemetry)
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual(len(score), 100_000)
+
+
+class RiskEventEmitTest(TestCase):
+    def test_escalation_emits_event_once_per_window(self):
+        group = RobotGroup.objects.create(key="emit", name="emit")
+        create_components(group, 2)
+        RobotComponent.objects.filter(robot_id="emit-L-0").update(battery=5, health=40, status="offline")
+
+        rescore_components()
+        event = RiskEvent.objects.get()
+        self.assertEqual((event.robot_id, event.group_id), ("emit-L-0", group.id))
+        self.assertEqual((event.reason, event.severity, event.status), ("长时间离线", "critical", "pending"))
+
+        # 窗口内再次升级不重复生成
+        RobotComponent.objects.filter(robot_id="emit-L-0").update(risk_level="low", risk_score=0)
+        rescore_components()
+        self.assertEqual(RiskEvent.objects.count(), 1)
+
+
+class EventHourlyCountTest(TestCase):
+    def test_counts_follow_hour_rollover(self):
+        group = RobotGroup.objects.create(key="hourly", name="hourly")
+        now = timezone.now().replace(minute=30)
+        events = [
+            RiskEvent.objects.create(
+                group=group, robot_id="hourly-0", message="m", severity=severity, triggered_at=triggered_at
+            )
+            for severity, triggered_at in [
+                ("high", now),
+                ("critical", now),
+                ("high", now - timedelta(hours=1)),
+                ("high", now - timedelta(hours=30)),
+            ]
+        ]
+        self.assertEqual(len(events), 4)
+
+        series = hourly_series(now)
+        self.assertEqual(len(series), 24)
+        self.assertEqual([item["count"] for item in series[-2:]], [1, 2])
+        self.assertEqual(sum(item["count"] for item in series), 3)
+
+        # 跨入下一小时：当前桶为 0，原桶左移一位
+        series = hourly_series(now + timedelta(hours=1))
+        self.assertEqual([item["count"] for item in series[-3:]], [1, 2, 0])
+
+        count_events(events[:1], now=now)
+        self.assertEqual(hourly_series(now)[-1]["count"], 3)
+
+        # 删除事件扣减对应的桶
+        events[1].delete()
+        self.assertEqual(hourly_series(now)[-1]["count"], 2)
+
+
+class EventStatisticsQueryCountTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="event-stats", password="pass"))
+        group = RobotGroup.objects.create(key="stats", name="stats")
+        now = timezone.now()
+        events = [
+            RiskEvent(
+                group=group,
+                robot_id=f"stats-{index}",
+                message="m",
+                severity=severity,
+                status=status,
+                triggered_at=triggered_at,
+            )
+            for index, (severity, status, triggered_at) in enumerate(
+                [
+                    ("high", "pending", now),
+                    ("high", "resolved", now - timedelta(hours=2)),
+                    ("critical", "pending", now - timedelta(days=3)),
+                ]
+            )
+        ]
+        RiskEvent.objects.bulk_create(events)
+        count_events(events)
+        invalidate_event_stats()
+
+    def fetch(self, params=None):
+        # 矩阵、24 小时分布、最近事件各一次查询
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/robots/risk-events/statistics/", params or {})
+        self.assertLessEqual(len(queries), EVENT_STATISTICS_QUERY_LIMIT)
+        return response.json()
+
+    def test_matrix_and_hourly_from_counters(self):
+        data = self.fetch()
+        self.assertEqual(data["severity_stats"], {"high": 2, "critical": 1})
+        self.assertEqual(data["total_stats"], {"pending": 2, "resolved": 1})
+        self.assertEqual(data["matrix"]["high"], {"pending": 1, "acknowledged": 0, "resolved": 1})
+        self.assertEqual(sum(item["count"] for item in data["hourly"]), 2)
+        self.assertEqual(len(data["recent_alerts"]), 3)
+
+    def test_status_filter_aggregates_last_24h(self):
+        data = self.fetch({"status": "pending"})
+        self.assertEqual(data["total_stats"], {"pending": 2})
+        self.assertEqual(sum(item["count"] for item in data["hourly"]), 1)
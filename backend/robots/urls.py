@@ -1,7 +1,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import RiskEventViewSet, RobotComponentViewSet, RobotGroupViewSet, dashboard
+from .views import RiskEventViewSet, RobotComponentViewSet, RobotGroupViewSet, dashboard, telemetry
 
 router = DefaultRouter()
 router.register(r"groups", RobotGroupViewSet, basename="robot-group")
@@ -10,5 +10,6 @@ router.register(r"risk-events", RiskEventViewSet, basename="risk-event")
 
 urlpatterns = [
     path("dashboard/", dashboard, name="robots-dashboard"),
+    path("telemetry/", telemetry, name="robots-telemetry"),
     path("", include(router.urls)),
 ]
@@ -1,35 +1,26 @@
-from django.db.models import Count, Q
-from django.db.models.functions import TruncHour
-from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .models import RiskEvent, RobotComponent, RobotGroup
+from iot_monitor.cache import DEFAULT_TIMEOUT, ROBOTS_DASHBOARD_NAMESPACE, cache_response
+
+from .dashboard import build_dashboard_payload
+from .models import AXIS_KEYS, RiskEvent, RobotComponent, axis_bit, masks_matching
 from .permissions import IsStaffOrReadOnly
+from .search import search_components
 from .serializers import RiskEventSerializer, RobotComponentSerializer, RobotGroupSerializer
+from .stats import annotate_group_stats, event_statistics
+from .telemetry import MAX_TELEMETRY_BATCH, apply_telemetry
 
 
 class RobotGroupViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
-    queryset = RobotGroup.objects.all()
     serializer_class = RobotGroupSerializer
+    pagination_class = None
 
-    def list(self, request, *args, **kwargs):
-        groups = list(self.get_queryset())
-        for group in groups:
-            qs = group.components.all()
-            group._stats = {
-                "total": qs.count(),
-                "online": qs.filter(status="online").count(),
-                "offline": qs.filter(status="offline").count(),
-                "maintenance": qs.filter(status="maintenance").count(),
-                "highRisk": qs.filter(level="H").count(),
-                "historyHighRisk": qs.exclude(risk_history=[]).count(),
-            }
-        serializer = self.get_serializer(groups, many=True)
-        return Response(serializer.data)
+    def get_queryset(self):
+        return annotate_group_stats()
 
 
 class RobotComponentViewSet(
@@ -38,7 +29,7 @@ class RobotComponentViewSet(
     mixins.UpdateModelMixin,
     viewsets.GenericViewSet,
 ):
-    queryset = RobotComponent.objects.select_related("group").all()
+    queryset = RobotComponent.objects.select_related("group").prefetch_related("history_entries")
     serializer_class = RobotComponentSerializer
     permission_classes = [IsStaffOrReadOnly]
 
@@ -53,18 +44,11 @@ class RobotComponentViewSet(
         if tab == "highRisk":
             qs = qs.filter(level="H")
         elif tab == "history":
-            qs = qs.exclude(risk_history=[])
+            qs = qs.filter(history_count__gt=0)
 
         keyword = (self.request.query_params.get("keyword") or "").strip()
         if keyword:
-            qs = qs.filter(
-                Q(robot_id__icontains=keyword)
-                | Q(name__icontains=keyword)
-                | Q(part_no__icontains=keyword)
-                | Q(reference_no__icontains=keyword)
-                | Q(type_spec__icontains=keyword)
-                | Q(tech__icontains=keyword)
-            )
+            qs = search_components(qs, keyword)
 
         status_filter = self.request.query_params.get("status")
         if status_filter:
@@ -91,18 +75,14 @@ class RobotComponentViewSet(
             axis_keys.append(axis_key)
 
         axis_ok = self.request.query_params.get("axisOk")
-        allowed_axes = {"A1", "A2", "A3", "A4", "A5", "A6", "A7"}
-        axis_keys = [k for k in axis_keys if k in allowed_axes]
+        axis_keys = [k for k in axis_keys if k in AXIS_KEYS]
         if axis_keys and axis_ok is not None:
             axis_ok_bool = str(axis_ok).lower() in {"1", "true", "yes"}
-            if axis_ok_bool:
-                for k in axis_keys:
-                    qs = qs.filter(**{f"checks__{k}__ok": True})
-            else:
-                axis_q = Q()
-                for k in axis_keys:
-                    axis_q |= Q(**{f"checks__{k}__ok": False})
-                qs = qs.filter(axis_q)
+            bits = 0
+            for k in axis_keys:
+                bits |= axis_bit(k)
+            # 全部通过：掩码与所选轴无交集；任一失败：有交集
+            qs = qs.filter(axis_fail_mask__in=masks_matching(bits, any_set=not axis_ok_bool))
 
         return qs
 
@@ -145,98 +125,39 @@ class RiskEventViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewset
 
     @action(detail=False, methods=["get"])
     def statistics(self, request):
-        qs = self.get_queryset()
-        severity_counts = qs.values("severity").annotate(count=Count("id"))
-        status_counts = qs.values("status").annotate(count=Count("id"))
-
-        severity_stats = {item["severity"]: item["count"] for item in severity_counts}
-        total_stats = {item["status"]: item["count"] for item in status_counts}
-        recent = qs.order_by("-triggered_at")[:5]
-
+        params = request.query_params
         return Response(
-            {
-                "severity_stats": severity_stats,
-                "total_stats": total_stats,
-                "recent_alerts": RiskEventSerializer(recent, many=True).data,
-            }
+            event_statistics(
+                self.get_queryset(),
+                group_key=params.get("group"),
+                severity=params.get("severity"),
+                status=params.get("status"),
+            )
         )
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@cache_response(ROBOTS_DASHBOARD_NAMESPACE, window=DEFAULT_TIMEOUT)
 def dashboard(request):
-    now = timezone.now()
-    since = now - timezone.timedelta(hours=24)
-    high_risk_preview_limit = 12
-
-    groups = list(RobotGroup.objects.all())
-    group_payload = []
-    for group in groups:
-        qs = RobotComponent.objects.filter(group=group)
-        high_risk_qs = (
-            qs.filter(level="H")
-            .order_by("-risk_score", "-updated_at")
-            .values("id", "robot_id", "name")[:high_risk_preview_limit]
-        )
-        high_risk_devices = [
-            {"id": item["id"], "robot_id": item["robot_id"], "name": item["name"] or item["robot_id"]}
-            for item in high_risk_qs
-        ]
-        group_payload.append(
-            {
-                "key": group.key,
-                "name": group.name,
-                "expected_total": group.expected_total,
-                "total": qs.count(),
-                "highRisk": qs.filter(level="H").count(),
-                "historyHighRisk": qs.exclude(risk_history=[]).count(),
-                "marked": qs.exclude(mark=0).count(),
-                "highRiskDevices": high_risk_devices,
-                "highRiskDevicesPreviewLimit": high_risk_preview_limit,
-            }
-        )
-
-    total = RobotComponent.objects.count()
-    high_risk = RobotComponent.objects.filter(level="H").count()
-    history_high_risk = RobotComponent.objects.exclude(risk_history=[]).count()
-    marked = RobotComponent.objects.exclude(mark=0).count()
-
-    level_dist = {item["level"]: item["count"] for item in RobotComponent.objects.values("level").annotate(count=Count("id"))}
-
-    axes = ["A1", "A2", "A3", "A4", "A5", "A6", "A7"]
-    axis_bad = {}
-    for axis in axes:
-        axis_bad[axis] = RobotComponent.objects.filter(**{f"checks__{axis}__ok": False}).count()
-
-    event_qs = RiskEvent.objects.filter(triggered_at__gte=since, triggered_at__lte=now)
-    hourly = (
-        event_qs.annotate(hour=TruncHour("triggered_at"))
-        .values("hour")
-        .annotate(count=Count("id"))
-        .order_by("hour")
-    )
-    hourly_series = [{"time": item["hour"].isoformat(), "count": item["count"]} for item in hourly]
-
-    recent_components = RobotComponent.objects.select_related("group").order_by("-updated_at")[:20]
-    recent_payload = RobotComponentSerializer(recent_components, many=True).data
-
-    top_high_risk = RobotComponent.objects.select_related("group").filter(level="H").order_by("-updated_at")[:20]
-    top_high_risk_payload = RobotComponentSerializer(top_high_risk, many=True).data
-
-    return Response(
-        {
-            "summary": {
-                "total": total,
-                "highRisk": high_risk,
-                "historyHighRisk": history_high_risk,
-                "marked": marked,
-            },
-            "groupStats": group_payload,
-            "levelDistribution": level_dist,
-            "axisBad": axis_bad,
-            "events24h": hourly_series,
-            "recentUpdated": recent_payload,
-            "highRiskList": top_high_risk_payload,
-            "generatedAt": now.isoformat(),
-        }
-    )
+    return Response(build_dashboard_payload())
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsStaffOrReadOnly])
+def telemetry(request):
+    """
+    批量上报遥测数据
+
+    请求体为遥测列表，或 {"items": [...]}；每条按 robot_id 匹配部件，未提供的字段保持不变。
+    """
+    items = request.data.get("items") if isinstance(request.data, dict) else request.data
+    if not isinstance(items, list) or not items:
+        return Response({"error": "items 必须是非空列表"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > MAX_TELEMETRY_BATCH:
+        return Response({"error": f"单次最多上报 {MAX_TELEMETRY_BATCH} 条遥测"}, status=status.HTTP_400_BAD_REQUEST)
+
+    result = apply_telemetry(items)
+    if not result["accepted"]:
+        return Response(result, status=status.HTTP_400_BAD_REQUEST)
+    return Response(result)